@@ -0,0 +1,333 @@
+import ssl
+import time
+import socket
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NameResolutionError, NewConnectionError
+from urllib3.util.connection import allowed_gai_family
+from ..core.metrics import REGISTRY
+
+DNS_LOOKUPS = REGISTRY.counter('raspboard_dns_lookups_total', 'Host lookups by result (hit, stale, miss, error)',
+                               ('result',))
+TLS_HANDSHAKES = REGISTRY.counter('raspboard_tls_handshakes_total', 'TLS handshakes, full or resumed', ('resumed',))
+CONNECTIONS = REGISTRY.counter('raspboard_api_connections_total',
+                               'Requests by connection state (new, preconnected, reused)', ('state',))
+
+
+def connection_stats() -> Dict[str, int]:
+    """Requests so far by connection state, e.g. {'new': 3, 'reused': 12}."""
+    return {values[0]: int(series.value) for values, series in CONNECTIONS.series().items()}
+
+
+# getaddrinfo doesn't report record TTLs; the API host's records live much longer than this
+DNS_TTL = 300
+# How long an expired address may still be used while it is refreshed (or the resolver is down)
+DNS_STALE_SECONDS = 24 * 3600
+
+
+class DNSCache:
+    """Host lookups cached with stale-while-revalidate.
+
+    A fresh entry is served from memory. An expired one is still served
+    (for up to `stale_for` seconds) while a background thread resolves it
+    again, so a refresh never waits on the resolver once the host has been
+    seen, and a resolver outage doesn't take the dashboard down with it.
+    """
+
+    def __init__(self, ttl: float = DNS_TTL, stale_for: float = DNS_STALE_SECONDS):
+        self.ttl = ttl
+        self.stale_for = stale_for
+        # (host, port) -> (addresses, resolved_at)
+        self._entries: Dict[Tuple[str, int], Tuple[List[str], float]] = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Addresses to try in order; raises socket.gaierror when there are none."""
+        key = (host, port)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None:
+            addresses, resolved_at = entry
+            age = time.monotonic() - resolved_at
+            if age < self.ttl:
+                DNS_LOOKUPS.labels('hit').inc()
+                return list(addresses)
+            if age < self.ttl + self.stale_for:
+                DNS_LOOKUPS.labels('stale').inc()
+                self._refresh_later(key)
+                return list(addresses)
+        DNS_LOOKUPS.labels('miss').inc()
+        return list(self._lookup(key))
+
+    def demote(self, host: str, port: int, address: str):
+        """Move an address that failed to connect to the back, e.g. IPv6 on an IPv4-only network."""
+        with self._lock:
+            entry = self._entries.get((host, port))
+            if entry is not None and address in entry[0]:
+                addresses, resolved_at = entry
+                self._entries[(host, port)] = ([a for a in addresses if a != address] + [address], resolved_at)
+
+    def expire(self, host: str):
+        """Revalidate host on its next use, e.g. after a connect to it failed."""
+        with self._lock:
+            for key, (addresses, _resolved_at) in list(self._entries.items()):
+                if key[0] == host:
+                    self._entries[key] = (addresses, time.monotonic() - self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _lookup(self, key: Tuple[str, int]) -> List[str]:
+        # A refresh keeps the order learned from failed connects
+        with self._lock:
+            entry = self._entries.get(key)
+        known = entry[0] if entry is not None else []
+        try:
+            infos = socket.getaddrinfo(key[0], key[1], allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            DNS_LOOKUPS.labels('error').inc()
+            raise
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        if not addresses:
+            raise socket.gaierror(socket.EAI_NONAME, f"No addresses for {key[0]}")
+        addresses.sort(key=lambda address: known.index(address) if address in known else -1)
+        with self._lock:
+            self._entries[key] = (addresses, time.monotonic())
+        return addresses
+
+    def _refresh_later(self, key: Tuple[str, int]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        threading.Thread(target=self._refresh, args=(key,), name="dns-refresh", daemon=True).start()
+
+    def _refresh(self, key: Tuple[str, int]):
+        try:
+            self._lookup(key)
+        except (socket.gaierror, OSError) as e:
+            # Keep serving the stale address until stale_for runs out
+            logging.warning(f"DNS refresh for {key[0]} failed, using the cached addresses: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+
+# Shared by every session in the process, like the system resolver it fronts
+DNS_CACHE = DNSCache()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """Client context that offers the last TLS session for a host when reconnecting.
+
+    A resumed handshake skips the certificate exchange and verification,
+    which is most of a handshake's cost on a Pi. Unlike urllib3's default
+    context, session tickets are left enabled.
+    """
+
+    def __new__(cls, ca_bundle: Optional[str] = DEFAULT_CA_BUNDLE_PATH):
+        return super().__new__(cls, ssl.PROTOCOL_TLS_CLIENT)
+
+    def __init__(self, ca_bundle: Optional[str] = DEFAULT_CA_BUNDLE_PATH):
+        super().__init__()
+        self.minimum_version = ssl.TLSVersion.TLSv1_2
+        self.options |= ssl.OP_NO_COMPRESSION
+        # Loaded once here instead of for every new connection
+        if ca_bundle:
+            self.load_verify_locations(ca_bundle)
+        else:
+            self.load_default_certs()
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        # TLS 1.3 tickets arrive after the handshake, so also keep the live socket to ask later
+        self._sockets: Dict[str, weakref.ref] = {}
+        self._session_lock = threading.Lock()
+
+    def wrap_socket(self, sock, *args, server_hostname=None, session=None, **kwargs):
+        if session is None and server_hostname:
+            session = self._session_for(server_hostname)
+        ssl_sock = super().wrap_socket(sock, *args, server_hostname=server_hostname, session=session, **kwargs)
+        if server_hostname:
+            with self._session_lock:
+                self._sockets[server_hostname] = weakref.ref(ssl_sock)
+        TLS_HANDSHAKES.labels('true' if ssl_sock.session_reused else 'false').inc()
+        return ssl_sock
+
+    def remember(self, server_hostname: str, ssl_sock):
+        """Keep ssl_sock's session for server_hostname, e.g. right before closing it."""
+        session = getattr(ssl_sock, 'session', None)
+        if session is not None:
+            with self._session_lock:
+                self._sessions[server_hostname] = session
+
+    def _session_for(self, server_hostname: str) -> Optional[ssl.SSLSession]:
+        with self._session_lock:
+            ref = self._sockets.get(server_hostname)
+            ssl_sock = ref() if ref is not None else None
+        if ssl_sock is not None:
+            try:
+                self.remember(server_hostname, ssl_sock)
+            except (OSError, ValueError):
+                pass  # Socket closed meanwhile; use the session we kept
+        with self._session_lock:
+            return self._sessions.get(server_hostname)
+
+
+class WarmConnectionMixin:
+    """Resolves through DNS_CACHE and counts how each request got its connection."""
+
+    dns_cache = DNS_CACHE
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.served = 0
+        self.preconnected = False
+
+    def _new_conn(self):
+        # _dns_host is urllib3 2.x internals (see requirements.txt); without it, resolve as urllib3 does
+        hostname = getattr(self, '_dns_host', None)
+        if hostname is None:
+            return super()._new_conn()
+        try:
+            addresses = self.dns_cache.resolve(hostname, self.port)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        # Connect to the cached addresses in turn; SNI and certificate checks still use self.host
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    self.dns_cache.demote(hostname, self.port, address)
+                    error = e
+        finally:
+            self._dns_host = hostname
+        self.dns_cache.expire(hostname)
+        raise error
+
+    def request(self, *args, **kwargs):
+        if self.served:
+            state = 'reused'
+        elif self.preconnected:
+            state = 'preconnected'
+        else:
+            state = 'new'
+        CONNECTIONS.labels(state).inc()
+        self.served += 1
+        return super().request(*args, **kwargs)
+
+    def close(self):
+        self.served = 0
+        self.preconnected = False
+        super().close()
+
+
+class WarmHTTPConnection(WarmConnectionMixin, HTTPConnection):
+    pass
+
+
+class WarmHTTPSConnection(WarmConnectionMixin, HTTPSConnection):
+    @property
+    def is_connected(self) -> bool:
+        # TLS 1.3 servers send session tickets right after the handshake. Unread,
+        # they make an idle pre-connected socket look readable, i.e. dropped.
+        if self.sock is not None and not self.served:
+            self._read_tickets()
+        return super().is_connected
+
+    def _read_tickets(self):
+        sock = self.sock
+        timeout = sock.gettimeout()
+        try:
+            sock.settimeout(0)
+            # Processes pending handshake messages; an idle connection has no data for us
+            sock.recv(1)
+        except ssl.SSLWantReadError:
+            sock.settimeout(timeout)
+            return
+        except OSError:
+            pass
+        # EOF, an error or unexpected data: the connection can't be used
+        self.close()
+
+    def close(self):
+        if self.sock is not None and isinstance(self.ssl_context, ResumingSSLContext):
+            try:
+                self.ssl_context.remember(getattr(self, '_tunnel_host', None) or self.host, self.sock)
+            except (OSError, ValueError):
+                pass
+        super().close()
+
+
+class WarmHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = WarmHTTPConnection
+
+
+class WarmHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = WarmHTTPSConnection
+
+
+class WarmAdapter(HTTPAdapter):
+    """HTTPAdapter with cached DNS, TLS session resumption and pre-connecting.
+
+    Mount it on a requests.Session for both schemes. preconnect() opens (or
+    checks) pooled connections ahead of a request, so the request itself
+    finds a live connection instead of paying for DNS, TCP and TLS.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.ssl_context = ResumingSSLContext()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault('ssl_context', self.ssl_context)
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': WarmHTTPConnectionPool,
+            'https': WarmHTTPSConnectionPool,
+        }
+
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        if verify is True and conn.ca_certs == DEFAULT_CA_BUNDLE_PATH:
+            # Already loaded into ssl_context; urllib3 would re-read the bundle per connection
+            conn.ca_certs = None
+
+    def preconnect(self, url: str, count: int = 1, timeout: float = 3, verify=True) -> int:
+        """Make sure `count` pooled connections to url's host are open; returns how many were opened.
+
+        verify must be what the session will send with (it is part of the pool key),
+        see Session.merge_environment_settings().
+        """
+        request = requests.Request('GET', url).prepare()
+        pool = self.get_connection_with_tls_context(request, verify=verify)
+        if not hasattr(pool, '_get_conn'):
+            # urllib3 internals; the request will just connect itself
+            return 0
+        self.cert_verify(pool, url, verify, None)
+        taken = []
+        opened = 0
+        try:
+            for _ in range(count):
+                # Dropped connections are closed by _get_conn and come back unconnected
+                conn = pool._get_conn(timeout=0)
+                taken.append(conn)
+                if conn.is_connected:
+                    continue
+                conn.timeout = timeout
+                conn.connect()
+                conn.preconnected = True
+                opened += 1
+        finally:
+            for conn in taken:
+                pool._put_conn(conn)
+        return opened
@@ -0,0 +1,161 @@
+import json
+import os
+import time
+import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Any, Optional, Tuple
+from .weather_api import PARSE_SECONDS, WeatherAPI
+from .resilience import DeadlineExceeded, deadline, time_left
+from ..core.atomic_file import atomic_write
+from ..core.metrics import REGISTRY
+from ..models.weather_data import WeatherData
+
+# How long a previous air-quality / forecast response may stand in for one
+# that failed in the current cycle. Forecasts only change once per model run.
+AIR_QUALITY_FALLBACK_MAX_AGE = 3600
+FORECAST_FALLBACK_MAX_AGE = 3 * 3600
+
+FALLBACKS = REGISTRY.counter('raspboard_fallback_responses_total',
+                             'Optional endpoints answered from the last good response', ('endpoint',))
+
+
+class FetchPlan:
+    """Fetches current weather, air quality and forecast for a city in parallel.
+
+    The air-quality endpoint needs coordinates, which used to force it to wait
+    for the current-weather response. A city's coordinates never change, so
+    they are resolved once and persisted; after that all three requests start
+    together and a refresh costs the slowest single round trip.
+
+    Current weather is required. Air quality and forecast are optional: when
+    one of them fails, the last good response is reused for a while, so a
+    forecast timeout doesn't throw away fresh current conditions.
+
+    With a time_budget, fetch() returns within that many seconds: the
+    deadline is passed to the requests (which shorten their timeouts and
+    retries to fit) and optional endpoints still pending at the deadline
+    are treated as failed.
+    """
+
+    def __init__(self, weather_api: WeatherAPI, location_path: str, time_budget: Optional[float] = None):
+        self.weather_api = weather_api
+        self.location_path = location_path
+        self.time_budget = time_budget
+        self._lock = threading.Lock()
+        self._locations: Dict[str, Dict[str, Any]] = self._load_locations()
+        self._last_good: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = {}
+        # Separate pool: fetch() itself runs on the app's executor and must not
+        # wait on tasks queued behind it in that same pool.
+        self._pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix="weather-fetch")
+
+    def coordinates(self, city: str) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            location = self._locations.get(city)
+        if location is None:
+            return None
+        return location['lat'], location['lon']
+
+    def city_id(self, city: str) -> Optional[int]:
+        with self._lock:
+            location = self._locations.get(city)
+        return location.get('id') if location else None
+
+    def remember_location(self, city: str, current_data: Dict[str, Any]):
+        coord = current_data.get('coord')
+        if not coord:
+            return
+        location = {'lat': coord['lat'], 'lon': coord['lon'], 'id': current_data.get('id')}
+        with self._lock:
+            if self._locations.get(city) == location:
+                return
+            self._locations[city] = location
+            self._save_locations()
+
+    def fetch(self, city: str, current_data: Optional[Dict[str, Any]] = None) -> WeatherData:
+        """Fetch everything for city; pass current_data to reuse a batched current-weather response."""
+        with deadline(self.time_budget):
+            return self._fetch(city, current_data)
+
+    def _fetch(self, city: str, current_data: Optional[Dict[str, Any]]) -> WeatherData:
+        coord = self.coordinates(city)
+        if current_data is not None:
+            current_future: Future = Future()
+            current_future.set_result(current_data)
+        else:
+            current_future = self._submit(self.weather_api.get_current_weather, city)
+        forecast_future: Future = self._submit(self.weather_api.get_forecast, city)
+        if coord is None:
+            # First run for this city: air quality has to wait for the coordinates.
+            current_data = self._required_result(current_future)
+            self.remember_location(city, current_data)
+            coord = self.coordinates(city)
+            if coord is None:
+                # Without 'coord' in the response air quality can't be asked for; it is optional
+                air_future: Future = Future()
+                air_future.set_exception(LookupError(f"No coordinates for {city} in the current weather response"))
+            else:
+                air_future = self._submit(self.weather_api.get_air_quality, *coord)
+        else:
+            air_future = self._submit(self.weather_api.get_air_quality, *coord)
+            current_data = self._required_result(current_future)
+            self.remember_location(city, current_data)
+
+        air_data = self._optional_result(city, 'air_quality', air_future, AIR_QUALITY_FALLBACK_MAX_AGE) or {}
+        forecast_data = self._optional_result(city, 'forecast', forecast_future, FORECAST_FALLBACK_MAX_AGE) or {'list': []}
+        started = time.perf_counter()
+        weather_data = WeatherData.from_api_response(current_data, air_data, forecast_data)
+        PARSE_SECONDS.labels('from_api_response').observe(time.perf_counter() - started)
+        return weather_data
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, fn: Callable[..., Dict[str, Any]], *args) -> Future:
+        # Copy the context so the pool thread sees this fetch's deadline
+        return self._pool.submit(contextvars.copy_context().run, fn, *args)
+
+    @staticmethod
+    def _wait_time() -> Optional[float]:
+        left = time_left()
+        return None if left is None else max(0.0, left)
+
+    def _required_result(self, future: Future) -> Dict[str, Any]:
+        try:
+            return future.result(timeout=self._wait_time())
+        except FutureTimeoutError:
+            raise DeadlineExceeded("Current weather didn't arrive within the refresh deadline") from None
+
+    def _optional_result(self, city: str, endpoint: str, future: Future, max_age: float) -> Optional[Dict[str, Any]]:
+        key = (city, endpoint)
+        try:
+            data = future.result(timeout=self._wait_time())
+        except Exception as e:
+            previous = self._last_good.get(key)
+            if previous is not None and time.time() - previous[0] < max_age:
+                FALLBACKS.labels(endpoint).inc()
+                logging.warning(f"{endpoint} fetch failed, reusing previous response: {e}")
+                return previous[1]
+            logging.warning(f"{endpoint} fetch failed, showing partial data: {e}")
+            return None
+        self._last_good[key] = (time.time(), data)
+        return data
+
+    def _load_locations(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.location_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable location cache {self.location_path}: {e}")
+            return {}
+
+    def _save_locations(self):
+        try:
+            os.makedirs(os.path.dirname(self.location_path) or '.', exist_ok=True)
+            with atomic_write(self.location_path, encoding='utf-8') as f:
+                json.dump(self._locations, f)
+        except OSError as e:
+            logging.warning(f"Could not persist location cache: {e}")
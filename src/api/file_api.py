@@ -0,0 +1,52 @@
+import json
+import os
+import threading
+from typing import Dict, Any, Optional
+from .weather_api import WeatherAPI
+
+ICON_URL = "https://openweathermap.org/img/wn/{code}@{size}.png"
+
+
+class FileWeatherAPI(WeatherAPI):
+    """Serves OpenWeather-shaped responses from a local JSON file.
+
+    The file uses the cassette format of src.bench.cassette:
+    {"city": ..., "responses": {"weather": ..., "air_pollution": ..., "forecast": ...}}.
+    It is re-read whenever it changes, so another process (a sensor script,
+    a test) can update what the frame shows. Useful offline, as a last
+    resort behind the network providers, and as a stub in tests.
+    """
+
+    local = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mtime: Optional[float] = None
+        self._responses: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        # Upstream requests: none, so local reads don't count against the daily call budget
+        self.request_count = 0
+
+    def get_current_weather(self, city: str) -> Dict[str, Any]:
+        return self._response('weather')
+
+    def get_air_quality(self, lat: float, lon: float) -> Dict[str, Any]:
+        return self._response('air_pollution')
+
+    def get_forecast(self, city: str) -> Dict[str, Any]:
+        return self._response('forecast')
+
+    def get_weather_icon_url(self, icon_code: str, size: str = '2x') -> str:
+        return ICON_URL.format(code=icon_code, size=size)
+
+    def _response(self, endpoint: str) -> Dict[str, Any]:
+        mtime = os.stat(self.path).st_mtime
+        with self._lock:
+            if mtime != self._mtime:
+                with open(self.path, encoding='utf-8') as f:
+                    self._responses = json.load(f)['responses']
+                self._mtime = mtime
+            try:
+                return self._responses[endpoint]
+            except KeyError:
+                raise LookupError(f"{self.path} has no '{endpoint}' response") from None
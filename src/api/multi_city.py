@@ -0,0 +1,48 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, List, Tuple
+from .fetch_plan import FetchPlan
+from ..models.weather_data import WeatherData
+
+
+class MultiCityPlan:
+    """Keeps several cities' weather fresh with as few upstream calls as possible.
+
+    Current conditions for every city with a known provider ID are fetched
+    in one batch request (per 20 cities for OpenWeather). Each city's own
+    refresh then reuses its batched response and only calls the forecast and
+    air-quality endpoints, whose responses are cached for much longer.
+    """
+
+    def __init__(self, fetch_plan: FetchPlan):
+        self.fetch_plan = fetch_plan
+        self.weather_api = fetch_plan.weather_api
+        self._current: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def refresh_current(self, cities: List[str]):
+        """Batch-fetch current weather; cities without a known ID are fetched on their own later."""
+        if not self.weather_api.supports_batch:
+            return
+        ids = {}
+        for city in cities:
+            city_id = self.fetch_plan.city_id(city)
+            if city_id is not None:
+                ids[city_id] = city
+        if not ids:
+            return
+        results = self.weather_api.get_current_weather_batch(list(ids))
+        now = time.time()
+        with self._lock:
+            for current_data in results:
+                city = ids.get(current_data.get('id'))
+                if city is not None:
+                    self._current[city] = (now, current_data)
+        logging.info(f"Batched current weather for {len(results)} of {len(cities)} cities")
+
+    def fetch(self, city: str, max_age: float) -> WeatherData:
+        with self._lock:
+            cached = self._current.get(city)
+        current_data = cached[1] if cached and time.time() - cached[0] < max_age else None
+        return self.fetch_plan.fetch(city, current_data=current_data)
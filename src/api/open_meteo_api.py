@@ -0,0 +1,175 @@
+import time
+import threading
+import requests
+from typing import Dict, Any, Optional, Tuple
+from .weather_api import REQUEST_SECONDS, REQUESTS, WeatherAPI
+from .connection import WarmAdapter
+from .response_cache import ResponseCache, CachedResponse
+
+FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+GEOCODING_URL = "https://geocoding-api.open-meteo.com/v1/search"
+ICON_URL = "https://openweathermap.org/img/wn/{code}@{size}.png"
+
+# Open-Meteo runs its models every 15 minutes (current) to hourly (forecast, air quality);
+# a city's coordinates don't change.
+CACHE_TTLS = {
+    'forecast': 900,
+    'air_quality': 3600,
+    'geocoding': 30 * 24 * 3600,
+}
+
+# WMO weather interpretation codes -> OpenWeather icon (without d/n) and descriptions
+WMO_CODES = {
+    0: ('01', 'clear sky', '맑음'),
+    1: ('02', 'mainly clear', '대체로 맑음'),
+    2: ('03', 'partly cloudy', '구름 조금'),
+    3: ('04', 'overcast', '흐림'),
+    45: ('50', 'fog', '안개'),
+    48: ('50', 'depositing rime fog', '서리 안개'),
+    51: ('09', 'light drizzle', '약한 이슬비'),
+    53: ('09', 'drizzle', '이슬비'),
+    55: ('09', 'dense drizzle', '강한 이슬비'),
+    56: ('09', 'freezing drizzle', '어는 이슬비'),
+    57: ('09', 'dense freezing drizzle', '강한 어는 이슬비'),
+    61: ('10', 'light rain', '약한 비'),
+    63: ('10', 'rain', '비'),
+    65: ('10', 'heavy rain', '강한 비'),
+    66: ('13', 'freezing rain', '어는 비'),
+    67: ('13', 'heavy freezing rain', '강한 어는 비'),
+    71: ('13', 'light snow', '약한 눈'),
+    73: ('13', 'snow', '눈'),
+    75: ('13', 'heavy snow', '강한 눈'),
+    77: ('13', 'snow grains', '싸락눈'),
+    80: ('09', 'light rain showers', '약한 소나기'),
+    81: ('09', 'rain showers', '소나기'),
+    82: ('09', 'violent rain showers', '강한 소나기'),
+    85: ('13', 'snow showers', '소낙눈'),
+    86: ('13', 'heavy snow showers', '강한 소낙눈'),
+    95: ('11', 'thunderstorm', '뇌우'),
+    96: ('11', 'thunderstorm with hail', '우박을 동반한 뇌우'),
+    99: ('11', 'thunderstorm with heavy hail', '강한 우박을 동반한 뇌우'),
+}
+
+# European AQI band edges -> OpenWeather's 1 (good) .. 5 (very poor) index
+EUROPEAN_AQI_BANDS = (20, 40, 60, 80)
+
+
+class OpenMeteoAPI(WeatherAPI):
+    """Open-Meteo (no API key), normalized to OpenWeather-shaped responses.
+
+    WeatherData.from_api_response only understands OpenWeather's format, so
+    every response is translated here: WMO weather codes become OpenWeather
+    icons and descriptions, the European AQI becomes the 1-5 index and the
+    daily min/max forecast becomes one forecast slot per day. Current
+    weather and the forecast come from the same request.
+    """
+
+    def __init__(self, language: str = 'en', cache_dir: Optional[str] = None, base_url: Optional[str] = None):
+        self.language = language
+        # One base_url (e.g. a local stub) replaces all three Open-Meteo hosts
+        if base_url:
+            base_url = base_url.rstrip('/')
+            self.urls = {'forecast': f"{base_url}/v1/forecast", 'air_quality': f"{base_url}/v1/air-quality",
+                         'geocoding': f"{base_url}/v1/search"}
+        else:
+            self.urls = {'forecast': FORECAST_URL, 'air_quality': AIR_QUALITY_URL, 'geocoding': GEOCODING_URL}
+        self.session = requests.Session()
+        self.adapter = WarmAdapter()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+        self._timeout = (3, 5)
+        self.cache = ResponseCache(CACHE_TTLS, cache_dir, name='open_meteo_responses')
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+    def get_current_weather(self, city: str) -> Dict[str, Any]:
+        lat, lon, name = self._locate(city)
+        body = self._forecast(lat, lon)
+        current = body['current']
+        code = current.get('weather_code', 0)
+        icon, description_en, description_kr = WMO_CODES.get(code, WMO_CODES[0])
+        # Accumulations cover the preceding interval (15 min); OpenWeather reports the last hour
+        per_hour = 3600 / current.get('interval', 3600)
+        return {
+            'coord': {'lat': lat, 'lon': lon},
+            'name': name,
+            'dt': current['time'],
+            'main': {
+                'temp': current['temperature_2m'],
+                'feels_like': current['apparent_temperature'],
+                'humidity': current['relative_humidity_2m'],
+            },
+            'wind': {'speed': current['wind_speed_10m']},
+            'weather': [{
+                'description': description_kr if self.language == 'kr' else description_en,
+                'icon': icon + ('d' if current.get('is_day', 1) else 'n'),
+            }],
+            'rain': {'1h': round(current.get('rain', 0) * per_hour, 2)},
+            # Open-Meteo reports snowfall in cm
+            'snow': {'1h': round(current.get('snowfall', 0) * 10 * per_hour, 2)},
+        }
+
+    def get_air_quality(self, lat: float, lon: float) -> Dict[str, Any]:
+        body = self._get('air_quality', {'latitude': lat, 'longitude': lon, 'current': 'european_aqi',
+                                         'timeformat': 'unixtime'})
+        aqi = body['current'].get('european_aqi')
+        if aqi is None:
+            return {'list': []}
+        index = 1 + sum(1 for edge in EUROPEAN_AQI_BANDS if aqi > edge)
+        return {'list': [{'dt': body['current']['time'], 'main': {'aqi': index}}]}
+
+    def get_forecast(self, city: str) -> Dict[str, Any]:
+        lat, lon, _name = self._locate(city)
+        daily = self._forecast(lat, lon)['daily']
+        # One slot per day, at local noon so it groups under the right date
+        return {'list': [
+            {'dt': day + 12 * 3600, 'main': {'temp_min': temp_min, 'temp_max': temp_max}}
+            for day, temp_min, temp_max in zip(daily['time'], daily['temperature_2m_min'], daily['temperature_2m_max'])
+            if temp_min is not None and temp_max is not None
+        ]}
+
+    def get_weather_icon_url(self, icon_code: str, size: str = '2x') -> str:
+        return ICON_URL.format(code=icon_code, size=size)
+
+    def _locate(self, city: str) -> Tuple[float, float, str]:
+        body = self._get('geocoding', {'name': city.split(',')[0].strip(), 'count': 1,
+                                       'language': 'ko' if self.language == 'kr' else self.language})
+        results = body.get('results') or []
+        if not results:
+            raise LookupError(f"Open-Meteo doesn't know the city '{city}'")
+        return results[0]['latitude'], results[0]['longitude'], results[0].get('name', city)
+
+    def _forecast(self, lat: float, lon: float) -> Dict[str, Any]:
+        return self._get('forecast', {
+            'latitude': lat,
+            'longitude': lon,
+            'current': 'temperature_2m,relative_humidity_2m,apparent_temperature,is_day,rain,snowfall,'
+                       'weather_code,wind_speed_10m',
+            'daily': 'temperature_2m_max,temperature_2m_min',
+            'wind_speed_unit': 'ms',
+            'timezone': 'auto',
+            'timeformat': 'unixtime',
+            'forecast_days': 6,
+        })
+
+    def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        key = ResponseCache.key(endpoint, params)
+        return self.cache.fetch(endpoint, key, lambda _stale: self._request(endpoint, params))
+
+    def _request(self, endpoint: str, params: Dict[str, Any]) -> CachedResponse:
+        label = f'open_meteo_{endpoint}'
+        # Runs on the fetch plan's pool threads
+        with self._lock:
+            self.request_count += 1
+        started = time.perf_counter()
+        try:
+            response = self.session.get(self.urls[endpoint], params=params, timeout=self._timeout)
+        except requests.exceptions.RequestException as e:
+            REQUESTS.labels(label, type(e).__name__).inc()
+            raise
+        finally:
+            REQUEST_SECONDS.labels(label).observe(time.perf_counter() - started)
+        REQUESTS.labels(label, response.status_code).inc()
+        response.raise_for_status()
+        return CachedResponse(response.json(), time.time())
@@ -1,34 +1,309 @@
+import time
+import random
+import logging
+import threading
 import requests
-from typing import Dict, Any
-from .weather_api import WeatherAPI
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Tuple
+from .weather_api import PARSE_SECONDS, REQUEST_SECONDS, REQUESTS, WeatherAPI
+from .response_cache import ResponseCache, CachedResponse
+from .connection import WarmAdapter
+from .resilience import (CircuitBreaker, CircuitOpenError, DeadlineExceeded, LatencyTracker, RetryBudget,
+                         time_left)
+from ..core.metrics import REGISTRY
+
+DEFAULT_BASE_URL = "https://api.openweathermap.org/data/2.5"
+
+# OpenWeather refreshes current conditions about every 10 minutes, air quality
+# hourly and the forecast with each 3-hourly model run.
+DEFAULT_CACHE_TTLS = {
+    'weather': 600,
+    'group': 600,
+    'air_pollution': 1800,
+    'forecast': 3600,
+}
+
+# The /group endpoint accepts at most 20 city IDs per call
+GROUP_BATCH_SIZE = 20
+
+RESILIENCE = REGISTRY.counter('raspboard_api_resilience_total',
+                              'Retries, hedges and fail-fast requests by endpoint '
+                              '(retry, hedge, hedge_won, budget_exhausted, circuit_open, deadline)',
+                              ('endpoint', 'event'))
+CIRCUIT_STATE = REGISTRY.gauge('raspboard_api_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+                               ('endpoint',))
+
+# Current conditions are re-published about this often after their 'dt'
+OBSERVATION_PERIOD = 600
+# Shortest time a current-weather response is cached when the upstream is late
+MIN_OBSERVATION_TTL = 60
+
+# Attempts per request (first try included), if the retry budget allows
+MAX_ATTEMPTS = 3
+# Base of the jittered exponential pause between attempts
+RETRY_BACKOFF = 0.25
+# Don't start an attempt with less time left than this before the deadline
+MIN_ATTEMPT_SECONDS = 0.5
 
 class OpenWeatherAPI(WeatherAPI):
-    def __init__(self, api_key: str, language: str = 'en'):
+    supports_batch = True
+
+    def __init__(self, api_key: str, language: str = 'en', cache_dir: Optional[str] = None,
+                 cache_ttls: Optional[Dict[str, float]] = None, base_url: Optional[str] = None,
+                 hedge_percentile: float = 0):
         self.api_key = api_key
         self.language = language
-        self.base_url = "https://api.openweathermap.org/data/2.5"
-        # Reuse a single HTTP session for connection pooling and lower latency
+        # Overridable so the app can run against a local stub server (src.bench)
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip('/')
+        # Reuse a single HTTP session for connection pooling and lower latency;
+        # the adapter adds DNS caching, TLS resumption and preconnect()
         self.session = requests.Session()
+        self.adapter = WarmAdapter()
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
         # Default timeouts: (connect_timeout, read_timeout)
         self._timeout = (3, 5)
+        self.cache = ResponseCache(cache_ttls or DEFAULT_CACHE_TTLS, cache_dir, name='openweather_responses')
+        # Requests that actually went upstream (cache hits excluded, retries and hedges included)
+        self.request_count = 0
+        # Per-endpoint resilience: a slow or failing /forecast doesn't affect /weather
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.latencies: Dict[str, LatencyTracker] = {}
+        self.retry_budget = RetryBudget()
+        # Send a second request when the first is slower than this percentile (0 = off)
+        self.hedge_percentile = hedge_percentile
+        self._hedge_pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
 
     def get_current_weather(self, city: str) -> Dict[str, Any]:
         params = {'q': city, 'appid': self.api_key, 'units': 'metric', 'lang': self.language}
-        response = self.session.get(f"{self.base_url}/weather", params=params, timeout=self._timeout)
-        response.raise_for_status()
-        return response.json()
+        return self._get('weather', params)
+
+    def get_current_weather_batch(self, city_ids: List[int]) -> List[Dict[str, Any]]:
+        results = []
+        for start in range(0, len(city_ids), GROUP_BATCH_SIZE):
+            chunk = city_ids[start:start + GROUP_BATCH_SIZE]
+            params = {'id': ','.join(str(city_id) for city_id in chunk), 'appid': self.api_key,
+                      'units': 'metric', 'lang': self.language}
+            results.extend(self._get('group', params).get('list', []))
+        return results
 
     def get_air_quality(self, lat: float, lon: float) -> Dict[str, Any]:
         params = {'lat': lat, 'lon': lon, 'appid': self.api_key}
-        response = self.session.get(f"{self.base_url}/air_pollution", params=params, timeout=self._timeout)
-        response.raise_for_status()
-        return response.json()
+        return self._get('air_pollution', params)
 
     def get_forecast(self, city: str) -> Dict[str, Any]:
         params = {'q': city, 'appid': self.api_key, 'units': 'metric', 'lang': self.language}
-        response = self.session.get(f"{self.base_url}/forecast", params=params, timeout=self._timeout)
-        response.raise_for_status()
-        return response.json()
+        return self._get('forecast', params)
 
     def get_weather_icon_url(self, icon_code: str, size: str = '2x') -> str:
-        return f"https://openweathermap.org/img/wn/{icon_code}@{size}.png" 
\ No newline at end of file
+        return f"https://openweathermap.org/img/wn/{icon_code}@{size}.png"
+
+    def preconnect(self, at: float) -> int:
+        """Open connections for the requests a refresh at time `at` will make; returns how many were opened."""
+        # A refresh fetches current weather, air quality and the forecast in parallel
+        count = max(1, self.cache.expiring(('weather', 'air_pollution', 'forecast'), at))
+        # Same TLS settings (e.g. REQUESTS_CA_BUNDLE) as the requests, or they'd use another pool
+        verify = self.session.merge_environment_settings(self.base_url, {}, None, None, None)['verify']
+        return self.adapter.preconnect(self.base_url, count, timeout=self._timeout[0], verify=verify)
+
+    def _get(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        key = ResponseCache.key(endpoint, params)
+        return self.cache.fetch(endpoint, key, lambda stale: self._request(endpoint, params, stale))
+
+    def _request(self, endpoint: str, params: Dict[str, Any], stale: Optional[CachedResponse]) -> CachedResponse:
+        headers = {}
+        if stale is not None:
+            if stale.etag:
+                headers['If-None-Match'] = stale.etag
+            if stale.last_modified:
+                headers['If-Modified-Since'] = stale.last_modified
+        response = self._send_with_retries(endpoint, f"{self.base_url}/{endpoint}", params, headers)
+        if response.status_code == 304 and stale is not None:
+            # Not modified: keep the body we already have, restart its TTL
+            return CachedResponse(stale.body, time.time(), stale.etag, stale.last_modified,
+                                  self._observation_expiry(endpoint, stale.body, time.time()))
+        response.raise_for_status()
+        started = time.perf_counter()
+        body = response.json()
+        PARSE_SECONDS.labels(f'json_{endpoint}').observe(time.perf_counter() - started)
+        fetched_at = time.time()
+        return CachedResponse(
+            body,
+            fetched_at,
+            response.headers.get('ETag'),
+            response.headers.get('Last-Modified'),
+            self._observation_expiry(endpoint, body, fetched_at),
+        )
+
+    def _send_with_retries(self, endpoint: str, url: str, params: Dict[str, Any],
+                           headers: Dict[str, str]) -> requests.Response:
+        breaker = self._breaker(endpoint)
+        if not breaker.allow():
+            RESILIENCE.labels(endpoint, 'circuit_open').inc()
+            raise CircuitOpenError(f"{endpoint} requests paused after repeated failures, "
+                                   f"next try in {breaker.retry_in():.0f} s")
+        self.retry_budget.deposit()
+        attempt = 1
+        while True:
+            try:
+                response = self._send(endpoint, url, params, headers)
+            except requests.exceptions.RequestException as e:
+                self._record(endpoint, breaker, False)
+                if not self._may_retry(endpoint, attempt):
+                    raise
+                logging.info(f"{endpoint} request failed ({type(e).__name__}), retrying")
+            except BaseException:
+                # E.g. DeadlineExceeded before anything was sent: says nothing about
+                # the endpoint, but a half-open breaker must get its probe slot back
+                breaker.release()
+                raise
+            else:
+                # 4xx means the request was wrong (key, city), not that the endpoint is down
+                retryable = response.status_code >= 500
+                self._record(endpoint, breaker, not retryable)
+                if not retryable or not self._may_retry(endpoint, attempt):
+                    return response
+                logging.info(f"{endpoint} answered {response.status_code}, retrying")
+                response.close()
+            self._backoff(attempt)
+            attempt += 1
+
+    def _send(self, endpoint: str, url: str, params: Dict[str, Any], headers: Dict[str, str]) -> requests.Response:
+        hedge_after = self._hedge_delay(endpoint)
+        if hedge_after is None:
+            return self._get_once(endpoint, url, params, headers, self._attempt_timeout(endpoint))
+        pool = self._hedge_executor()
+        first = pool.submit(self._get_once, endpoint, url, params, headers, self._attempt_timeout(endpoint))
+        done, _ = wait([first], timeout=hedge_after)
+        if done or not self.retry_budget.withdraw():
+            return first.result()
+        # The first request is slower than usual: race a second one against it
+        RESILIENCE.labels(endpoint, 'hedge').inc()
+        second = pool.submit(self._get_once, endpoint, url, params, headers, self._attempt_timeout(endpoint))
+        pending = {first, second}
+        error: Optional[Exception] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.exceptions.RequestException as e:
+                    error = e
+                    continue
+                if future is second:
+                    RESILIENCE.labels(endpoint, 'hedge_won').inc()
+                for loser in pending:
+                    loser.add_done_callback(self._close_response)
+                return response
+        raise error
+
+    def _get_once(self, endpoint: str, url: str, params: Dict[str, Any], headers: Dict[str, str],
+                  timeout: Tuple[float, float]) -> requests.Response:
+        # Hedged attempts run on the hedge pool
+        with self._lock:
+            self.request_count += 1
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            REQUESTS.labels(endpoint, type(e).__name__).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUEST_SECONDS.labels(endpoint).observe(elapsed)
+        REQUESTS.labels(endpoint, response.status_code).inc()
+        if response.status_code < 500:
+            self._latency(endpoint).add(elapsed)
+        return response
+
+    def _attempt_timeout(self, endpoint: str) -> Tuple[float, float]:
+        """(connect, read) timeouts, shortened to what is left of the deadline."""
+        left = time_left()
+        if left is None:
+            return self._timeout
+        if left < MIN_ATTEMPT_SECONDS:
+            RESILIENCE.labels(endpoint, 'deadline').inc()
+            raise DeadlineExceeded(f"No time left for {endpoint} within the refresh deadline")
+        return min(self._timeout[0], left), min(self._timeout[1], left)
+
+    def _may_retry(self, endpoint: str, attempt: int) -> bool:
+        if attempt >= MAX_ATTEMPTS or not self._breaker(endpoint).allow():
+            return False
+        left = time_left()
+        if left is not None and left < MIN_ATTEMPT_SECONDS + RETRY_BACKOFF * 2 ** attempt:
+            return False
+        if not self.retry_budget.withdraw():
+            RESILIENCE.labels(endpoint, 'budget_exhausted').inc()
+            return False
+        RESILIENCE.labels(endpoint, 'retry').inc()
+        return True
+
+    @staticmethod
+    def _backoff(attempt: int):
+        time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+
+    def _hedge_delay(self, endpoint: str) -> Optional[float]:
+        if not self.hedge_percentile:
+            return None
+        delay = self._latency(endpoint).percentile(self.hedge_percentile)
+        left = time_left()
+        if delay is None or (left is not None and left < delay + MIN_ATTEMPT_SECONDS):
+            return None
+        return delay
+
+    @staticmethod
+    def _record(endpoint: str, breaker: CircuitBreaker, success: bool):
+        previous = breaker.state
+        if success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if breaker.state != previous:
+            if breaker.state == CircuitBreaker.OPEN:
+                logging.warning(f"Pausing {endpoint} requests for {breaker.retry_in():.0f} s after repeated failures")
+            elif breaker.state == CircuitBreaker.CLOSED:
+                logging.info(f"{endpoint} requests resumed")
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self.breakers.get(endpoint)
+            if breaker is None:
+                breaker = self.breakers[endpoint] = CircuitBreaker()
+                CIRCUIT_STATE.labels(endpoint).set_function(lambda: breaker.state)
+            return breaker
+
+    def _latency(self, endpoint: str) -> LatencyTracker:
+        with self._lock:
+            tracker = self.latencies.get(endpoint)
+            if tracker is None:
+                tracker = self.latencies[endpoint] = LatencyTracker()
+            return tracker
+
+    def _hedge_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._hedge_pool is None:
+                self._hedge_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api-hedge")
+            return self._hedge_pool
+
+    @staticmethod
+    def _close_response(future: Future):
+        if not future.cancelled() and future.exception() is None:
+            future.result().close()
+
+    def _observation_expiry(self, endpoint: str, body: Dict[str, Any], fetched_at: float) -> Optional[float]:
+        # Current conditions go stale when the next observation is due, not a
+        # fixed TTL after we happened to fetch them. That way a refresh timed
+        # just after the upstream update isn't answered from the cache.
+        if endpoint == 'weather':
+            observed = [body.get('dt')]
+        elif endpoint == 'group':
+            observed = [item.get('dt') for item in body.get('list', [])]
+        else:
+            return None
+        observed = [dt for dt in observed if dt]
+        if not observed:
+            return None
+        ttl = self.cache.ttls.get(endpoint, OBSERVATION_PERIOD)
+        expires_at = min(observed) + OBSERVATION_PERIOD
+        return min(max(expires_at, fetched_at + MIN_OBSERVATION_TTL), fetched_at + ttl)
@@ -0,0 +1,188 @@
+import os
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .weather_api import WeatherAPI
+from ..config.settings import Settings
+from ..core.metrics import REGISTRY
+
+PROVIDER_SECONDS = REGISTRY.gauge('raspboard_provider_latency_seconds',
+                                  'Rolling (EWMA) upstream latency by provider and call', ('provider', 'call'))
+PROVIDER_CALLS = REGISTRY.counter('raspboard_provider_calls_total', 'Provider calls by result (ok, error, failover)',
+                                  ('provider', 'result'))
+
+# Weight of the newest sample in the rolling latency estimate
+LATENCY_ALPHA = 0.3
+# A provider that failed is only tried after the others for this long
+FAILURE_COOLDOWN = 120
+# A network provider is tried after the other network providers while its latency
+# is more than SLOW_FACTOR times, and SLOW_MARGIN seconds above, the fastest one's
+SLOW_FACTOR = 2.0
+SLOW_MARGIN = 0.5
+# Every this many calls the runner-up goes first, so its estimate stays current
+EXPLORE_EVERY = 20
+
+
+def _openweather(settings: Settings, cache_dir: Optional[str]) -> WeatherAPI:
+    from .openweather_api import OpenWeatherAPI
+    if not settings.api_key:
+        raise ValueError("The openweather provider needs OPENWEATHER_API_KEY")
+    return OpenWeatherAPI(settings.api_key, settings.language, cache_dir=cache_dir, base_url=settings.api_base_url,
+                          hedge_percentile=settings.hedge_percentile)
+
+
+def _open_meteo(settings: Settings, cache_dir: Optional[str]) -> WeatherAPI:
+    from .open_meteo_api import OpenMeteoAPI
+    return OpenMeteoAPI(settings.language, cache_dir=cache_dir, base_url=settings.open_meteo_base_url)
+
+
+def _file(settings: Settings, cache_dir: Optional[str]) -> WeatherAPI:
+    from .file_api import FileWeatherAPI
+    if not settings.weather_file:
+        raise ValueError("The file provider needs WEATHER_FILE")
+    return FileWeatherAPI(settings.weather_file)
+
+
+# Names usable in WEATHER_PROVIDERS -> factory(settings, response cache dir or None)
+PROVIDERS: Dict[str, Callable[[Settings, Optional[str]], WeatherAPI]] = {
+    'openweather': _openweather,
+    'open-meteo': _open_meteo,
+    'file': _file,
+}
+
+
+def create_weather_api(settings: Settings, cache_dir: Optional[str] = None) -> WeatherAPI:
+    """The configured provider, or a FailoverWeatherAPI over several."""
+    providers = []
+    for name in settings.weather_providers:
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown weather provider '{name}' (known: {', '.join(PROVIDERS)})")
+        # Separate cache directories: cache keys don't include the provider
+        provider_cache_dir = os.path.join(cache_dir, name) if cache_dir and name != 'openweather' else cache_dir
+        providers.append((name, PROVIDERS[name](settings, provider_cache_dir)))
+    if len(providers) == 1:
+        return providers[0][1]
+    return FailoverWeatherAPI(providers)
+
+
+class ProviderHealth:
+    """Rolling latency per call and the time of the last failure of one provider."""
+
+    def __init__(self):
+        self.latency: Dict[str, float] = {}
+        self.failed_at = 0.0
+
+    def observe(self, call: str, seconds: float):
+        previous = self.latency.get(call)
+        self.latency[call] = seconds if previous is None else previous + LATENCY_ALPHA * (seconds - previous)
+
+
+class FailoverWeatherAPI(WeatherAPI):
+    """Several providers behind the WeatherAPI interface.
+
+    Providers are tried in the configured order, with two demotions: one
+    that raised goes to the back of the line for FAILURE_COOLDOWN seconds,
+    and a network provider that is much slower for a call than another
+    network provider (see SLOW_FACTOR) goes behind it. Local providers keep
+    their configured place, so e.g. a file is never tried before a healthy
+    network provider listed ahead of it. Only calls that reached the network
+    (request_count went up) update the latency estimate, so cache hits
+    don't make a provider look fast. Every provider returns OpenWeather-
+    shaped responses, so results mix freely into one WeatherData.
+    """
+
+    def __init__(self, providers: List[Tuple[str, WeatherAPI]]):
+        self.providers = providers
+        self.health = {name: ProviderHealth() for name, _api in providers}
+        self.supports_batch = any(api.supports_batch for _name, api in providers)
+        self._calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def request_count(self) -> int:
+        return sum(getattr(api, 'request_count', 0) for _name, api in self.providers)
+
+    @property
+    def session(self):
+        # Shared with the icon store; the first provider with one
+        for _name, api in self.providers:
+            if hasattr(api, 'session'):
+                return api.session
+        return None
+
+    def get_current_weather(self, city: str) -> Dict[str, Any]:
+        return self._call('get_current_weather', city)
+
+    def get_current_weather_batch(self, city_ids: List[int]) -> List[Dict[str, Any]]:
+        return self._call('get_current_weather_batch', city_ids)
+
+    def get_air_quality(self, lat: float, lon: float) -> Dict[str, Any]:
+        return self._call('get_air_quality', lat, lon)
+
+    def get_forecast(self, city: str) -> Dict[str, Any]:
+        return self._call('get_forecast', city)
+
+    def get_weather_icon_url(self, icon_code: str, size: str = '2x') -> str:
+        return self.providers[0][1].get_weather_icon_url(icon_code, size)
+
+    def preconnect(self, at: float) -> int:
+        # Warm up whichever provider the next refresh will start with
+        return self.ordered('get_current_weather')[0][1].preconnect(at)
+
+    def ordered(self, call: str) -> List[Tuple[str, WeatherAPI]]:
+        """Providers in the order `call` would try them."""
+        now = time.time()
+        with self._lock:
+            healthy, cooling = [], []
+            for provider in self.providers:
+                in_cooldown = now - self.health[provider[0]].failed_at < FAILURE_COOLDOWN
+                (cooling if in_cooldown else healthy).append(provider)
+            latency = {name: self.health[name].latency.get(call) for name, _api in healthy}
+        # Network providers swap places among themselves only; local ones stay put
+        slots = [index for index, (_name, api) in enumerate(healthy) if not api.local]
+        measured = [latency[healthy[index][0]] for index in slots if latency[healthy[index][0]] is not None]
+        fastest = min(measured, default=None)
+
+        def slow(name: str) -> bool:
+            seconds = latency[name]
+            return (fastest is not None and seconds is not None
+                    and seconds > fastest * SLOW_FACTOR and seconds - fastest > SLOW_MARGIN)
+
+        network = sorted((healthy[index] for index in slots), key=lambda provider: slow(provider[0]))
+        for index, provider in zip(slots, network):
+            healthy[index] = provider
+        return healthy + cooling
+
+    def _call(self, call: str, *args) -> Any:
+        candidates = [(name, api) for name, api in self.ordered(call)
+                      if call != 'get_current_weather_batch' or api.supports_batch]
+        with self._lock:
+            self._calls += 1
+            explore = self._calls % EXPLORE_EVERY == 0
+        if explore and len(candidates) > 1 and not candidates[1][1].local:
+            candidates[0], candidates[1] = candidates[1], candidates[0]
+        error: Optional[Exception] = None
+        for name, api in candidates:
+            health = self.health[name]
+            requests_before = getattr(api, 'request_count', None)
+            started = time.perf_counter()
+            try:
+                result = getattr(api, call)(*args)
+            except Exception as e:
+                PROVIDER_CALLS.labels(name, 'error').inc()
+                with self._lock:
+                    health.failed_at = time.time()
+                logging.warning(f"Weather provider {name} failed for {call}: {e}")
+                error = e
+                continue
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                health.failed_at = 0.0
+            if requests_before is None or getattr(api, 'request_count', 0) != requests_before:
+                with self._lock:
+                    health.observe(call, elapsed)
+                    PROVIDER_SECONDS.labels(name, call).set(health.latency[call])
+            PROVIDER_CALLS.labels(name, 'failover' if error is not None else 'ok').inc()
+            return result
+        raise error
@@ -0,0 +1,156 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Iterator, Optional
+
+# Monotonic time by which the current refresh must be done; None = no limit.
+# A ContextVar so it follows work handed to other threads with copy_context().run.
+_DEADLINE: ContextVar[Optional[float]] = ContextVar('raspboard_deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The refresh's time budget ran out before this request could be made."""
+
+
+class CircuitOpenError(ConnectionError):
+    """Requests to an endpoint are paused after repeated failures."""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Limit everything inside (and copied contexts) to `seconds`; nested limits only shrink."""
+    if seconds is None:
+        yield _DEADLINE.get()
+        return
+    at = time.monotonic() + seconds
+    current = _DEADLINE.get()
+    if current is not None:
+        at = min(at, current)
+    token = _DEADLINE.set(at)
+    try:
+        yield at
+    finally:
+        _DEADLINE.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline (may be negative), or None without one."""
+    at = _DEADLINE.get()
+    return None if at is None else at - time.monotonic()
+
+
+class CircuitBreaker:
+    """Stops calling an endpoint that keeps failing, then probes it.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests fail fast for `reset_timeout` seconds. Then it is half-open:
+    a single probe request is let through. Success closes the circuit;
+    failure opens it again for twice as long, up to `max_reset_timeout`.
+    Every allowed call must end in record_success(), record_failure() or
+    release(), or the probe slot stays taken.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 30, max_reset_timeout: float = 600):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._open_for = reset_timeout
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self._open_for:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return self.state != self.OPEN
+
+    def retry_in(self) -> float:
+        with self._lock:
+            return max(0.0, self._opened_at + self._open_for - time.monotonic())
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._open_for = self.reset_timeout
+            self._probing = False
+
+    def release(self):
+        """End a call that neither succeeded nor failed (e.g. no time was left to send it)."""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._open_for = min(self._open_for * 2, self.max_reset_timeout)
+                self._open()
+                return
+            self.failures += 1
+            if self.state == self.CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._probing = False
+
+
+class RetryBudget:
+    """Retries (and hedges) allowed as a share of first attempts.
+
+    Every request earns `ratio` of a token, each retry spends one; at most
+    `reserve` tokens are kept. So retries add at most `ratio` extra load in
+    steady state and can't turn an outage into a request storm.
+    """
+
+    def __init__(self, ratio: float = 0.2, reserve: float = 3.0):
+        self.ratio = ratio
+        self.reserve = reserve
+        self._tokens = reserve
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        with self._lock:
+            self._tokens = min(self.reserve, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class LatencyTracker:
+    """Recent latencies of one endpoint, for choosing when to hedge."""
+
+    def __init__(self, size: int = 100, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """None until enough samples have been seen."""
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
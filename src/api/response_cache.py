@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Callable, Iterable, Optional
+from ..core.atomic_file import atomic_write
+from ..core.lru import LRUCache
+
+# Decoded responses held in memory per cache; evicted entries are re-read from disk
+MEMORY_BYTES = 2 * 1024 * 1024
+# Decoded dicts take roughly this many times their JSON size
+DECODED_OVERHEAD = 6
+
+
+@dataclass
+class CachedResponse:
+    body: Dict[str, Any]
+    fetched_at: float
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    # Overrides the endpoint TTL when the body says when it goes stale
+    expires_at: Optional[float] = None
+
+
+class ResponseCache:
+    """TTL cache for decoded API responses with single-flight loading.
+
+    Each endpoint has its own time-to-live. Once an entry expires the loader
+    gets the stale entry so it can revalidate it with a conditional request
+    (ETag / Last-Modified) instead of re-downloading the body. Concurrent
+    requests for the same key share one load. With a cache_dir the entries
+    are also written to disk and survive restarts. Memory is bounded by
+    max_bytes; least recently used entries are dropped beyond it.
+    """
+
+    def __init__(self, ttls: Dict[str, float], cache_dir: Optional[str] = None, name: str = 'responses',
+                 max_bytes: int = MEMORY_BYTES):
+        self.ttls = ttls
+        self.cache_dir = cache_dir
+        self._entries: LRUCache[CachedResponse] = LRUCache(name, max_bytes, _entry_size)
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'revalidated': 0, 'coalesced': 0}
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(endpoint: str, params: Dict[str, Any]) -> str:
+        # The API key is left out so rotating it doesn't orphan cached entries.
+        items = sorted((k, str(v)) for k, v in params.items() if k != 'appid')
+        return endpoint + '?' + '&'.join(f"{k}={v}" for k, v in items)
+
+    def fetch(self, endpoint: str, key: str,
+              loader: Callable[[Optional[CachedResponse]], CachedResponse]) -> Dict[str, Any]:
+        """Return the cached body for key, calling loader(stale_entry) when it has expired."""
+        ttl = self.ttls.get(endpoint, 0)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._entries.put(key, entry)
+            if entry is not None and self._is_fresh(entry, ttl):
+                self.stats['hits'] += 1
+                return entry.body
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+                self.stats['misses'] += 1
+            else:
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            new_entry = loader(entry)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            if entry is not None and new_entry.body is entry.body:
+                self.stats['revalidated'] += 1
+            self._entries.put(key, new_entry)
+            del self._inflight[key]
+        self._store(key, new_entry)
+        future.set_result(new_entry.body)
+        return new_entry.body
+
+    def expiring(self, endpoints: Iterable[str], at: float) -> int:
+        """How many cached entries of these endpoints will need a request at time `at`."""
+        endpoints = set(endpoints)
+        with self._lock:
+            entries = self._entries.items()
+        count = 0
+        for key, entry in entries:
+            endpoint = key.split('?', 1)[0]
+            if endpoint in endpoints and not self._is_fresh(entry, self.ttls.get(endpoint, 0), at):
+                count += 1
+        return count
+
+    @staticmethod
+    def _is_fresh(entry: CachedResponse, ttl: float, now: Optional[float] = None) -> bool:
+        if now is None:
+            now = time.time()
+        if entry.expires_at is not None:
+            return now < entry.expires_at
+        return now - entry.fetched_at < ttl
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+    def _load(self, key: str) -> Optional[CachedResponse]:
+        if not self.cache_dir:
+            return None
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return CachedResponse(**json.load(f))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable cached response for {key}: {e}")
+            return None
+
+    def _store(self, key: str, entry: CachedResponse):
+        if not self.cache_dir:
+            return
+        try:
+            with atomic_write(self._path(key), encoding='utf-8') as f:
+                json.dump(asdict(entry), f)
+        except OSError as e:
+            logging.warning(f"Could not persist cached response for {key}: {e}")
+
+
+def _entry_size(entry: CachedResponse) -> int:
+    return len(json.dumps(entry.body)) * DECODED_OVERHEAD
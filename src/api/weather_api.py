@@ -1,5 +1,12 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List
+from ..core.metrics import FAST_BUCKETS, REGISTRY
+
+# Shared by every provider and the fetch plan; defined once here
+REQUEST_SECONDS = REGISTRY.histogram('raspboard_api_request_seconds', 'Upstream request latency', ('endpoint',))
+REQUESTS = REGISTRY.counter('raspboard_api_requests_total', 'Upstream requests by result', ('endpoint', 'status'))
+PARSE_SECONDS = REGISTRY.histogram('raspboard_parse_seconds', 'Time spent decoding and parsing responses',
+                                   ('step',), buckets=FAST_BUCKETS)
 
 class WeatherAPI(ABC):
     @abstractmethod
@@ -17,6 +24,19 @@ class WeatherAPI(ABC):
         """Get weather forecast data for a city."""
         pass
 
+    # Providers with a batch endpoint override both of these
+    supports_batch = False
+    # Providers reading local data; never ranked above a healthy network provider
+    local = False
+
+    def get_current_weather_batch(self, city_ids: List[int]) -> List[Dict[str, Any]]:
+        """Get current weather for several cities (by provider city ID) in one request."""
+        raise NotImplementedError
+
+    def preconnect(self, at: float) -> int:
+        """Open connections ahead of a refresh due at time `at`; returns how many were opened."""
+        return 0
+
     @abstractmethod
     def get_weather_icon_url(self, icon_code: str, size: str = '2x') -> str:
         """Get URL for weather icon."""
@@ -0,0 +1,270 @@
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Sequence
+import psutil
+from PIL import Image
+from ..api.connection import DNS_CACHE
+from ..api.fetch_plan import FetchPlan
+from ..api.openweather_api import OpenWeatherAPI
+from ..models.history_store import HistoryStore
+from ..models.weather_data import WeatherData
+from ..ui.image_dashboard import ImageDashboard
+from ..ui.sinks import Sink
+from ..ui.sparkline import TREND_HOURS, TREND_SERIES
+from .cassette import Cassette, DEFAULT_CASSETTE, ENDPOINTS
+from .stub_server import STUB_HOST, FaultyResolver, StubServer
+
+
+class NullSink(Sink):
+    """Discards frames; rendering cost is measured, display I/O is not."""
+
+    def __init__(self, size):
+        self.size = size
+        self.frames = 0
+
+    def write(self, image: Image.Image):
+        self.frames += 1
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(values_ms: Sequence[float]) -> Dict[str, float]:
+    return {
+        'count': len(values_ms),
+        'p50_ms': round(percentile(values_ms, 50), 3),
+        'p99_ms': round(percentile(values_ms, 99), 3),
+        'max_ms': round(max(values_ms, default=0.0), 3),
+    }
+
+
+class Benchmark:
+    """End-to-end refresh benchmarks against a StubServer.
+
+    Drives the same pieces as a headless refresh, OpenWeatherAPI through
+    FetchPlan, WeatherData.from_api_response and ImageDashboard, with every
+    response cache disabled so each refresh goes over HTTP to the stub.
+    bench_refresh() turns the stub's ETags off so every response is a full
+    200 that is transferred and decoded; with revalidate=True it keeps them,
+    measuring refreshes that mostly get 304s, and reports how many did.
+    """
+
+    def __init__(self, cassette: Cassette, stub: StubServer, size=(800, 480), show_trends: bool = True):
+        self.cassette = cassette
+        self.stub = stub
+        self.workdir = tempfile.mkdtemp(prefix='raspboard-bench-')
+        self.api = OpenWeatherAPI('bench', cache_ttls={endpoint: 0 for endpoint in ENDPOINTS},
+                                  base_url=stub.base_url(STUB_HOST))
+        self.fetch_plan = FetchPlan(self.api, os.path.join(self.workdir, 'locations.json'))
+        self.sink = NullSink(size)
+        self.view = ImageDashboard(self.sink, 'en', show_trends=show_trends)
+        self.history = HistoryStore(os.path.join(self.workdir, 'history'))
+        self.show_trends = show_trends
+
+    def bench_parse(self, iterations: int) -> Dict[str, Any]:
+        """Cost of decoding each endpoint's JSON and of building WeatherData from it."""
+        payloads = {endpoint: json.dumps(self.cassette.body(endpoint)) for endpoint in ENDPOINTS}
+        report = {}
+        for endpoint, payload in payloads.items():
+            timings = []
+            for _ in range(iterations):
+                started = time.perf_counter()
+                json.loads(payload)
+                timings.append((time.perf_counter() - started) * 1000)
+            report[f'json_{endpoint}'] = dict(summarize(timings), bytes=len(payload))
+        bodies = [self.cassette.body(endpoint) for endpoint in ENDPOINTS]
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            WeatherData.from_api_response(*bodies)
+            timings.append((time.perf_counter() - started) * 1000)
+        report['from_api_response'] = summarize(timings)
+        return report
+
+    def refresh(self, timestamp: float) -> WeatherData:
+        """One refresh cycle: fetch, parse, record and draw."""
+        weather_data = self.fetch_plan.fetch(self.cassette.city)
+        self.view.update_weather(weather_data)
+        self.history.append(weather_data.current, timestamp=timestamp)
+        if self.show_trends:
+            self.view.update_trends({field: self.history.series(field, TREND_HOURS) for field, _ in TREND_SERIES})
+        return weather_data
+
+    def bench_refresh(self, iterations: int, revalidate: bool = False) -> Dict[str, Any]:
+        """Fetch-to-render latency of back-to-back refreshes."""
+        timings: List[float] = []
+        errors: Dict[str, int] = {}
+        self.stub.conditional = revalidate
+        requests_before, not_modified_before = self.stub.stats['requests'], self.stub.stats['not_modified']
+        for _ in range(iterations):
+            started = time.perf_counter()
+            try:
+                self.refresh(time.time())
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            timings.append((time.perf_counter() - started) * 1000)
+        self.stub.conditional = True
+        return dict(summarize(timings), errors=errors, frames=self.sink.frames,
+                    requests=self.stub.stats['requests'] - requests_before,
+                    not_modified=self.stub.stats['not_modified'] - not_modified_before)
+
+    def bench_soak(self, days: float, interval: float, samples: int = 50) -> Dict[str, Any]:
+        """Run a simulated multi-week schedule as fast as possible and track RSS.
+
+        Simulated timestamps end now, so the history store and trend queries
+        see the same data they would after `days` of uptime.
+        """
+        process = psutil.Process()
+        cycles = int(days * 86400 / interval)
+        start = time.time() - cycles * interval
+        sample_every = max(1, cycles // samples)
+        rss = [process.memory_info().rss]
+        failures = 0
+        started = time.perf_counter()
+        for cycle in range(cycles):
+            timestamp = start + cycle * interval
+            try:
+                self.refresh(timestamp)
+            except Exception:
+                failures += 1
+            self.view.update_time(datetime.fromtimestamp(timestamp))
+            if (cycle + 1) % sample_every == 0:
+                rss.append(process.memory_info().rss)
+        elapsed = time.perf_counter() - started
+        mb = 1024 * 1024
+        # Compare against the level after the first sample, once caches have warmed up
+        warm = rss[1] if len(rss) > 1 else rss[0]
+        return {
+            'simulated_days': days,
+            'cycles': cycles,
+            'failures': failures,
+            'wall_seconds': round(elapsed, 1),
+            'rss_start_mb': round(rss[0] / mb, 2),
+            'rss_end_mb': round(rss[-1] / mb, 2),
+            'rss_peak_mb': round(max(rss) / mb, 2),
+            'rss_growth_after_warmup_mb': round((rss[-1] - warm) / mb, 2),
+            'rss_growth_per_week_mb': round((rss[-1] - warm) / mb / max(days, 1e-9) * 7, 3),
+        }
+
+    def close(self):
+        self.fetch_plan.close()
+        self.history.close()
+
+
+def bench_dns_failure(stub: StubServer, city: str) -> Dict[str, Any]:
+    """Run one real WeatherController refresh while every stub lookup fails.
+
+    Checks that the failure takes the NameResolutionError branch of
+    WeatherController._handle_weather_failure, as on a device whose
+    resolver is down.
+    """
+    from ..config.settings import Settings
+    from ..core.event_loop import EventLoop
+    from ..core.scheduler import Scheduler
+    from ..core.weather_controller import WeatherController
+
+    os.environ.update({
+        'OPENWEATHER_API_KEY': 'bench',
+        'OPENWEATHER_BASE_URL': stub.base_url(STUB_HOST),
+        'CITY': city,
+        'CITIES': city,
+        'CACHE_DIR': tempfile.mkdtemp(prefix='raspboard-bench-'),
+        'PERSIST_RESPONSES': '0',
+        'WEATHER_SOURCE': 'local',
+    })
+    messages: List[str] = []
+
+    class Collector(logging.Handler):
+        def emit(self, record):
+            messages.append(record.getMessage())
+
+    collector = Collector(logging.INFO)
+    logging.getLogger().addHandler(collector)
+    loop = EventLoop()
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    view = ImageDashboard(NullSink((800, 480)), 'en')
+    controller = WeatherController(Settings(), loop, scheduler, view)
+    controller.setup_environment()
+
+    def wait_for_failure():
+        if controller.consecutive_errors and not controller.is_fetching_weather:
+            loop.stop()
+
+    # A cold start: no cached address to fall back on
+    DNS_CACHE.clear()
+    try:
+        with FaultyResolver(failure_rate=1.0):
+            controller.update_weather()
+            scheduler.every(0.05, wait_for_failure, 'bench-wait')
+            scheduler.call_later(30, loop.stop, 'bench-timeout')
+            loop.run()
+    finally:
+        controller.close()
+        logging.getLogger().removeHandler(collector)
+    return {
+        'consecutive_errors': controller.consecutive_errors,
+        'dns_branch_taken': any("DNS Resolution failed" in message for message in messages),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark refresh latency, parsing and memory against a stub server")
+    parser.add_argument('--cassette', default=DEFAULT_CASSETTE)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--jitter', type=float, default=0.02)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--dns-failure-rate', type=float, default=0.0)
+    parser.add_argument('--soak-days', type=float, default=14)
+    parser.add_argument('--soak-interval', type=float, default=300, help="simulated seconds between refreshes")
+    parser.add_argument('--size', default='800x480', help="rendered frame size")
+    parser.add_argument('--json', help="also write the report to this file")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    cassette = Cassette.load(args.cassette)
+    width, height = args.size.lower().split('x')
+    stub = StubServer(cassette, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      temperature_walk=0.3, seed=args.seed)
+    stub.start()
+    report: Dict[str, Any] = {}
+    try:
+        with FaultyResolver(failure_rate=args.dns_failure_rate, seed=args.seed) as resolver:
+            bench = Benchmark(cassette, stub, size=(int(width), int(height)))
+            try:
+                report['parse'] = bench.bench_parse(args.iterations)
+                # Full refreshes: every response transferred and decoded
+                report['refresh'] = bench.bench_refresh(args.iterations)
+                # Revalidated refreshes: unchanged endpoints answer 304 without a body
+                report['refresh_revalidated'] = bench.bench_refresh(args.iterations, revalidate=True)
+                # The soak measures memory, not network waits
+                stub.latency, stub.jitter = 0.0, 0.0
+                if args.soak_days > 0:
+                    report['soak'] = bench.bench_soak(args.soak_days, args.soak_interval)
+            finally:
+                bench.close()
+            report['dns_failures_injected'] = resolver.failures
+        report['dns_failure'] = bench_dns_failure(stub, cassette.city)
+        report['stub'] = dict(stub.stats)
+    finally:
+        stub.close()
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import time
+from typing import Any, Dict
+from ..api.openweather_api import OpenWeatherAPI
+
+# Endpoints a single-city refresh calls, in the order FetchPlan needs them
+ENDPOINTS = ('weather', 'air_pollution', 'forecast')
+
+DEFAULT_CASSETTE = os.path.join(os.path.dirname(__file__), 'cassettes', 'seoul.json')
+
+
+class Cassette:
+    """Recorded OpenWeather response bodies, one per endpoint.
+
+    The stub server replays these. Bodies are kept verbatim; only the API key
+    is never part of a cassette, because it only appears in request params.
+    """
+
+    def __init__(self, city: str, responses: Dict[str, Dict[str, Any]], recorded_at: float = 0):
+        self.city = city
+        self.responses = responses
+        self.recorded_at = recorded_at
+
+    @classmethod
+    def load(cls, path: str) -> 'Cassette':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['city'], data['responses'], data.get('recorded_at', 0))
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'city': self.city, 'recorded_at': self.recorded_at, 'responses': self.responses},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def body(self, endpoint: str) -> Dict[str, Any]:
+        return self.responses[endpoint]
+
+
+def record(api_key: str, city: str, language: str = 'en') -> Cassette:
+    """Fetch one live response per endpoint for city, bypassing every cache."""
+    api = OpenWeatherAPI(api_key, language, cache_ttls={endpoint: 0 for endpoint in ENDPOINTS})
+    current = api.get_current_weather(city)
+    responses = {
+        'weather': current,
+        'air_pollution': api.get_air_quality(current['coord']['lat'], current['coord']['lon']),
+        'forecast': api.get_forecast(city),
+    }
+    return Cassette(city, responses, time.time())
+
+
+def main():
+    from ..config.settings import Settings
+
+    settings = Settings()
+    parser = argparse.ArgumentParser(description="Record live OpenWeather responses into a cassette file")
+    parser.add_argument('--city', default=settings.city)
+    parser.add_argument('--out', default=DEFAULT_CASSETTE)
+    args = parser.parse_args()
+    cassette = record(settings.api_key, args.city, settings.language)
+    cassette.save(args.out)
+    print(f"Recorded {', '.join(ENDPOINTS)} for {args.city} into {args.out}")
+
+if __name__ == "__main__":
+    main()
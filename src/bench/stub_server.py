@@ -0,0 +1,227 @@
+import argparse
+import copy
+import hashlib
+import io
+import json
+import random
+import socket
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from .cassette import Cassette, DEFAULT_CASSETTE
+
+# Hostname benchmarks use for the stub, so DNS failures can be injected for it
+STUB_HOST = 'openweather.stub'
+
+
+class StubServer:
+    """Local HTTP server replaying a cassette in place of api.openweathermap.org.
+
+    Every response gets the current time as its observation 'dt' (plus an
+    optional random walk on the temperature) so caches and renderers see
+    fresh readings. Latency, jitter and an HTTP error rate are configurable;
+    responses carry an ETag and honour If-None-Match like the real API,
+    unless `conditional` is False (every request then gets a full 200).
+    It also stands in for a map tile server: /map/<layer>/<z>/<x>/<y>.png
+    returns synthetic precipitation (layers starting with 'precipitation')
+    or base map tiles.
+    """
+
+    def __init__(self, cassette: Cassette, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 jitter: float = 0.0, error_rate: float = 0.0, temperature_walk: float = 0.0,
+                 seed: Optional[int] = None, conditional: bool = True):
+        self.cassette = cassette
+        self.conditional = conditional
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.temperature_walk = temperature_walk
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._temperature_offset = 0.0
+        self.stats = {'requests': 0, 'errors': 0, 'not_modified': 0, 'tiles': 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def base_url(self, host: str = '127.0.0.1') -> str:
+        return f"http://{host}:{self.port}/data/2.5"
+
+    def tile_url(self, layer: str = 'precipitation_new', host: str = '127.0.0.1') -> str:
+        """URL template for RADAR_TILE_URL / MAP_TILE_URL."""
+        return f"http://{host}:{self.port}/map/{layer}/{{z}}/{{x}}/{{y}}.png"
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        if self._thread is not None:
+            self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, endpoint: str, if_none_match: Optional[str]):
+        """(status, headers, body bytes) for one request; runs on a server thread."""
+        with self._lock:
+            self.stats['requests'] += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+            if endpoint == 'weather' and self.temperature_walk:
+                self._temperature_offset += self._random.gauss(0, self.temperature_walk)
+            offset = self._temperature_offset
+        time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.stats['errors'] += 1
+            return 503, {}, b'{"cod": 503, "message": "stub: injected error"}'
+        if endpoint not in self.cassette.responses:
+            return 404, {}, b'{"cod": "404", "message": "stub: not in cassette"}'
+
+        body = self._fresh_body(endpoint, offset)
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        if not self.conditional:
+            return 200, {'Content-Type': 'application/json; charset=utf-8'}, payload
+        etag = '"' + hashlib.sha1(payload).hexdigest() + '"'
+        if if_none_match == etag:
+            with self._lock:
+                self.stats['not_modified'] += 1
+            return 304, {'ETag': etag}, b''
+        return 200, {'ETag': etag, 'Content-Type': 'application/json; charset=utf-8'}, payload
+
+    def respond_tile(self, layer: str, z: int, x: int, y: int):
+        """(status, headers, PNG bytes) for one map tile."""
+        with self._lock:
+            self.stats['tiles'] += 1
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            failed = self._random.random() < self.error_rate
+        time.sleep(delay)
+        if failed:
+            with self._lock:
+                self.stats['errors'] += 1
+            return 503, {}, b''
+        from PIL import Image, ImageDraw  # Only needed when tiles are requested
+        if layer.startswith('precipitation'):
+            # A few rain cells per tile that move with every 10 minute radar frame
+            tile = Image.new('RGBA', (256, 256), (0, 0, 0, 0))
+            draw = ImageDraw.Draw(tile)
+            cells = random.Random(f"{z}/{x}/{y}/{int(time.time()) // 600}")
+            for _ in range(cells.randint(0, 4)):
+                cx, cy, radius = cells.uniform(0, 256), cells.uniform(0, 256), cells.uniform(15, 60)
+                draw.ellipse((cx - radius, cy - radius, cx + radius, cy + radius),
+                             fill=(cells.randint(0, 80), cells.randint(120, 255), 255, 160))
+        else:
+            tile = Image.new('RGBA', (256, 256), (40, 48, 56, 255))
+            draw = ImageDraw.Draw(tile)
+            for offset in range(0, 256, 64):
+                draw.line((offset, 0, offset, 255), fill=(70, 80, 90, 255))
+                draw.line((0, offset, 255, offset), fill=(70, 80, 90, 255))
+        output = io.BytesIO()
+        tile.save(output, format='PNG')
+        return 200, {'Content-Type': 'image/png'}, output.getvalue()
+
+    def _fresh_body(self, endpoint: str, temperature_offset: float) -> Dict[str, Any]:
+        body = copy.deepcopy(self.cassette.body(endpoint))
+        now = int(time.time())
+        if endpoint == 'weather':
+            body['dt'] = now
+            body['main']['temp'] = round(body['main']['temp'] + temperature_offset, 2)
+        elif endpoint == 'air_pollution':
+            for item in body.get('list', []):
+                item['dt'] = now
+        elif endpoint == 'forecast':
+            # Keep the 3-hourly spacing but start at the next slot
+            slots = body.get('list', [])
+            start = now - now % 10800 + 10800
+            for index, item in enumerate(slots):
+                item['dt'] = start + index * 10800
+        return body
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                path = self.path.split('?', 1)[0].rstrip('/')
+                parts = path.split('/')
+                if len(parts) == 6 and parts[1] == 'map' and parts[5].endswith('.png'):
+                    _, _, layer, z, x, y = parts
+                    status, headers, payload = stub.respond_tile(layer, int(z), int(x), int(y[:-len('.png')]))
+                else:
+                    endpoint = path.rsplit('/', 1)[-1]
+                    status, headers, payload = stub.respond(endpoint, self.headers.get('If-None-Match'))
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logging.debug(f"stub: {format % args}")
+
+        return Handler
+
+
+class FaultyResolver:
+    """Resolves STUB_HOST to the stub server and fails a share of lookups.
+
+    Wraps socket.getaddrinfo while active, so a failed lookup surfaces from
+    urllib3 as a real NameResolutionError, exactly like a broken resolver on
+    the device. Other hostnames resolve normally.
+    """
+
+    def __init__(self, hostname: str = STUB_HOST, address: str = '127.0.0.1', failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        self.hostname = hostname
+        self.address = address
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._original = socket.getaddrinfo
+        self.failures = 0
+
+    def getaddrinfo(self, host, *args, **kwargs):
+        if host != self.hostname:
+            return self._original(host, *args, **kwargs)
+        if self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return self._original(self.address, *args, **kwargs)
+
+    def __enter__(self) -> 'FaultyResolver':
+        socket.getaddrinfo = self.getaddrinfo
+        return self
+
+    def __exit__(self, *_exc):
+        socket.getaddrinfo = self._original
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a recorded cassette in place of the OpenWeather API")
+    parser.add_argument('--cassette', default=DEFAULT_CASSETTE)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of random latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument('--temperature-walk', type=float, default=0.3, help="std dev of the temperature drift (°C)")
+    args = parser.parse_args()
+    server = StubServer(Cassette.load(args.cassette), port=args.port, latency=args.latency, jitter=args.jitter,
+                        error_rate=args.error_rate, temperature_walk=args.temperature_walk)
+    print(f"Serving {args.cassette}; run the app with OPENWEATHER_BASE_URL={server.base_url()}")
+    print(f"Radar tiles: RADAR_TILE_URL={server.tile_url()} MAP_TILE_URL={server.tile_url('base')}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+if __name__ == "__main__":
+    main()
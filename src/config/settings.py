@@ -1,12 +1,88 @@
 import os
 from dotenv import load_dotenv
 
+class LogSettings:
+    """Logging options; read separately because logging is set up before Settings is validated."""
+
+    def __init__(self):
+        load_dotenv()
+        # Rotate (and gzip) the log at this size; archives are pruned to the total budget
+        self.log_max_kb = int(os.getenv('LOG_MAX_KB', '1024'))
+        self.log_budget_mb = int(os.getenv('LOG_BUDGET_MB', '10'))
+        # Write batches of this size, or this long after the first unwritten line (errors at once)
+        self.log_batch_kb = int(os.getenv('LOG_BATCH_KB', '64'))
+        self.log_flush_seconds = float(os.getenv('LOG_FLUSH_SECONDS', '30'))
+        # Keep only the last N lines in RAM, written on errors and at shutdown (0 = write everything)
+        self.log_ram_lines = int(os.getenv('LOG_RAM_LINES', '0'))
+
+
 class Settings:
     def __init__(self):
         load_dotenv()
         self.api_key = os.getenv('OPENWEATHER_API_KEY')
+        # Comma separated, in order of preference: openweather, open-meteo, file (see src/api/providers.py)
+        self.weather_providers = [name.strip() for name in os.getenv('WEATHER_PROVIDERS', 'openweather').split(',')
+                                  if name.strip()]
+        # OpenWeather-shaped responses for the 'file' provider (cassette format, see src/bench/cassette.py)
+        self.weather_file = os.path.expanduser(os.getenv('WEATHER_FILE', '')) or None
+        self.open_meteo_base_url = os.getenv('OPEN_METEO_BASE_URL')
+        # Point at a stub server (python -m src.bench.stub_server) for offline runs
+        self.api_base_url = os.getenv('OPENWEATHER_BASE_URL')
         self.city = os.getenv('CITY', 'Seoul')
+        # Multi-city mode: comma separated list, rotated on screen every ROTATE_SECONDS
+        self.cities = [city.strip() for city in os.getenv('CITIES', self.city).split(',') if city.strip()]
+        self.rotate_seconds = int(os.getenv('ROTATE_SECONDS', '15'))
+        # Adaptive refresh bounds and the daily upstream call budget (0 = unlimited)
+        self.refresh_min_seconds = int(os.getenv('REFRESH_MIN_SECONDS', '120'))
+        self.refresh_max_seconds = int(os.getenv('REFRESH_MAX_SECONDS', '1800'))
+        self.daily_call_budget = int(os.getenv('DAILY_CALL_BUDGET', '0'))
+        # Seeds the per-device refresh offset; defaults to the hostname
+        self.device_id = os.getenv('DEVICE_ID')
         self.language = os.getenv('LANGUAGE', 'kr')
+        # 'widgets' (nested labels) or 'canvas' (single damage-tracked canvas)
+        self.renderer = os.getenv('RENDERER', 'widgets')
+        # 24 h temperature/AQI sparklines from the local history store (single city only)
+        self.show_trends = os.getenv('SHOW_TRENDS', '0') == '1'
+        # Persistent data (icons, coordinates, ...) that should survive reboots
+        self.cache_dir = os.path.expanduser(os.getenv('CACHE_DIR', '~/.cache/raspboard'))
+        # Keep API responses on disk so a restart within their TTL needs no request
+        self.persist_responses = os.getenv('PERSIST_RESPONSES', '1') == '1'
+        # Headless mode (python -m src.headless): render with Pillow instead of Tk
+        self.headless_sink = os.getenv('HEADLESS_SINK', 'fb')  # 'fb' or 'png'
+        self.headless_output = os.getenv('HEADLESS_OUTPUT')  # framebuffer device or PNG path
+        width, height = os.getenv('HEADLESS_SIZE', '1920x1080').lower().split('x')
+        self.headless_size = (int(width), int(height))  # PNG sink only; framebuffers report their size
+        self.headless_font = os.getenv('HEADLESS_FONT')
+        # 'local' fetches from OpenWeather; 'daemon' subscribes to python -m src.service.daemon
+        self.weather_source = os.getenv('WEATHER_SOURCE', 'local')
+        # Prometheus text endpoint at http://METRICS_HOST:METRICS_PORT/metrics (0 = off)
+        self.metrics_port = int(os.getenv('METRICS_PORT', '0'))
+        self.metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+        # A refresh gives up on whatever hasn't arrived after this many seconds (0 = no limit)
+        self.refresh_deadline_seconds = float(os.getenv('REFRESH_DEADLINE_SECONDS', '10'))
+        # Race a second request when one is slower than this latency percentile (0 = off)
+        self.hedge_percentile = float(os.getenv('HEDGE_PERCENTILE', '95'))
+        # Re-open the API connection this many seconds before a scheduled refresh (0 = off)
+        self.preconnect_seconds = float(os.getenv('PRECONNECT_SECONDS', '5'))
+        # Log the UI thread's stack when the loop stalls this long (0 = off)
+        self.watchdog_stall_seconds = float(os.getenv('WATCHDOG_STALL_SECONDS', '2'))
+        # kill -USR1 <pid> writes a collapsed-stack profile of this many seconds
+        self.profile_seconds = float(os.getenv('PROFILE_SECONDS', '30'))
+        # Log the top tracemalloc growth sites every this many minutes (0 = off; tracing costs memory)
+        self.leak_report_minutes = float(os.getenv('LEAK_REPORT_MINUTES', '0'))
+        # Force a full garbage collection every this many seconds (0 = leave it to the collector)
+        self.gc_interval_seconds = float(os.getenv('GC_INTERVAL_SECONDS', '0'))
+        # Precipitation radar behind the readings (canvas renderer and headless mode)
+        self.radar = os.getenv('RADAR', '0') == '1'
+        # Tile URL templates with {z}, {x}, {y} (and {api_key}); defaults to OpenWeather's precipitation layer
+        self.radar_tile_url = os.getenv('RADAR_TILE_URL')
+        self.map_tile_url = os.getenv('MAP_TILE_URL')  # optional base map under the radar
+        self.radar_zoom = int(os.getenv('RADAR_ZOOM', '7'))
+        self.radar_opacity = float(os.getenv('RADAR_OPACITY', '0.5'))
+        self.radar_refresh_seconds = int(os.getenv('RADAR_REFRESH_SECONDS', '600'))
+        runtime_dir = os.getenv('XDG_RUNTIME_DIR', '/tmp')
+        self.socket_path = os.getenv('WEATHER_SOCKET', os.path.join(runtime_dir, 'raspboard-weather.sock'))
 
-        if not self.api_key:
+        # Displays fed by the daemon never talk to OpenWeather themselves
+        if not self.api_key and self.weather_source != 'daemon' and 'openweather' in self.weather_providers:
             raise ValueError("OpenWeather API key not found in .env file!") 
\ No newline at end of file
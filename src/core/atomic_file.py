@@ -0,0 +1,29 @@
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import IO, Iterator, Optional
+
+
+@contextmanager
+def atomic_write(path: str, mode: str = 'w', encoding: Optional[str] = None) -> Iterator[IO]:
+    """Write to a uniquely named temporary file next to `path`, which replaces `path` at the end.
+
+    Readers never see a half-written file, and concurrent writers (worker
+    threads, or the daemon and a display sharing CACHE_DIR) never rename each
+    other's temporary file: the last complete write wins. On error the
+    temporary file is removed and `path` is left as it was.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix='.tmp', dir=directory)
+    try:
+        # mkstemp creates owner-only files; keep cache files readable like open() would
+        os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,30 @@
+import logging
+from .metrics import FAST_BUCKETS, REGISTRY
+
+TASK_DELAY_SECONDS = REGISTRY.histogram('raspboard_ui_task_delay_seconds',
+                                        'Delay between queueing a task for the UI thread and running it',
+                                        buckets=FAST_BUCKETS)
+
+
+class DelayStats:
+    """Enqueue-to-execution delay of tasks handed to the UI thread."""
+
+    def __init__(self, warn_delay: float = 0.25):
+        self.warn_delay = warn_delay
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, delay: float):
+        TASK_DELAY_SECONDS.observe(delay)
+        self.count += 1
+        self.total += delay
+        self.last = delay
+        if delay > self.max:
+            self.max = delay
+        if delay > self.warn_delay:
+            logging.warning(f"UI task waited {delay * 1000:.0f} ms before running")
+
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
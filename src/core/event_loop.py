@@ -0,0 +1,84 @@
+import heapq
+import itertools
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Optional, Tuple
+from .delay_stats import DelayStats
+
+
+class EventLoop:
+    """Minimal single-threaded loop for running the app without Tk.
+
+    Provides the subset of the Tk interface the rest of the app relies on:
+    after()/after_cancel() for the Scheduler and a thread-safe put() like
+    UIQueue. The loop sleeps until the next timer or until a task is queued.
+    """
+
+    def __init__(self, warn_delay: float = 0.25):
+        self._cond = threading.Condition()
+        self._tasks: Deque[Tuple[float, Callable[[], None]]] = deque()
+        self._timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self._cancelled = set()
+        self._counter = itertools.count()
+        self._running = False
+        self.stats = DelayStats(warn_delay)
+
+    def after(self, delay_ms: int, callback: Callable[[], None]) -> int:
+        timer_id = next(self._counter)
+        with self._cond:
+            heapq.heappush(self._timers, (time.monotonic() + delay_ms / 1000, timer_id, callback))
+            self._cond.notify()
+        return timer_id
+
+    def after_cancel(self, timer_id: int):
+        with self._cond:
+            self._cancelled.add(timer_id)
+
+    def put(self, task: Callable[[], None]):
+        """Queue task to run on the loop thread. Safe to call from any thread."""
+        with self._cond:
+            self._tasks.append((time.monotonic(), task))
+            self._cond.notify()
+
+    def waiting_since(self) -> Optional[float]:
+        """When the oldest queued task was put(), or None when the queue is empty."""
+        with self._cond:
+            return self._tasks[0][0] if self._tasks else None
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+
+    def run(self):
+        self._running = True
+        while True:
+            with self._cond:
+                task = None
+                while self._running:
+                    if self._tasks:
+                        enqueued_at, task = self._tasks.popleft()
+                        self.stats.record(time.monotonic() - enqueued_at)
+                        break
+                    if self._timers:
+                        deadline, timer_id, callback = self._timers[0]
+                        if timer_id in self._cancelled:
+                            heapq.heappop(self._timers)
+                            self._cancelled.discard(timer_id)
+                            continue
+                        timeout = deadline - time.monotonic()
+                        if timeout <= 0:
+                            heapq.heappop(self._timers)
+                            task = callback
+                            break
+                    else:
+                        timeout = None
+                    self._cond.wait(timeout)
+                if not self._running:
+                    return
+            try:
+                task()
+            except Exception as e:
+                logging.error(f"Error processing loop task: {str(e)}", exc_info=True)
@@ -0,0 +1,64 @@
+import logging
+import tracemalloc
+from typing import List, Optional
+from .metrics import REGISTRY
+
+TRACED_MEMORY = REGISTRY.gauge('raspboard_traced_memory_bytes', 'Python heap traced by tracemalloc (0 when off)')
+
+# Allocations made by the tracing and import machinery, not by us
+IGNORED_FRAMES = ('<frozen importlib._bootstrap>', '<frozen importlib._bootstrap_external>', tracemalloc.__file__)
+
+
+class LeakTracker:
+    """Periodic tracemalloc snapshot diffs naming the fastest-growing allocation sites.
+
+    start() begins tracing and takes the baseline; every report() compares a
+    new snapshot with the previous one and logs the `top` sites that grew
+    most, plus the total growth since the baseline. Tracing costs memory and
+    CPU (a few frames per allocation), so it is only on when configured.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 1):
+        self.top = top
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._previous: Optional[tracemalloc.Snapshot] = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._baseline = self._previous = self._snapshot()
+        TRACED_MEMORY.set_function(lambda: tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0)
+        logging.info(f"Leak tracking on, baseline {self._total(self._baseline) / 1024:.0f} KiB traced")
+
+    def report(self) -> List[str]:
+        """Log and return the top growth sites since the previous report."""
+        if self._previous is None:
+            return []
+        snapshot = self._snapshot()
+        growth = [stat for stat in snapshot.compare_to(self._previous, 'lineno') if stat.size_diff > 0]
+        since_baseline = self._total(snapshot) - self._total(self._baseline)
+        self._previous = snapshot
+        lines = [
+            f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}: "
+            f"+{stat.size_diff / 1024:.1f} KiB ({stat.count_diff:+d} blocks, {stat.size / 1024:.1f} KiB total)"
+            for stat in growth[:self.top]
+        ]
+        summary = f"Traced memory {since_baseline / 1024:+.0f} KiB since start"
+        if lines:
+            logging.info(f"{summary}; top growth since last report:" + ''.join(f"\n  {line}" for line in lines))
+        else:
+            logging.info(f"{summary}; nothing grew since last report")
+        return lines
+
+    def stop(self):
+        self._baseline = self._previous = None
+        tracemalloc.stop()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            [tracemalloc.Filter(False, pattern) for pattern in IGNORED_FRAMES])
+
+    @staticmethod
+    def _total(snapshot: tracemalloc.Snapshot) -> int:
+        return sum(stat.size for stat in snapshot.statistics('filename'))
@@ -0,0 +1,196 @@
+import os
+import sys
+import gzip
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from logging.handlers import QueueHandler
+from typing import Deque, List, Optional
+from .metrics import REGISTRY
+from ..config.settings import LogSettings
+
+LOG_RECORDS = REGISTRY.counter('raspboard_log_records_total', 'Log records by outcome (written, dropped)',
+                               ('result',))
+LOG_WRITES = REGISTRY.counter('raspboard_log_writes_total', 'Batched writes to the log file')
+LOG_BYTES = REGISTRY.counter('raspboard_log_bytes_written_total', 'Bytes appended to the log file')
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+# Records waiting for the writer; beyond this they are dropped rather than block the caller
+QUEUE_SIZE = 10000
+# How long close() waits for the last batch at exit
+CLOSE_TIMEOUT = 5.0
+
+_STOP = object()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Hands records to the log writer; never blocks, drops them when the writer falls behind."""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS.labels('dropped').inc()
+
+
+class RotatingLogFile:
+    """Append-only log file, gzipped and replaced once it reaches max_bytes.
+
+    Archives are named <path>.<timestamp>.gz next to the file; the oldest are
+    deleted so that the file and its archives stay within budget_bytes.
+    """
+
+    def __init__(self, path: str, max_bytes: int, budget_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.budget_bytes = budget_bytes
+        # E.g. a file left unbounded by an older version
+        if self._size() >= max_bytes:
+            self.rotate()
+
+    def write(self, data: bytes):
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            size = f.tell()
+        if size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        try:
+            self._rotate()
+        except OSError as e:
+            # Keep appending to the current file; the next write tries again
+            print(f"Could not rotate {self.path}: {e}", file=sys.stderr)
+
+    def _rotate(self):
+        archive = f"{self.path}.{datetime.now():%Y%m%d-%H%M%S-%f}"
+        os.replace(self.path, archive)
+        with open(archive, 'rb') as src, gzip.open(f"{archive}.gz", 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(archive)
+        self.prune()
+
+    def archives(self) -> List[str]:
+        """Compressed archives, oldest first."""
+        directory, name = os.path.split(os.path.abspath(self.path))
+        return sorted(os.path.join(directory, entry) for entry in os.listdir(directory)
+                      if entry.startswith(f"{name}.") and entry.endswith('.gz'))
+
+    def prune(self):
+        archives = self.archives()
+        total = self._size() + sum(os.path.getsize(path) for path in archives)
+        for path in archives:
+            if total <= self.budget_bytes:
+                break
+            total -= os.path.getsize(path)
+            os.remove(path)
+
+    def _size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+
+class LogWriter:
+    """Writes queued log records to disk from one background thread, in batches.
+
+    Records are appended once batch_bytes have accumulated or flush_seconds
+    after the first unwritten one, whichever comes first; ERROR and above
+    are written at once. With ram_lines > 0 nothing reaches the disk in
+    normal operation: the last ram_lines lines are kept in memory and only
+    written when an error is logged (as context for it) and at shutdown.
+    """
+
+    def __init__(self, log_file: RotatingLogFile, batch_bytes: int = 64 * 1024, flush_seconds: float = 30,
+                 ram_lines: int = 0):
+        self.log_file = log_file
+        self.batch_bytes = batch_bytes
+        self.flush_seconds = flush_seconds
+        self.formatter = logging.Formatter(LOG_FORMAT)
+        self.queue: 'queue.Queue' = queue.Queue(QUEUE_SIZE)
+        self._ring: Optional[Deque[str]] = deque(maxlen=ram_lines) if ram_lines > 0 else None
+        self._pending: List[str] = []
+        self._pending_bytes = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        """Write everything still queued or buffered; called at exit."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=CLOSE_TIMEOUT)
+        except queue.Full:
+            return
+        self._thread.join(CLOSE_TIMEOUT)
+
+    def _run(self):
+        flush_at: Optional[float] = None
+        while True:
+            timeout = None if flush_at is None else max(0.0, flush_at - time.monotonic())
+            try:
+                record = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush()
+                flush_at = None
+                continue
+            if record is _STOP:
+                self._dump_ring()
+                self._flush()
+                return
+            line = self.formatter.format(record) + '\n'
+            urgent = record.levelno >= logging.ERROR
+            if self._ring is not None:
+                self._ring.append(line)
+                if urgent:
+                    self._dump_ring()
+                    self._flush()
+                continue
+            self._pending.append(line)
+            self._pending_bytes += len(line)
+            if urgent or self._pending_bytes >= self.batch_bytes:
+                self._flush()
+                flush_at = None
+            elif flush_at is None:
+                flush_at = time.monotonic() + self.flush_seconds
+
+    def _dump_ring(self):
+        if self._ring:
+            self._pending.extend(self._ring)
+            self._ring.clear()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        lines, self._pending, self._pending_bytes = self._pending, [], 0
+        data = ''.join(lines).encode('utf-8')
+        try:
+            self.log_file.write(data)
+        except OSError as e:
+            # Logging about logging would only loop back here
+            LOG_RECORDS.labels('dropped').inc(len(lines))
+            print(f"Could not write {len(lines)} log records to {self.log_file.path}: {e}", file=sys.stderr)
+            return
+        LOG_RECORDS.labels('written').inc(len(lines))
+        LOG_WRITES.inc()
+        LOG_BYTES.inc(len(data))
+
+
+def configure_logging(path: str, settings: LogSettings) -> LogWriter:
+    """Route the root logger through a LogWriter appending to `path`."""
+    log_file = RotatingLogFile(path, settings.log_max_kb * 1024, settings.log_budget_mb * 1024 * 1024)
+    writer = LogWriter(log_file, settings.log_batch_kb * 1024, settings.log_flush_seconds, settings.log_ram_lines)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(DroppingQueueHandler(writer.queue))
+    writer.start()
+    atexit.register(writer.close)
+    return writer
@@ -0,0 +1,92 @@
+import threading
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+from .metrics import REGISTRY
+
+CACHE_BYTES = REGISTRY.gauge('raspboard_cache_bytes', 'Estimated memory held by each in-memory cache', ('cache',))
+CACHE_ENTRIES = REGISTRY.gauge('raspboard_cache_entries', 'Entries in each in-memory cache', ('cache',))
+CACHE_EVICTIONS = REGISTRY.counter('raspboard_cache_evictions_total', 'Entries evicted to stay within budget',
+                                   ('cache',))
+
+V = TypeVar('V')
+
+
+class LRUCache(Generic[V]):
+    """Thread-safe mapping that evicts least recently used entries beyond a byte budget.
+
+    sizeof(value) estimates an entry's memory; on_evict(key, value) runs for
+    every evicted or replaced entry, outside the lock, so owners can release
+    resources (e.g. Tk images) right away instead of waiting for the GC.
+    The newest entry is always kept, even when it alone exceeds the budget.
+    """
+
+    def __init__(self, name: str, max_bytes: int, sizeof: Callable[[V], int],
+                 on_evict: Optional[Callable[[Hashable, V], None]] = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.on_evict = on_evict
+        self.bytes = 0
+        self._entries: 'OrderedDict[Hashable, Tuple[V, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        CACHE_BYTES.labels(name).set_function(lambda: self.bytes)
+        CACHE_ENTRIES.labels(name).set_function(lambda: len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: V):
+        size = self.sizeof(value)
+        replaced: List[Tuple[Hashable, V]] = []
+        evicted: List[Tuple[Hashable, V]] = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+                if previous[0] is not value:
+                    replaced.append((key, previous[0]))
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, (old_value, old_size) = self._entries.popitem(last=False)
+                self.bytes -= old_size
+                evicted.append((old_key, old_value))
+        if evicted:
+            CACHE_EVICTIONS.labels(self.name).inc(len(evicted))
+        self._release(replaced + evicted)
+
+    def pop(self, key: Hashable) -> Optional[V]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+            self.bytes -= entry[1]
+        return entry[0]
+
+    def items(self) -> List[Tuple[Hashable, V]]:
+        """Snapshot, least recently used first; doesn't count as use."""
+        with self._lock:
+            return [(key, value) for key, (value, _size) in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            released = [(key, value) for key, (value, _size) in self._entries.items()]
+            self._entries.clear()
+            self.bytes = 0
+        self._release(released)
+
+    def _release(self, released: List[Tuple[Hashable, V]]):
+        if self.on_evict is not None:
+            for key, value in released:
+                self.on_evict(key, value)
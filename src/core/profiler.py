@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """On-demand sampling profiler writing collapsed stacks for flamegraphs.
+
+    Nothing runs until a profile is requested (e.g. with SIGUSR1). A profile
+    samples every thread's stack every `interval` seconds for `duration`
+    seconds from a side thread and writes one "frame;frame;frame count" line
+    per distinct stack, the input format of flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, output_dir: str, duration: float = 30, interval: float = 0.01):
+        self.output_dir = output_dir
+        self.duration = duration
+        self.interval = interval
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def install(self, signum: Optional[int] = getattr(signal, 'SIGUSR1', None)) -> bool:
+        """Start a profile whenever signum arrives; must be called from the main thread."""
+        if signum is None:
+            return False
+        signal.signal(signum, lambda *_args: self.start())
+        return True
+
+    def start(self) -> bool:
+        """Begin a profile in the background; ignored while one is running."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return True
+
+    def _run(self):
+        path = os.path.join(self.output_dir, f"profile-{datetime.now():%Y%m%d-%H%M%S}.folded")
+        logging.info(f"Profiling for {self.duration:.0f} s into {path}")
+        stacks = self.sample(self.duration)
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                for stack, count in stacks.most_common():
+                    f.write(f"{stack} {count}\n")
+        except OSError as e:
+            logging.error(f"Could not write profile {path}: {e}")
+            return
+        logging.info(f"Wrote {sum(stacks.values())} samples ({len(stacks)} stacks) to {path}")
+
+    def sample(self, duration: float) -> Counter:
+        own_id = threading.get_ident()
+        names: Dict[int, str] = {}
+        stacks: Counter = Counter()
+        deadline = time.monotonic() + duration
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, str(thread_id)))
+                stacks[';'.join(reversed(labels))] += 1
+            del frames
+            time.sleep(self.interval)
+        return stacks
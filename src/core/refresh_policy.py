@@ -0,0 +1,95 @@
+import hashlib
+import socket
+import time
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from ..models.weather_data import WeatherData
+
+# OpenWeather refreshes current conditions roughly every 10 minutes
+UPSTREAM_PERIOD = 600
+# Give the upstream a moment to publish before fetching
+UPSTREAM_LAG = 30
+# Local hours treated as night, when conditions change slowly and nobody looks
+NIGHT_HOURS = range(0, 6)
+
+
+class RefreshPolicy:
+    """Computes when to fetch next instead of polling on a fixed interval.
+
+    The next fetch is aimed just after the upstream's next expected update,
+    derived from the observation timestamp of the last response. Volatile
+    weather (precipitation, fast temperature changes) keeps the delay at the
+    minimum; calm conditions and night hours stretch it. A daily call budget
+    puts a floor under the delay and a stable per-device offset spreads a
+    fleet's requests apart. Failures back off exponentially from one minute.
+    """
+
+    def __init__(self, min_interval: float = 120, max_interval: float = 1800,
+                 daily_budget: int = 0, device_id: Optional[str] = None, jitter: float = 30):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.daily_budget = daily_budget
+        device_id = device_id or socket.gethostname()
+        # Stable per device, so the offset doesn't wander between refreshes
+        digest = hashlib.sha1(device_id.encode('utf-8')).digest()
+        self.device_offset = jitter * int.from_bytes(digest[:2], 'big') / 0xFFFF
+        self._calls_day = datetime.now().date()
+        self.calls_today = 0
+        self._previous: Optional[WeatherData] = None
+
+    def record_calls(self, count: int):
+        """Count upstream requests (cache hits excluded) against the daily budget."""
+        today = datetime.now().date()
+        if today != self._calls_day:
+            self._calls_day = today
+            self.calls_today = 0
+        self.calls_today += count
+
+    def next_delay(self, weather_data: Optional[WeatherData], consecutive_errors: int = 0,
+                   calls_per_refresh: int = 3) -> float:
+        if consecutive_errors > 0:
+            delay = min(self.max_interval, 60 * 2 ** (min(consecutive_errors, 6) - 1))
+            return delay + self.device_offset
+
+        now = time.time()
+        if weather_data is None or not weather_data.current.observed_at:
+            delay = self.min_interval
+        else:
+            # Number of upstream updates worth waiting for: one when the weather
+            # is changing, two when it is calm, twice that at night.
+            periods = 1 if self._is_volatile(weather_data) else 2
+            if datetime.now().hour in NIGHT_HOURS:
+                periods *= 2
+            next_update = weather_data.current.observed_at + periods * UPSTREAM_PERIOD + UPSTREAM_LAG
+            delay = next_update - now
+        self._previous = weather_data
+
+        # Never hammer a late upstream, never go quiet for too long
+        delay = min(max(delay, self.min_interval), self.max_interval)
+        delay = max(delay, self._budget_floor(calls_per_refresh))
+        return delay + self.device_offset
+
+    def _is_volatile(self, weather_data: WeatherData) -> bool:
+        current = weather_data.current
+        if current.rain_amount > 0 or current.snow_amount > 0:
+            return True
+        previous = self._previous
+        if previous is None:
+            return False
+        if previous.current.weather.icon != current.weather.icon:
+            return True
+        return abs(previous.current.temperature - current.temperature) >= 1.0
+
+    def _budget_floor(self, calls_per_refresh: int) -> float:
+        """Smallest delay that keeps the rest of today's calls within the budget."""
+        if not self.daily_budget:
+            return 0
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        remaining_calls = self.daily_budget - self.calls_today
+        if remaining_calls < calls_per_refresh:
+            logging.warning(f"Daily API budget of {self.daily_budget} calls used up; waiting until midnight")
+            return (midnight - now).total_seconds()
+        remaining_refreshes = remaining_calls // calls_per_refresh
+        return (midnight - now).total_seconds() / remaining_refreshes
@@ -0,0 +1,150 @@
+import heapq
+import itertools
+import math
+import time
+import logging
+from typing import Any, Callable, List, Optional, Tuple
+from .metrics import FAST_BUCKETS, REGISTRY
+
+LOOP_LAG_SECONDS = REGISTRY.histogram('raspboard_loop_lag_seconds',
+                                      'How late the event loop fired the scheduler timer', buckets=FAST_BUCKETS)
+
+
+class Job:
+    def __init__(self, scheduler: 'Scheduler', name: str, callback: Callable[[], None],
+                 deadline: float, interval: Optional[float] = None, align: Optional[float] = None):
+        self.scheduler = scheduler
+        self.name = name
+        self.callback = callback
+        self.deadline = deadline
+        self.interval = interval
+        self.align = align
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        self.scheduler._rearm()
+
+
+class Scheduler:
+    """One timer for every periodic task in the app, on monotonic time.
+
+    Jobs live in a deadline heap and only the earliest deadline is armed on
+    the event loop (Tk's after() by default). When the timer fires, every job
+    due within `slack` seconds runs in the same wakeup. Periodic jobs advance
+    by their interval from the previous deadline, so they don't drift, and
+    wall-clock aligned jobs (the minute clock) recompute their next boundary
+    from time.time() on every run so clock adjustments are picked up.
+    """
+
+    def __init__(self, arm: Callable[[int, Callable[[], None]], Any],
+                 cancel: Callable[[Any], None], slack: float = 0.05):
+        self._arm = arm
+        self._cancel = cancel
+        self.slack = slack
+        self._heap: List[Tuple[float, int, Job]] = []
+        self._counter = itertools.count()
+        self._timer = None
+        self._timer_deadline: Optional[float] = None
+        self.wakeups = 0
+
+    def call_later(self, delay: float, callback: Callable[[], None], name: str = '') -> Job:
+        return self._push(Job(self, name or callback.__name__, callback, time.monotonic() + delay))
+
+    def every(self, interval: float, callback: Callable[[], None], name: str = '',
+              first_delay: Optional[float] = None) -> Job:
+        delay = interval if first_delay is None else first_delay
+        return self._push(Job(self, name or callback.__name__, callback, time.monotonic() + delay, interval=interval))
+
+    def every_aligned(self, period: float, callback: Callable[[], None], name: str = '') -> Job:
+        """Run callback now and then on every wall-clock multiple of period (e.g. 60 s)."""
+        job = Job(self, name or callback.__name__, callback, time.monotonic(), align=period)
+        return self._push(job)
+
+    def pending(self) -> List[Tuple[str, float]]:
+        """(name, seconds until due) for every live job, soonest first."""
+        now = time.monotonic()
+        return [(job.name, deadline - now) for deadline, _, job in sorted(self._heap) if not job.cancelled]
+
+    def waiting_since(self) -> Optional[float]:
+        """Deadline of the armed timer (in the past if the loop hasn't fired it yet), or None."""
+        return self._timer_deadline
+
+    def next_deadline(self) -> Optional[float]:
+        self._drop_cancelled()
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self):
+        """Run every job that is due (within slack) and re-arm the timer."""
+        if self._timer_deadline is not None:
+            # Includes the up to 1 ms the timer is rounded up by when armed
+            LOOP_LAG_SECONDS.observe(max(0.0, time.monotonic() - self._timer_deadline))
+        self._timer = None
+        self._timer_deadline = None
+        self.wakeups += 1
+        horizon = time.monotonic() + self.slack
+        due: List[Job] = []
+        while self._heap and self._heap[0][0] <= horizon:
+            _, _, job = heapq.heappop(self._heap)
+            if not job.cancelled:
+                due.append(job)
+        for job in due:
+            try:
+                job.callback()
+            except Exception as e:
+                logging.error(f"Error in scheduled job {job.name}: {str(e)}", exc_info=True)
+            if job.cancelled:
+                continue
+            if job.align is not None:
+                # Aim just past the boundary: batching may run jobs up to
+                # `slack` early, and a clock must never fire in the old minute.
+                job.deadline = time.monotonic() + self._until_boundary(job.align) + self.slack
+                heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+            elif job.interval is not None:
+                job.deadline += job.interval
+                now = time.monotonic()
+                if job.deadline <= now:
+                    # Fell behind (e.g. suspended); skip the missed runs
+                    missed = (now - job.deadline) // job.interval + 1
+                    job.deadline += missed * job.interval
+                heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+        self._rearm()
+
+    def close(self):
+        for _, _, job in self._heap:
+            job.cancelled = True
+        self._heap.clear()
+        self._cancel_timer()
+
+    @staticmethod
+    def _until_boundary(period: float) -> float:
+        return period - (time.time() % period)
+
+    def _push(self, job: Job) -> Job:
+        heapq.heappush(self._heap, (job.deadline, next(self._counter), job))
+        self._rearm()
+        return job
+
+    def _drop_cancelled(self):
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+
+    def _rearm(self):
+        deadline = self.next_deadline()
+        if deadline == self._timer_deadline:
+            return
+        self._cancel_timer()
+        if deadline is None:
+            return
+        delay_ms = max(0, math.ceil((deadline - time.monotonic()) * 1000))
+        self._timer_deadline = deadline
+        self._timer = self._arm(delay_ms, self.run_due)
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            try:
+                self._cancel(self._timer)
+            except Exception:
+                pass
+        self._timer = None
+        self._timer_deadline = None
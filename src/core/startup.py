@@ -0,0 +1,55 @@
+import os
+import time
+import logging
+from typing import List, Optional, Tuple
+from .metrics import REGISTRY
+
+STARTUP_SECONDS = REGISTRY.gauge('raspboard_startup_seconds', 'Duration of each startup phase', ('phase',))
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process was exec'd (Linux), covering interpreter startup."""
+    try:
+        with open('/proc/self/stat', encoding='ascii') as f:
+            # Fields after the parenthesised command name; starttime is field 22
+            fields = f.read().rsplit(')', 1)[1].split()
+        with open('/proc/uptime', encoding='ascii') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class StartupTimer:
+    """Breakdown of where startup time goes, logged once per milestone.
+
+    mark(phase) records the time since the previous mark. The first phase,
+    'interpreter', is the time from exec to importing this module, when the
+    OS can tell us.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases: List[Tuple[str, float]] = []
+        age = process_age()
+        if age is not None:
+            self.phases.append(('interpreter', max(0.0, age)))
+            self.started -= max(0.0, age)
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        STARTUP_SECONDS.labels(phase).set(now - self._last)
+        self._last = now
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def log(self, milestone: str):
+        breakdown = ', '.join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases)
+        logging.info(f"Startup: {milestone} after {self.elapsed() * 1000:.0f} ms ({breakdown})")
+
+
+# Created on first import, which entry points do before anything else
+STARTUP = StartupTimer()
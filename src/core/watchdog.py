@@ -0,0 +1,65 @@
+import sys
+import time
+import logging
+import threading
+import traceback
+from typing import Callable, Optional, Sequence
+from .metrics import REGISTRY
+
+STALLS = REGISTRY.counter('raspboard_loop_stalls_total', 'UI loop stalls longer than the watchdog threshold')
+
+
+class LoopWatchdog:
+    """Detects stalls of the UI loop (Tk or EventLoop) from a side thread.
+
+    `sources` are callables returning the monotonic time since which work
+    has been waiting for the loop (the scheduler's armed timer deadline,
+    the oldest queued UI task), or None when nothing is waiting. When work
+    has waited `stall_threshold` seconds, the loop thread's current stack is
+    logged once, which shows what it is stuck in (a blocking call, a slow
+    task, a GC pause). Nothing is ever sent through the loop, so an idle
+    loop is never woken; only the side thread polls, every half threshold.
+    """
+
+    def __init__(self, sources: Sequence[Callable[[], Optional[float]]], stall_threshold: float = 2.0,
+                 loop_thread: Optional[int] = None):
+        self.sources = sources
+        self.stall_threshold = stall_threshold
+        # Tk and EventLoop both run on the main thread
+        self.loop_thread = loop_thread or threading.main_thread().ident
+        self._stop = threading.Event()
+        self._stalled_since: Optional[float] = None
+        self.stalls = 0
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.stall_threshold / 2):
+            self.check()
+
+    def check(self):
+        """Report a stall, or the end of one; called from the watchdog thread."""
+        now = time.monotonic()
+        waiting = [since for since in (source() for source in self.sources) if since is not None and since < now]
+        since = min(waiting, default=None)
+        if since is None or now - since < self.stall_threshold:
+            if self._stalled_since is not None:
+                logging.warning(f"UI loop responsive again after {now - self._stalled_since:.1f} s")
+                self._stalled_since = None
+            return
+        if since == self._stalled_since:
+            return  # Already reported
+        self._stalled_since = since
+        self._report_stall(now - since)
+
+    def _report_stall(self, waited: float):
+        self.stalls += 1
+        STALLS.inc()
+        frame = sys._current_frames().get(self.loop_thread)
+        stack = ''.join(traceback.format_stack(frame)) if frame is not None else '(loop thread not found)\n'
+        logging.warning(f"UI loop stalled for {waited:.1f} s; loop thread stack:\n{stack.rstrip()}")
@@ -0,0 +1,507 @@
+import gc
+import os
+import sys
+import time
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, Future
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from PIL import Image
+from ..api.resilience import CircuitOpenError, DeadlineExceeded
+from ..config.settings import Settings
+from ..models.history_store import HistoryStore
+from ..models.snapshot_store import SnapshotStore
+from ..models.weather_data import ChangeSet, WeatherData
+from ..ui.icon_store import IconStore
+from ..ui.sparkline import TREND_HOURS, TREND_SERIES
+from .metrics import REGISTRY
+from .profiler import SamplingProfiler
+from .watchdog import LoopWatchdog
+from .scheduler import Scheduler
+from .startup import STARTUP
+from .refresh_policy import RefreshPolicy
+
+# Refresh and housekeeping intervals (seconds). Single-city refreshes are
+# timed by RefreshPolicy; WEATHER_INTERVAL paces multi-city mode.
+WEATHER_INTERVAL = 300
+STATS_INTERVAL = 300
+
+REFRESHES = REGISTRY.counter('raspboard_weather_refreshes_total', 'Weather refreshes by outcome', ('result',))
+RENDER_SECONDS = REGISTRY.histogram('raspboard_render_seconds', 'Time to draw a weather update', ('view',))
+CONSECUTIVE_ERRORS = REGISTRY.gauge('raspboard_consecutive_errors', 'Failed refreshes since the last success')
+NEXT_REFRESH_SECONDS = REGISTRY.gauge('raspboard_next_refresh_seconds', 'Delay chosen for the next refresh (backoff included)')
+LAST_SUCCESS = REGISTRY.gauge('raspboard_last_success_timestamp_seconds', 'Unix time of the last successful refresh')
+RESIDENT_MEMORY = REGISTRY.gauge('raspboard_resident_memory_bytes', 'Resident set size of the process')
+
+
+class WeatherController:
+    """Fetch, backoff and housekeeping logic, independent of the display.
+
+    Shared by the Tk app and the headless renderer. Blocking work runs on a
+    thread pool; results are handed back through ui_queue.put() so that all
+    controller state and the view are only touched from the loop thread.
+    The view needs update_time(now) and update_weather(data, icon_key, icon_image).
+    """
+
+    def __init__(self, settings: Settings, ui_queue: Any, scheduler: Scheduler, view: Any,
+                 icon_px: Optional[int] = None, flush: Optional[Callable[[], None]] = None):
+        self.settings = settings
+        self.ui_queue = ui_queue
+        self.scheduler = scheduler
+        self.view = view
+        self.flush = flush
+        self.consecutive_errors = 0
+        self.last_successful_update = time.time()
+        self.is_fetching_weather: bool = False
+        self.last_weather_data: Optional[WeatherData] = None
+        self.refresh_policy = RefreshPolicy(
+            min_interval=settings.refresh_min_seconds,
+            max_interval=settings.refresh_max_seconds,
+            daily_budget=settings.daily_call_budget,
+            device_id=settings.device_id,
+        )
+        self._counted_requests = 0
+        # Multi-city mode: latest (data, icon_key, icon_image) per city, ready to show
+        self.city_data: Dict[str, Tuple[WeatherData, str, Optional[Image.Image]]] = {}
+        self.displayed_city: Optional[str] = None
+        self._cities_fetching: Set[str] = set()
+        self.metrics_server = None
+        self.watchdog: Optional[LoopWatchdog] = None
+        self.profiler = SamplingProfiler(os.path.join(settings.cache_dir, 'profiles'), settings.profile_seconds)
+        self.leak_tracker = None  # LeakTracker when LEAK_REPORT_MINUTES is set
+        # Thread pool to move blocking network calls off the UI thread
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="weather-worker")
+        # The daemon seeds the shared icon store; without a session misses fall back to urllib
+        self.icon_store = IconStore(os.path.join(settings.cache_dir, 'icons'), icon_px=icon_px)
+        self.snapshot_store = SnapshotStore(os.path.join(settings.cache_dir, 'last_weather.json'))
+        self._stale = False
+        self._shown_fresh = False
+        # Created by setup_environment(), after the first frame is on screen
+        self.subscriber = None
+        self.weather_api = None
+        self.fetch_plan = None
+        self.multi_city_plan = None
+        self.history: Optional[HistoryStore] = None
+        # Radar background (RADAR=1), for views with update_background(); rendered on
+        # its own thread so tile downloads never hold up the weather workers
+        self.radar = None
+        self.radar_executor: Optional[ThreadPoolExecutor] = None
+        self._radar_started = False
+        self._radar_pending = False
+        # listener(weather_data, changes), on the loop thread after a refresh that changed something
+        self.change_listeners: List[Callable[[WeatherData, ChangeSet], None]] = []
+
+    def setup_environment(self):
+        """Create the fetching side; this is where requests gets imported."""
+        if self.settings.weather_source == 'daemon':
+            # Another process fetches for us; this process never imports requests.
+            from ..service.pubsub import WeatherSubscriber
+            self.subscriber = WeatherSubscriber(self.settings.socket_path, self._on_snapshot)
+            return
+
+        from ..api.providers import create_weather_api
+        from ..api.fetch_plan import FetchPlan
+        # Only the process that fetches records history, so one writer owns the files
+        self.history = HistoryStore(os.path.join(self.settings.cache_dir, 'history'))
+        response_cache_dir = os.path.join(self.settings.cache_dir, 'responses') if self.settings.persist_responses else None
+        # One provider, or several with failover (WEATHER_PROVIDERS)
+        self.weather_api = create_weather_api(self.settings, response_cache_dir)
+        # Runs the three endpoint requests in parallel once the city's coordinates are known
+        self.fetch_plan = FetchPlan(self.weather_api, os.path.join(self.settings.cache_dir, 'locations.json'),
+                                    time_budget=self.settings.refresh_deadline_seconds or None)
+        if len(self.settings.cities) > 1:
+            from ..api.multi_city import MultiCityPlan
+            self.multi_city_plan = MultiCityPlan(self.fetch_plan)
+        # Reuse the same HTTP session used by the API for icon fetching
+        self.icon_store.session = getattr(self.weather_api, 'session', None)
+        if self.settings.radar:
+            self.setup_radar()
+
+    def setup_radar(self):
+        if not hasattr(self.view, 'update_background'):
+            logging.warning("RADAR needs RENDERER=canvas or headless mode; not showing the radar")
+            return
+        from ..ui.radar_layer import OPENWEATHER_RADAR_URL, RadarLayer
+        self.radar = RadarLayer(
+            os.path.join(self.settings.cache_dir, 'tiles'), (self.view.width, self.view.height),
+            self.settings.radar_tile_url or OPENWEATHER_RADAR_URL, self.settings.map_tile_url,
+            zoom=self.settings.radar_zoom, opacity=self.settings.radar_opacity,
+            radar_ttl=self.settings.radar_refresh_seconds, api_key=self.settings.api_key,
+            session=self.icon_store.session,
+        )
+        self.radar_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="radar")
+
+    def start_metrics(self):
+        CONSECUTIVE_ERRORS.set_function(lambda: self.consecutive_errors)
+        LAST_SUCCESS.set_function(lambda: self.last_successful_update)
+        RESIDENT_MEMORY.set_function(self._resident_memory)
+        if not self.settings.metrics_port:
+            return
+        from ..service.metrics_server import MetricsServer
+        try:
+            self.metrics_server = MetricsServer(self.settings.metrics_host, self.settings.metrics_port)
+        except OSError as e:
+            # E.g. the daemon and a display on one host configured with the same port
+            logging.error(f"Could not serve metrics on port {self.settings.metrics_port}: {e}")
+
+    def start_diagnostics(self):
+        if self.settings.watchdog_stall_seconds > 0:
+            sources = [self.scheduler.waiting_since]
+            if hasattr(self.ui_queue, 'waiting_since'):
+                sources.append(self.ui_queue.waiting_since)
+            self.watchdog = LoopWatchdog(sources, self.settings.watchdog_stall_seconds)
+            self.watchdog.start()
+        # start() is called on the main thread, where signal handlers must be set
+        if self.profiler.install():
+            logging.info(f"Send SIGUSR1 to pid {os.getpid()} to profile for {self.settings.profile_seconds:.0f} s")
+
+    def start(self, show_clock: bool = True):
+        # First frame: clock and last known weather, before any network setup
+        if show_clock:
+            self.update_time()
+        self.show_last_known()
+        if self.flush is not None:
+            self.flush()
+        STARTUP.mark('first_paint')
+        STARTUP.log('first frame')
+        self.scheduler.call_later(0, partial(self.start_fetching, show_clock), 'startup')
+
+    def start_fetching(self, show_clock: bool = True):
+        self.setup_environment()
+        self.start_metrics()
+        self.start_diagnostics()
+        STARTUP.mark('fetch_setup')
+        # Fill the on-disk icon store in the background so later icon changes
+        # (and every restart) need no network I/O at all.
+        self.icon_store.seed_in_background()
+        if self.subscriber is not None:
+            self.subscriber.start()
+        elif self.multi_city_plan is not None:
+            self.start_multi_city()
+        else:
+            # The scheduler owns every timer; update_weather re-schedules itself
+            # as a one-shot job because its delay depends on the last outcome.
+            self.update_weather()
+        if show_clock:
+            # The display only shows minutes, so tick on real minute boundaries
+            self.scheduler.every_aligned(60, self.update_time, 'clock')
+        self.scheduler.every(STATS_INTERVAL, self.log_system_stats, 'stats')
+        if self.radar is not None:
+            self.scheduler.every(self.settings.radar_refresh_seconds, self.update_radar, 'radar')
+        if self.settings.gc_interval_seconds > 0:
+            self.scheduler.every(self.settings.gc_interval_seconds, self.cleanup, 'cleanup')
+        if self.settings.leak_report_minutes > 0:
+            from .leak_report import LeakTracker
+            self.leak_tracker = LeakTracker()
+            self.leak_tracker.start()
+            self.scheduler.every(self.settings.leak_report_minutes * 60,
+                                 lambda: self.executor.submit(self.leak_tracker.report), 'leak-report')
+        # Everything allocated so far lives for the whole run; keep it out of future collections
+        gc.freeze()
+
+    def show_last_known(self):
+        """Paint the snapshot saved after the last successful render, marked stale."""
+        if not hasattr(self.view, 'set_stale'):
+            return  # e.g. the daemon's publisher: never pass old data on as new
+        snapshot = self.snapshot_store.load()
+        if snapshot is None:
+            return
+        weather_data, saved_at = snapshot
+        self._stale = True
+        self.view.set_stale(True)
+        self.view.update_weather(weather_data)
+        logging.info(f"Showing weather saved {(time.time() - saved_at) / 60:.0f} min ago until the first refresh")
+        icon_code = weather_data.current.weather.icon
+
+        def _on_icon(fut: Future):
+            icon_image = fut.result()
+            if icon_image is not None:
+                self.ui_queue.put(lambda: self._stale and self.view.update_weather(
+                    weather_data, self.icon_store.key(icon_code), icon_image))
+
+        # Icons come from the disk store on a worker, like every other icon
+        self.executor.submit(self.icon_store.get, icon_code).add_done_callback(_on_icon)
+
+    def start_multi_city(self):
+        cities = self.settings.cities
+        # One batched current-weather request per interval...
+        self.scheduler.every(WEATHER_INTERVAL, self.refresh_city_batch, 'weather-batch', first_delay=0)
+        # ...and per-city refreshes spread evenly over the interval instead of in a burst
+        for index, city in enumerate(cities):
+            offset = WEATHER_INTERVAL * index / len(cities)
+            self.scheduler.every(WEATHER_INTERVAL, partial(self.update_city, city), f'weather-{city}',
+                                 first_delay=offset)
+        self.scheduler.every(self.settings.rotate_seconds, self.rotate_city, 'rotate')
+
+    def refresh_city_batch(self):
+        future: Future = self.executor.submit(self.multi_city_plan.refresh_current, self.settings.cities)
+        future.add_done_callback(self._log_batch_failure)
+
+    def _log_batch_failure(self, fut: Future):
+        err = fut.exception()
+        if err is not None:
+            # Cities fall back to their own current-weather request
+            logging.warning(f"Batched current weather failed: {err}")
+
+    def update_city(self, city: str):
+        if city in self._cities_fetching:
+            return
+        self._cities_fetching.add(city)
+
+        def _fetch() -> Tuple[WeatherData, str, Optional[Image.Image]]:
+            weather_data = self.multi_city_plan.fetch(city, max_age=WEATHER_INTERVAL)
+            icon_code = weather_data.current.weather.icon
+            return weather_data, self.icon_store.key(icon_code), self.icon_store.get(icon_code)
+
+        def _on_done(fut: Future):
+            try:
+                result = fut.result()
+            except Exception as err:
+                self.ui_queue.put(lambda e=err: self._handle_weather_failure(e))
+            else:
+                self.ui_queue.put(lambda: self._store_city(city, result))
+            finally:
+                self.ui_queue.put(lambda: self._cities_fetching.discard(city))
+
+        self.executor.submit(_fetch).add_done_callback(_on_done)
+
+    def _store_city(self, city: str, result: Tuple[WeatherData, str, Optional[Image.Image]]):
+        REFRESHES.labels('success').inc()
+        self.city_data[city] = result
+        self.consecutive_errors = 0
+        self.last_successful_update = time.time()
+        if self.displayed_city in (None, city):
+            self.displayed_city = city
+            self._show(*result)
+            self.executor.submit(self.snapshot_store.save, result[0])
+
+    def rotate_city(self):
+        # Pure in-memory switch: no network or parsing work
+        ready = [city for city in self.settings.cities if city in self.city_data]
+        if not ready:
+            return
+        index = ready.index(self.displayed_city) + 1 if self.displayed_city in ready else 0
+        self.displayed_city = ready[index % len(ready)]
+        self._show(*self.city_data[self.displayed_city])
+
+    def _resident_memory(self) -> int:
+        import psutil  # Only needed for stats, so not on the startup path
+        return psutil.Process().memory_info().rss
+
+    def log_system_stats(self):
+        try:
+            import psutil
+            process = psutil.Process()
+            memory_info = process.memory_info()
+            logging.info(f"Memory usage: {memory_info.rss / 1024 / 1024:.2f} MB")
+            logging.info(f"CPU usage: {process.cpu_percent()}%")
+            logging.info(
+                f"UI queue delay: avg {self.ui_queue.stats.average() * 1000:.1f} ms, "
+                f"max {self.ui_queue.stats.max * 1000:.1f} ms"
+            )
+            logging.info(f"Scheduler: {self.scheduler.wakeups} wakeups, pending {self.scheduler.pending()}")
+            if self.weather_api is not None:
+                from ..api.connection import connection_stats
+                stats = connection_stats()
+                logging.info(f"Connections per request: {', '.join(f'{state} {count}' for state, count in sorted(stats.items())) or 'none yet'}")
+        except Exception as e:
+            logging.error(f"Error logging system stats: {str(e)}")
+
+    def update_time(self):
+        self.view.update_time(datetime.now())
+
+    def cleanup(self):
+        # Caches are bounded and Tk images released on replacement, so this is opt-in
+        gc.collect()
+
+    def update_radar(self):
+        if self._radar_pending:
+            return
+        coord = self.fetch_plan.coordinates(self.settings.city)
+        if coord is None:
+            return
+        self._radar_started = True
+        self._radar_pending = True
+
+        def _on_done(fut: Future):
+            # Tiles are fetched, stitched and scaled on the worker; the UI only gets the result
+            try:
+                image = fut.result()
+            except Exception as e:
+                logging.warning(f"Radar update failed: {e}")
+                image = None
+            self.ui_queue.put(lambda: self._show_radar(image))
+
+        self.radar_executor.submit(self.radar.render, *coord).add_done_callback(_on_done)
+
+    def _show_radar(self, image: Optional[Image.Image]):
+        self._radar_pending = False
+        if image is not None:
+            self.view.update_background(image)
+
+    def update_weather(self):
+        # Backoff after errors is part of RefreshPolicy.next_delay()
+        if self.is_fetching_weather:
+            # Avoid overlapping fetches
+            self.scheduler.call_later(WEATHER_INTERVAL, self.update_weather, 'weather')
+            return
+
+        self.is_fetching_weather = True
+
+        def _fetch() -> Tuple[WeatherData, str, Optional[Image.Image]]:
+            weather_data = self.fetch_plan.fetch(self.settings.city)
+            # Download/decode the icon here too, so the UI thread only gets a finished image
+            icon_code = weather_data.current.weather.icon
+            return weather_data, self.icon_store.key(icon_code), self.icon_store.get(icon_code)
+
+        future: Future = self.executor.submit(_fetch)
+
+        def _on_done(fut: Future):
+            # Runs on a worker thread. Marshal everything back to the UI
+            # thread via ui_queue so shared state (consecutive_errors,
+            # is_fetching_weather, ...) is only ever touched from one thread.
+            try:
+                weather_data, icon_key, icon_image = fut.result()
+            except Exception as err:
+                self.ui_queue.put(lambda e=err: self._handle_weather_failure(e))
+            else:
+                self.ui_queue.put(lambda: self._handle_weather_success(weather_data, icon_key, icon_image))
+            finally:
+                self.ui_queue.put(self._finish_weather_cycle)
+
+        # Attach completion callback without blocking the UI thread
+        future.add_done_callback(_on_done)
+
+    def _on_snapshot(self, weather_data: WeatherData):
+        # Subscriber thread: resolve the icon here, then hand over like a fetch
+        icon_code = weather_data.current.weather.icon
+        icon_key, icon_image = self.icon_store.key(icon_code), self.icon_store.get(icon_code)
+        self.ui_queue.put(lambda: self._handle_weather_success(weather_data, icon_key, icon_image))
+
+    def _show(self, weather_data: WeatherData, icon_key: str, icon_image: Optional[Image.Image]):
+        if self._stale:
+            self._stale = False
+            self.view.set_stale(False)
+        if not self._shown_fresh:
+            self._shown_fresh = True
+            STARTUP.mark('first_weather')
+            STARTUP.log('first fresh weather')
+        self.view.update_weather(weather_data, icon_key, icon_image)
+        if self.radar is not None and not self._radar_started:
+            # The city's coordinates are known after its first fetch
+            self.update_radar()
+        # Flush the redraw now so the measured frame time includes the repaint
+        if self.flush is not None:
+            self.flush()
+
+    def _handle_weather_success(self, weather_data: WeatherData, icon_key: str,
+                                icon_image: Optional[Image.Image]):
+        changes = weather_data.diff(self.last_weather_data)
+        started = time.perf_counter()
+        self._show(weather_data, icon_key, icon_image)
+        elapsed = time.perf_counter() - started
+        RENDER_SECONDS.labels(type(self.view).__name__).observe(elapsed)
+        REFRESHES.labels('success').inc()
+        logging.info(f"Rendered weather with {type(self.view).__name__} in {elapsed * 1000:.1f} ms")
+        if self.consecutive_errors > 0:
+            logging.info(f"Weather update successful after {self.consecutive_errors} failures.")
+        else:
+            logging.info("Weather update successful")
+        self.consecutive_errors = 0
+        self.last_successful_update = time.time()
+        self.last_weather_data = weather_data
+        self.executor.submit(self.snapshot_store.save, weather_data)
+        self._record_history(weather_data, changes)
+        if changes:
+            logging.debug(f"Changed fields: {', '.join(changes)}")
+            self._notify_changes(weather_data, changes)
+
+    def subscribe_changes(self, listener: Callable[[WeatherData, ChangeSet], None]):
+        """Call listener(weather_data, changes) whenever a refresh changes any field."""
+        self.change_listeners.append(listener)
+
+    def _notify_changes(self, weather_data: WeatherData, changes: ChangeSet):
+        for listener in self.change_listeners:
+            try:
+                listener(weather_data, changes)
+            except Exception as e:
+                logging.error(f"Weather change listener {listener!r} failed: {e}", exc_info=e)
+
+    def _record_history(self, weather_data: WeatherData, changes: ChangeSet):
+        if self.history is None:
+            return
+        # A refresh that returned the same observation adds no sample
+        if changes.touches('current'):
+            self.history.append(weather_data.current)
+        if self.settings.show_trends and hasattr(self.view, 'update_trends'):
+            # A few pages of the memory-mapped raw tier; cheap enough for every refresh
+            series = {field: self.history.series(field, TREND_HOURS) for field, _ in TREND_SERIES}
+            self.view.update_trends(series)
+
+    def _handle_weather_failure(self, err: Exception):
+        REFRESHES.labels('failure').inc()
+        self.consecutive_errors += 1
+        # requests is only loaded when this process fetches by itself
+        requests = sys.modules.get('requests')
+        if requests is not None and isinstance(err, requests.exceptions.RequestException):
+            error_msg = str(err)
+            if "NameResolutionError" in error_msg:
+                log_level = logging.ERROR
+                logging.error("DNS Resolution failed for api.openweathermap.org. Check network/DNS settings.")
+            else:
+                log_level = logging.WARNING
+                logging.warning(f"API Request failed: {error_msg}")
+            logging.log(log_level, f"Error updating weather: {error_msg}")
+            logging.log(log_level, f"Full error details: {type(err).__name__}")
+            logging.log(log_level, f"Consecutive errors: {self.consecutive_errors}")
+        elif isinstance(err, (DeadlineExceeded, CircuitOpenError)):
+            # Expected under a slow or failing upstream; RefreshPolicy backs off
+            logging.warning(f"Weather update skipped: {err} (consecutive errors: {self.consecutive_errors})")
+        else:
+            logging.error(f"Unexpected error during weather update: {str(err)}", exc_info=err)
+            logging.error(f"Full error details: {type(err).__name__}")
+            logging.error(f"Consecutive errors: {self.consecutive_errors}")
+
+    def _finish_weather_cycle(self):
+        self.is_fetching_weather = False
+        request_count = self.weather_api.request_count
+        self.refresh_policy.record_calls(request_count - self._counted_requests)
+        self._counted_requests = request_count
+        delay = self.refresh_policy.next_delay(self.last_weather_data, self.consecutive_errors)
+        NEXT_REFRESH_SECONDS.set(delay)
+        logging.info(f"Next weather refresh in {delay:.0f} seconds (consecutive errors: {self.consecutive_errors})")
+        self.scheduler.call_later(delay, self.update_weather, 'weather')
+        lead = self.settings.preconnect_seconds
+        if lead > 0 and delay > lead:
+            # Idle keep-alive connections rarely survive the gap; reopen them just before the fetch
+            self.scheduler.call_later(delay - lead, partial(self.preconnect, time.time() + delay), 'preconnect')
+
+    def preconnect(self, at: float):
+        future: Future = self.executor.submit(self.weather_api.preconnect, at)
+        future.add_done_callback(self._log_preconnect)
+
+    def _log_preconnect(self, fut: Future):
+        err = fut.exception()
+        if err is not None:
+            # The fetch will connect (and report the error) itself
+            logging.warning(f"Pre-connect failed: {err}")
+        elif fut.result():
+            logging.debug(f"Pre-connected {fut.result()} connection(s)")
+
+    def close(self):
+        # Non-blocking shutdown; cancel pending futures where possible
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.radar_executor is not None:
+            self.radar_executor.shutdown(wait=False, cancel_futures=True)
+        if self.subscriber is not None:
+            self.subscriber.close()
+        if self.fetch_plan is not None:
+            self.fetch_plan.close()
+        if self.history is not None:
+            self.history.close()
+        if self.metrics_server is not None:
+            self.metrics_server.close()
+        if self.watchdog is not None:
+            self.watchdog.close()
+        self.scheduler.close()
@@ -0,0 +1,71 @@
+from .core.startup import STARTUP
+import signal
+import logging
+from .config.settings import LogSettings, Settings
+from .core.log_pipeline import configure_logging
+from .core.event_loop import EventLoop
+from .core.scheduler import Scheduler
+from .core.weather_controller import WeatherController
+from .ui.image_dashboard import ImageDashboard
+from .ui.sinks import Sink, PNGSink, FramebufferSink
+
+# Records are written by a background thread in batches, rotated under a disk budget
+LOG_WRITER = configure_logging('weather_frame.log', LogSettings())
+
+
+STARTUP.mark('imports')
+
+
+def create_sink(settings: Settings) -> Sink:
+    if settings.headless_sink == 'png':
+        return PNGSink(settings.headless_output or 'weather_frame.png', settings.headless_size)
+    return FramebufferSink(settings.headless_output or '/dev/fb0')
+
+
+class HeadlessWeatherFrame:
+    """Runs the weather frame without X or Tk, rendering with Pillow into a sink."""
+
+    def __init__(self, settings: Settings, sink: Sink):
+        self.settings = settings
+        self.loop = EventLoop()
+        self.scheduler = Scheduler(self.loop.after, self.loop.after_cancel)
+        show_city = len(settings.cities) > 1
+        self.dashboard = ImageDashboard(sink, settings.language, font_path=settings.headless_font, show_city=show_city,
+                                        show_trends=settings.show_trends and not show_city and settings.weather_source == 'local')
+        self.controller = WeatherController(
+            settings, self.loop, self.scheduler, self.dashboard, icon_px=self.dashboard.icon_px,
+        )
+
+    def run(self):
+        self.controller.start()
+        self.loop.run()
+
+    def stop(self, *_args):
+        # Signal handler: only ends the loop. Closing here could deadlock on a
+        # lock the interrupted main thread holds, so main() closes after run().
+        self.loop.stop()
+
+    def close(self):
+        self.controller.close()
+        # Write the pending batch (and the RAM ring) now rather than rely on atexit
+        LOG_WRITER.close()
+
+
+def main():
+    try:
+        settings = Settings()
+        STARTUP.mark('settings')
+        app = HeadlessWeatherFrame(settings, create_sink(settings))
+        STARTUP.mark('renderer')
+        signal.signal(signal.SIGTERM, app.stop)
+        signal.signal(signal.SIGINT, app.stop)
+        try:
+            app.run()
+        finally:
+            app.close()
+    except Exception as e:
+        logging.critical(f"Critical error in main loop: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import mmap
+import os
+import struct
+import time
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from .weather_data import CurrentWeather
+
+# Fixed-width sample: timestamp, temperature, humidity, wind, rain, snow, aqi
+RECORD = struct.Struct('<dfffffB3x')
+# Ring header: magic, version, capacity, head (next write slot), count
+HEADER = struct.Struct('<4sIIII12x')
+MAGIC = b'RBHS'
+VERSION = 1
+
+# Samples kept per tier: ~1 week of 5-minute raw samples, 90 days hourly, 10 years daily
+TIER_CAPACITY = {
+    'raw': 2048,
+    'hourly': 24 * 90,
+    'daily': 3660,
+}
+
+
+@dataclass
+class HistorySample:
+    timestamp: float
+    temperature: float
+    humidity: float
+    wind_speed: float
+    rain_amount: float
+    snow_amount: float
+    air_quality: int
+
+    @classmethod
+    def from_current(cls, timestamp: float, current: CurrentWeather) -> 'HistorySample':
+        return cls(timestamp, current.temperature, current.humidity, current.wind_speed,
+                   current.rain_amount, current.snow_amount, current.air_quality)
+
+    @classmethod
+    def mean(cls, timestamp: float, samples: List['HistorySample']) -> 'HistorySample':
+        n = len(samples)
+        return cls(
+            timestamp,
+            sum(s.temperature for s in samples) / n,
+            sum(s.humidity for s in samples) / n,
+            sum(s.wind_speed for s in samples) / n,
+            sum(s.rain_amount for s in samples) / n,
+            sum(s.snow_amount for s in samples) / n,
+            round(sum(s.air_quality for s in samples) / n),
+        )
+
+
+class RingFile:
+    """Fixed-capacity ring of fixed-width records in a memory-mapped file.
+
+    Appends overwrite the oldest record in O(1). Records are in time order,
+    so range queries binary-search the ring and only touch the pages they
+    read; the file is never loaded into memory as a whole.
+    """
+
+    def __init__(self, path: str, capacity: int):
+        size = HEADER.size + capacity * RECORD.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size != size:
+                # New file or one written with another capacity: start over
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+        magic, version, stored_capacity, self.head, self.count = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION or stored_capacity != capacity:
+            self.head, self.count = 0, 0
+        self.capacity = capacity
+        self._write_header()
+
+    def append(self, sample: HistorySample):
+        RECORD.pack_into(self._map, HEADER.size + self.head * RECORD.size,
+                         sample.timestamp, sample.temperature, sample.humidity, sample.wind_speed,
+                         sample.rain_amount, sample.snow_amount, min(max(sample.air_quality, 0), 255))
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self._write_header()
+
+    def last(self) -> Optional[HistorySample]:
+        return self._read(self.count - 1) if self.count else None
+
+    def range(self, start: float, end: float) -> List[HistorySample]:
+        first = self._bisect(start)
+        samples = []
+        for index in range(first, self.count):
+            sample = self._read(index)
+            if sample.timestamp > end:
+                break
+            samples.append(sample)
+        return samples
+
+    def flush(self):
+        self._map.flush()
+
+    def close(self):
+        self._map.flush()
+        self._map.close()
+
+    def _bisect(self, timestamp: float) -> int:
+        """Logical index of the first record at or after timestamp."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self._timestamp(mid) < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _offset(self, index: int) -> int:
+        # Logical index 0 is the oldest record
+        slot = (self.head - self.count + index) % self.capacity
+        return HEADER.size + slot * RECORD.size
+
+    def _timestamp(self, index: int) -> float:
+        return struct.unpack_from('<d', self._map, self._offset(index))[0]
+
+    def _read(self, index: int) -> HistorySample:
+        return HistorySample(*RECORD.unpack_from(self._map, self._offset(index)))
+
+    def _write_header(self):
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.capacity, self.head, self.count)
+
+
+class HistoryStore:
+    """Append-only local history of CurrentWeather readings.
+
+    Samples go into a raw tier and are averaged into hourly and daily tiers
+    as each hour/day completes. On start, complete hours and days in the raw
+    tier that are missing from the hourly/daily tiers (e.g. because the app
+    was stopped before the next reading) are rolled up, and the pending hour
+    and day are rebuilt, so downsampling survives restarts. The screen only
+    reads the raw tier so far (the 24 h trends); the hourly and daily tiers
+    are there for longer-range query()/series() calls.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.tiers: Dict[str, RingFile] = {
+            tier: RingFile(os.path.join(directory, f"{tier}.ring"), capacity)
+            for tier, capacity in TIER_CAPACITY.items()
+        }
+        now = time.time()
+        self._pending_hour = self._catch_up('hourly', self._hour_start, now)
+        self._pending_day = self._catch_up('daily', self._day_start, now)
+        for ring in self.tiers.values():
+            ring.flush()
+
+    def append(self, current: CurrentWeather, timestamp: Optional[float] = None) -> bool:
+        """Record a reading; returns False for a repeat of the last observation."""
+        timestamp = timestamp or current.observed_at or time.time()
+        sample = HistorySample.from_current(timestamp, current)
+        with self._lock:
+            last = self.tiers['raw'].last()
+            if last is not None and timestamp <= last.timestamp:
+                return False
+            self._roll_up(sample)
+            self.tiers['raw'].append(sample)
+        return True
+
+    def query(self, start: float, end: Optional[float] = None, tier: str = 'raw') -> List[HistorySample]:
+        with self._lock:
+            return self.tiers[tier].range(start, end if end is not None else time.time())
+
+    def series(self, field: str, hours: float = 24, tier: str = 'raw') -> List[float]:
+        """Values of one HistorySample field over the last `hours` hours, oldest first."""
+        samples = self.query(time.time() - hours * 3600, tier=tier)
+        return [getattr(sample, field) for sample in samples]
+
+    def close(self):
+        with self._lock:
+            for ring in self.tiers.values():
+                ring.close()
+
+    def _catch_up(self, tier: str, period_start: Callable[[float], float], now: float) -> List[HistorySample]:
+        """Roll up the complete periods missing from `tier`; returns the raw samples of the current one."""
+        last = self.tiers[tier].last()
+        periods: Dict[float, List[HistorySample]] = {}
+        for sample in self.tiers['raw'].range(last.timestamp if last else 0.0, now):
+            periods.setdefault(period_start(sample.timestamp), []).append(sample)
+        current = period_start(now)
+        pending: List[HistorySample] = []
+        for start, samples in periods.items():
+            if start >= current:
+                pending = samples
+            elif last is None or start > last.timestamp:
+                self.tiers[tier].append(HistorySample.mean(start, samples))
+        return pending
+
+    def _roll_up(self, sample: HistorySample):
+        if self._pending_hour and self._hour_start(sample.timestamp) != self._hour_start(self._pending_hour[0].timestamp):
+            hour = self._hour_start(self._pending_hour[0].timestamp)
+            self.tiers['hourly'].append(HistorySample.mean(hour, self._pending_hour))
+            self._pending_hour = []
+        if self._pending_day and self._day_start(sample.timestamp) != self._day_start(self._pending_day[0].timestamp):
+            day = self._day_start(self._pending_day[0].timestamp)
+            self.tiers['daily'].append(HistorySample.mean(day, self._pending_day))
+            self._pending_day = []
+            for ring in self.tiers.values():
+                ring.flush()
+        self._pending_hour.append(sample)
+        self._pending_day.append(sample)
+
+    @staticmethod
+    def _hour_start(timestamp: float) -> float:
+        return timestamp - timestamp % 3600
+
+    @staticmethod
+    def _day_start(timestamp: float) -> float:
+        # Local midnight, so daily tiers match the dates shown on screen
+        day = datetime.fromtimestamp(timestamp).date()
+        return datetime.combine(day, datetime.min.time()).timestamp()
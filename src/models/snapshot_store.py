@@ -0,0 +1,43 @@
+import json
+import os
+import time
+import logging
+from typing import Optional, Tuple
+from .weather_data import WeatherData
+from ..core.atomic_file import atomic_write
+
+
+class SnapshotStore:
+    """Last rendered WeatherData as a small JSON file, shown at the next start.
+
+    Loading it needs no network and no parsing of API responses, so a
+    restarted frame can show the last known weather (marked stale) right away.
+    """
+
+    def __init__(self, path: str, max_age: float = 12 * 3600):
+        self.path = path
+        self.max_age = max_age
+
+    def save(self, weather_data: WeatherData):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with atomic_write(self.path, encoding='utf-8') as f:
+                json.dump({'saved_at': time.time(), 'weather': weather_data.to_dict()}, f,
+                          separators=(',', ':'), ensure_ascii=False)
+        except OSError as e:
+            logging.warning(f"Could not save weather snapshot: {e}")
+
+    def load(self) -> Optional[Tuple[WeatherData, float]]:
+        """(weather_data, saved_at), or None when missing, unreadable or too old."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            saved_at = data['saved_at']
+            if time.time() - saved_at > self.max_age:
+                return None
+            return WeatherData.from_dict(data['weather']), saved_at
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring unreadable weather snapshot: {e}")
+            return None
@@ -1,13 +1,16 @@
-from dataclasses import dataclass
-from typing import List, Dict, Any
+from dataclasses import dataclass, asdict, fields, is_dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple
 from datetime import datetime, date
 
-@dataclass
+# Snapshots are immutable (frozen) and compact (__slots__): a refresh builds
+# new ones, and WeatherData.diff() says which fields changed since the last.
+
+@dataclass(frozen=True, slots=True)
 class WeatherCondition:
     description: str
     icon: str
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CurrentWeather:
     temperature: float
     feels_like: float
@@ -17,17 +20,64 @@ class CurrentWeather:
     air_quality: int
     rain_amount: float  # 1시간 동안의 강수량 (mm)
     snow_amount: float  # 1시간 동안의 적설량 (mm)
+    observed_at: int = 0  # 관측 시각 (unix time, API의 dt)
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DailyForecast:
     date: date
     temp_min: float
     temp_max: float
 
-@dataclass
+class ChangeSet:
+    """Field-level differences between two WeatherData snapshots.
+
+    Keys are dotted field paths ('city', 'current.temperature',
+    'current.weather.icon', 'forecast.0.temp_min', ...) mapped to
+    (old, new). A forecast whose length changed is one 'forecast' entry.
+    """
+
+    __slots__ = ('changes',)
+
+    def __init__(self, changes: Dict[str, Tuple[Any, Any]]):
+        self.changes = changes
+
+    def __bool__(self) -> bool:
+        return bool(self.changes)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.changes)
+
+    def __repr__(self) -> str:
+        return f"ChangeSet({self.changes!r})"
+
+    def touches(self, *paths: str) -> bool:
+        """Whether any of these fields, a field inside them or a field containing them changed."""
+        for changed in self.changes:
+            for path in paths:
+                if changed == path or changed.startswith(path + '.') or path.startswith(changed + '.'):
+                    return True
+        return False
+
+
+def _diff(path: str, old: Any, new: Any, changes: Dict[str, Tuple[Any, Any]]):
+    if old is new:
+        return
+    if is_dataclass(new) and type(old) is type(new):
+        for field in fields(new):
+            _diff(f"{path}.{field.name}" if path else field.name,
+                  getattr(old, field.name), getattr(new, field.name), changes)
+    elif isinstance(new, tuple) and isinstance(old, tuple) and len(old) == len(new):
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            _diff(f"{path}.{index}", old_item, new_item, changes)
+    elif old != new:
+        changes[path] = (old, new)
+
+
+@dataclass(frozen=True, slots=True)
 class WeatherData:
     current: CurrentWeather
-    forecast: List[DailyForecast]
+    forecast: Tuple[DailyForecast, ...]
+    city: str = ''
 
     @classmethod
     def from_api_response(cls, current_data: Dict[str, Any], air_data: Dict[str, Any], forecast_data: Dict[str, Any]) -> 'WeatherData':
@@ -46,22 +96,64 @@ class WeatherData:
             ),
             air_quality=air_data['list'][0]['main']['aqi'] if air_data and 'list' in air_data and air_data['list'] else 0,
             rain_amount=rain_amount,
-            snow_amount=snow_amount
+            snow_amount=snow_amount,
+            observed_at=current_data.get('dt', 0)
         )
 
         # Aggregate the 3-hour forecast slots into a daily min/max range.
-        daily_forecasts: Dict[date, DailyForecast] = {}
+        daily_ranges: Dict[date, Tuple[float, float]] = {}
         for item in forecast_data['list']:
             day = datetime.fromtimestamp(item['dt']).date()
             temp_min = item['main']['temp_min']
             temp_max = item['main']['temp_max']
-            if day not in daily_forecasts:
-                daily_forecasts[day] = DailyForecast(date=day, temp_min=temp_min, temp_max=temp_max)
-            else:
-                forecast = daily_forecasts[day]
-                forecast.temp_min = min(forecast.temp_min, temp_min)
-                forecast.temp_max = max(forecast.temp_max, temp_max)
+            if day in daily_ranges:
+                day_min, day_max = daily_ranges[day]
+                temp_min, temp_max = min(day_min, temp_min), max(day_max, temp_max)
+            daily_ranges[day] = (temp_min, temp_max)
         return cls(
             current=current,
-            forecast=list(daily_forecasts.values())[:5]  # Get only 5 days of forecast
-        ) 
\ No newline at end of file
+            forecast=tuple(
+                DailyForecast(date=day, temp_min=temp_min, temp_max=temp_max)
+                for day, (temp_min, temp_max) in list(daily_ranges.items())[:5]  # Get only 5 days of forecast
+            ),
+            city=current_data.get('name', '')
+        )
+
+    def diff(self, previous: Optional['WeatherData']) -> ChangeSet:
+        """Fields that changed since `previous`; every field when there is none."""
+        changes: Dict[str, Tuple[Any, Any]] = {}
+        if previous is None:
+            _diff('', _EMPTY, self, changes)
+        else:
+            _diff('', previous, self, changes)
+        return ChangeSet(changes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain JSON-serialisable snapshot, e.g. for publishing to other processes."""
+        data = asdict(self)
+        for forecast in data['forecast']:
+            forecast['date'] = forecast['date'].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'WeatherData':
+        current = dict(data['current'])
+        current['weather'] = WeatherCondition(**current['weather'])
+        return cls(
+            current=CurrentWeather(**current),
+            forecast=tuple(
+                DailyForecast(date=date.fromisoformat(f['date']), temp_min=f['temp_min'], temp_max=f['temp_max'])
+                for f in data['forecast']
+            ),
+            city=data.get('city', '')
+        )
+
+
+# Stands in for "nothing shown yet": differs from any real snapshot in every field
+_EMPTY = WeatherData(
+    current=CurrentWeather(temperature=None, feels_like=None, humidity=None, wind_speed=None,
+                           weather=WeatherCondition(description=None, icon=None), air_quality=None,
+                           rain_amount=None, snow_amount=None, observed_at=None),
+    forecast=(),
+    city=None,
+)
@@ -0,0 +1,62 @@
+import signal
+import logging
+from ..config.settings import LogSettings, Settings
+from ..core.log_pipeline import configure_logging
+from ..core.event_loop import EventLoop
+from ..core.scheduler import Scheduler
+from ..core.weather_controller import WeatherController
+from .pubsub import SnapshotPublisher
+
+# Records are written by a background thread in batches, rotated under a disk budget
+LOG_WRITER = configure_logging('weather_daemon.log', LogSettings())
+
+
+class WeatherDaemon:
+    """Fetches weather once for every display on the host.
+
+    Runs the same fetch/backoff logic as a display, but publishes each
+    WeatherData snapshot on a Unix socket instead of drawing it. Displays
+    with WEATHER_SOURCE=daemon subscribe instead of fetching themselves.
+    """
+
+    def __init__(self, settings: Settings):
+        self.loop = EventLoop()
+        self.scheduler = Scheduler(self.loop.after, self.loop.after_cancel)
+        self.publisher = SnapshotPublisher(settings.socket_path)
+        self.controller = WeatherController(settings, self.loop, self.scheduler, self.publisher)
+
+    def run(self):
+        # No clock to draw; icons are still fetched into the shared on-disk store
+        self.controller.start(show_clock=False)
+        self.loop.run()
+
+    def stop(self, *_args):
+        # Signal handler: only ends the loop. Closing here could deadlock on a
+        # lock the interrupted main thread holds, so main() closes after run().
+        self.loop.stop()
+
+    def close(self):
+        self.controller.close()
+        self.publisher.close()
+        # Write the pending batch (and the RAM ring) now rather than rely on atexit
+        LOG_WRITER.close()
+
+
+def main():
+    try:
+        settings = Settings()
+        if settings.weather_source == 'daemon':
+            raise ValueError("The weather daemon must fetch itself; unset WEATHER_SOURCE for it")
+        daemon = WeatherDaemon(settings)
+        signal.signal(signal.SIGTERM, daemon.stop)
+        signal.signal(signal.SIGINT, daemon.stop)
+        try:
+            daemon.run()
+        finally:
+            daemon.close()
+    except Exception as e:
+        logging.critical(f"Critical error in weather daemon: {str(e)}")
+        raise
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ..core.metrics import REGISTRY, Registry
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """Serves a metrics Registry at /metrics in the Prometheus text format.
+
+    Runs on its own daemon thread; a scrape only renders counters that the
+    app already keeps, so it never waits on the UI thread.
+    """
+
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY):
+        self.registry = registry
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        logging.info(f"Serving metrics on http://{host}:{self.port}/metrics")
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler_class(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                payload = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes every few seconds would flood the log
+
+        return Handler
@@ -0,0 +1,155 @@
+import json
+import os
+import socket
+import logging
+import threading
+from typing import Callable, List, Optional
+from ..models.weather_data import WeatherData
+
+# Snapshots are sent as one compact JSON document per line
+MAX_LINE_BYTES = 64 * 1024
+
+
+def encode_snapshot(weather_data: WeatherData) -> bytes:
+    return json.dumps(weather_data.to_dict(), separators=(',', ':'), ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+class SnapshotPublisher:
+    """Publishes WeatherData snapshots to local subscribers over a Unix socket.
+
+    New subscribers get the latest snapshot as soon as they connect, so a
+    display started between refreshes doesn't wait for the next fetch.
+    Acts as a controller view: update_weather() publishes, update_time() is a no-op.
+    """
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._clients: List[socket.socket] = []
+        self._lock = threading.Lock()
+        self._latest: Optional[bytes] = None
+        self._closed = False
+        try:
+            os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(socket_path) or '.', exist_ok=True)
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(socket_path)
+        self._server.listen()
+        self._thread = threading.Thread(target=self._accept_loop, name="weather-publisher", daemon=True)
+        self._thread.start()
+        logging.info(f"Publishing weather snapshots on {socket_path}")
+
+    def update_time(self, now):
+        pass
+
+    def update_weather(self, weather_data: WeatherData, icon_key=None, icon_image=None):
+        self.publish(weather_data)
+
+    def publish(self, weather_data: WeatherData):
+        line = encode_snapshot(weather_data)
+        with self._lock:
+            self._latest = line
+            clients = list(self._clients)
+        for client in clients:
+            self._send(client, line)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+    def close(self):
+        self._closed = True
+        with self._lock:
+            clients, self._clients = self._clients, []
+        for client in clients:
+            client.close()
+        self._server.close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                client, _ = self._server.accept()
+            except OSError:
+                return
+            # A stuck subscriber must not stall publishing to the others
+            client.settimeout(1.0)
+            with self._lock:
+                self._clients.append(client)
+                latest = self._latest
+            if latest is not None:
+                self._send(client, latest)
+
+    def _send(self, client: socket.socket, line: bytes):
+        try:
+            client.sendall(line)
+        except OSError:
+            with self._lock:
+                if client in self._clients:
+                    self._clients.remove(client)
+            client.close()
+
+
+class WeatherSubscriber:
+    """Receives snapshots from a SnapshotPublisher, reconnecting as needed.
+
+    on_snapshot is called on the subscriber thread with each WeatherData.
+    """
+
+    def __init__(self, socket_path: str, on_snapshot: Callable[[WeatherData], None],
+                 retry_delay: float = 5.0):
+        self.socket_path = socket_path
+        self.on_snapshot = on_snapshot
+        self.retry_delay = retry_delay
+        self._closed = threading.Event()
+        self._sock: Optional[socket.socket] = None
+        self._thread = threading.Thread(target=self._run, name="weather-subscriber", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def close(self):
+        self._closed.set()
+        sock = self._sock
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _run(self):
+        while not self._closed.is_set():
+            try:
+                self._receive()
+            except OSError as e:
+                logging.warning(f"Weather daemon connection failed: {e}")
+            self._closed.wait(self.retry_delay)
+
+    def _receive(self):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            self._sock = sock
+            logging.info(f"Subscribed to weather daemon at {self.socket_path}")
+            buffer = b''
+            while not self._closed.is_set():
+                chunk = sock.recv(16384)
+                if not chunk:
+                    return
+                buffer += chunk
+                if len(buffer) > MAX_LINE_BYTES and b'\n' not in buffer:
+                    raise OSError("Oversized snapshot from weather daemon")
+                *lines, buffer = buffer.split(b'\n')
+                for line in lines:
+                    self._dispatch(line)
+
+    def _dispatch(self, line: bytes):
+        try:
+            weather_data = WeatherData.from_dict(json.loads(line))
+        except (ValueError, KeyError, TypeError) as e:
+            logging.warning(f"Ignoring malformed weather snapshot: {e}")
+            return
+        self.on_snapshot(weather_data)
@@ -0,0 +1,128 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from PIL import Image, ImageTk
+from datetime import date
+from typing import Dict, List, Optional
+from ..models.weather_data import WeatherData
+from .formatting import format_time, format_date, weather_texts
+from .layout import STALE_COLOR, TEXT_STYLES, TREND_HEIGHT, TREND_WIDTH, WEATHER_SLOTS, Layout, compute_layout
+from .photo_cache import PhotoCache, release_photo
+from .sparkline import TREND_SERIES, sparkline_points
+
+FONT_FAMILY = 'Helvetica'
+
+
+class CanvasDashboard:
+    """Alternative to WeatherWidgets that draws the dashboard on one tk.Canvas.
+
+    Slot positions are computed once from the screen size and font metrics,
+    so a text change never triggers geometry propagation; only the canvas
+    items whose content actually changed are reconfigured. Exposes the same
+    update_time()/update_weather() interface as WeatherWidgets.
+    """
+
+    def __init__(self, parent: tk.Frame, language: str = 'en', width: Optional[int] = None,
+                 height: Optional[int] = None, icon_px: int = 200, show_city: bool = False,
+                 show_trends: bool = False):
+        self.parent = parent
+        self.language = language
+        self.width = width or parent.winfo_screenwidth()
+        self.height = height or parent.winfo_screenheight()
+        self.icon_px = icon_px
+        self.show_city = show_city
+        self.show_trends = show_trends
+        self._icon_cache = PhotoCache()
+        self._icon_key: Optional[str] = None
+        self._weather_data: Optional[WeatherData] = None
+        self._background: Optional[ImageTk.PhotoImage] = None
+        self._texts: Dict[str, str] = {}
+        self._date: Optional[date] = None
+        self.fonts = {slot: tkfont.Font(family=FONT_FAMILY, size=size) for slot, (size, _) in TEXT_STYLES.items()}
+        self.canvas = tk.Canvas(parent, width=self.width, height=self.height, bg='black', highlightthickness=0)
+        self.canvas.pack(expand=True, fill='both')
+        self.items: Dict[str, int] = {}
+        self.layout = self.compute_layout()
+        self.create_items(self.layout)
+
+    def compute_layout(self) -> Layout:
+        return compute_layout(
+            self.width, self.height, self.icon_px,
+            measure=lambda slot, text: self.fonts[slot].measure(text),
+            linespace=lambda slot: self.fonts[slot].metrics('linespace'),
+            show_city=self.show_city,
+            show_trends=self.show_trends,
+        )
+
+    def create_items(self, layout: Layout):
+        # Created first so it stays below everything else
+        self.items['background'] = self.canvas.create_image(0, 0, anchor='nw')
+        for slot, (_, color) in TEXT_STYLES.items():
+            if slot not in layout:
+                continue
+            x, y, anchor = layout[slot]
+            self.items[slot] = self.canvas.create_text(x, y, text='', anchor=anchor, fill=color, font=self.fonts[slot])
+        x, y, anchor = layout['icon']
+        self.items['icon'] = self.canvas.create_image(x, y, anchor=anchor)
+        for field, color in TREND_SERIES:
+            slot = f'trend_{field}'
+            if slot in layout:
+                self.items[slot] = self.canvas.create_line(0, 0, 0, 0, fill=color, width=3, state='hidden')
+
+    def update_time(self, now):
+        self._set_text('time', format_time(now))
+        if now.date() != self._date:
+            self._date = now.date()
+            self._set_text('date', format_date(now, self.language))
+
+    def update_weather(self, weather_data: WeatherData, icon_key: Optional[str] = None,
+                       icon_image: Optional[Image.Image] = None):
+        # Only the slots whose fields changed since the last snapshot are formatted
+        changes = weather_data.diff(self._weather_data)
+        self._weather_data = weather_data
+        for slot, text in weather_texts(weather_data, self.language, changes).items():
+            self._set_text(slot, text)
+        if icon_key is not None:
+            self.update_weather_icon(icon_key, icon_image)
+
+    def update_weather_icon(self, icon_key: str, icon_image: Optional[Image.Image]):
+        if icon_key == self._icon_key:
+            return
+        icon_photo = self._icon_cache.get(icon_key, icon_image)
+        if icon_photo is None:
+            return
+        self._icon_key = icon_key
+        self.canvas.itemconfigure(self.items['icon'], image=icon_photo)
+        self._icon_cache.show('icon', icon_photo)
+
+    def update_background(self, image: Image.Image):
+        # A finished, display-sized image from a worker; only the Tk wrap happens here
+        photo = ImageTk.PhotoImage(image)
+        self.canvas.itemconfigure(self.items['background'], image=photo)
+        if self._background is not None:
+            release_photo(self._background)
+        self._background = photo
+
+    def set_stale(self, stale: bool):
+        for slot in WEATHER_SLOTS:
+            if slot in self.items:
+                self.canvas.itemconfigure(self.items[slot], fill=STALE_COLOR if stale else TEXT_STYLES[slot][1])
+
+    def update_trends(self, series: Dict[str, List[float]]):
+        for field, _ in TREND_SERIES:
+            slot = f'trend_{field}'
+            if slot not in self.items:
+                continue
+            x, y, _ = self.layout[slot]
+            points = sparkline_points(series.get(field, []), x, y, TREND_WIDTH, TREND_HEIGHT)
+            if points:
+                self.canvas.coords(self.items[slot], *points)
+                self.canvas.itemconfigure(self.items[slot], state='normal')
+            else:
+                self.canvas.itemconfigure(self.items[slot], state='hidden')
+
+    def _set_text(self, slot: str, text: str):
+        # Damage tracking: an unchanged slot costs a dict lookup, not a repaint
+        if slot not in self.items or self._texts.get(slot) == text:
+            return
+        self._texts[slot] = text
+        self.canvas.itemconfigure(self.items[slot], text=text)
@@ -0,0 +1,91 @@
+from datetime import datetime
+from typing import Optional
+from ..models.weather_data import ChangeSet, WeatherData
+
+# Display strings shared by every renderer, so they all show the same text.
+
+def format_time(now: datetime) -> str:
+    return now.strftime("%I:%M %p")
+
+def format_date(now: datetime, language: str) -> str:
+    if language == 'kr':
+        weekday_names = ['월', '화', '수', '목', '금', '토', '일']
+        return now.strftime("%Y년 %m월 %d일 ") + weekday_names[now.weekday()]
+    weekday_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
+    return now.strftime("%B %d, %Y ") + weekday_names[now.weekday()]
+
+def format_temperature(temperature: float) -> str:
+    return f"{round(temperature)}°C"
+
+def get_air_quality_text(aqi: int, language: str) -> str:
+    if language == 'kr':
+        if aqi == 1:
+            return "좋음"
+        elif aqi == 2:
+            return "보통"
+        elif aqi == 3:
+            return "나쁨"
+        elif aqi == 4:
+            return "매우 나쁨"
+        else:
+            return "위험"
+    else:
+        if aqi == 1:
+            return "Good"
+        elif aqi == 2:
+            return "Fair"
+        elif aqi == 3:
+            return "Poor"
+        elif aqi == 4:
+            return "Very Poor"
+        else:
+            return "Hazardous"
+
+def format_air_quality(aqi: int, language: str) -> str:
+    aqi_label = "대기질" if language == 'kr' else "Air Quality"
+    return f"{aqi_label}: {get_air_quality_text(aqi, language)}"
+
+# Precipitation amounts use the same format for both languages
+def format_rain(rain: float) -> str:
+    return f"🌧️ {rain:.1f}㎜/h" if rain > 0 else ""
+
+def format_snow(snow: float) -> str:
+    return f"🌨️ {snow:.1f}㎜/h" if snow > 0 else ""
+
+def format_temp_min(temp_min: float) -> str:
+    return f"↓{round(temp_min)}°"
+
+def format_temp_max(temp_max: float) -> str:
+    return f"↑{round(temp_max)}°"
+
+# WeatherData fields (ChangeSet paths) each text slot is made from
+SLOT_FIELDS = {
+    'city': 'city',
+    'temp': 'current.temperature',
+    'desc': 'current.weather.description',
+    'air_quality': 'current.air_quality',
+    'rain': 'current.rain_amount',
+    'snow': 'current.snow_amount',
+    'temp_min': 'forecast.0.temp_min',
+    'temp_max': 'forecast.0.temp_max',
+}
+
+def weather_texts(weather_data: WeatherData, language: str, changes: Optional[ChangeSet] = None) -> dict:
+    """Weather text fields of the dashboard, keyed by slot name; with `changes`, only the changed ones."""
+    current = weather_data.current
+    texts = {
+        'city': weather_data.city,
+        'temp': format_temperature(current.temperature),
+        'desc': current.weather.description,
+        'air_quality': format_air_quality(current.air_quality, language),
+        'rain': format_rain(current.rain_amount),
+        'snow': format_snow(current.snow_amount),
+    }
+    # Temperature range for the first day of forecast
+    if weather_data.forecast:
+        first_day = weather_data.forecast[0]
+        texts['temp_min'] = format_temp_min(first_day.temp_min)
+        texts['temp_max'] = format_temp_max(first_day.temp_max)
+    if changes is not None:
+        texts = {slot: text for slot, text in texts.items() if changes.touches(SLOT_FIELDS[slot])}
+    return texts
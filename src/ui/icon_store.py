@@ -0,0 +1,198 @@
+import os
+import io
+import time
+import logging
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from PIL import Image
+from ..core.atomic_file import atomic_write
+from ..core.lru import LRUCache
+from ..core.metrics import REGISTRY
+
+# Every icon code OpenWeather can return (day and night variants)
+OPENWEATHER_ICON_CODES = (
+    '01d', '01n', '02d', '02n', '03d', '03n', '04d', '04n', '09d',
+    '09n', '10d', '10n', '11d', '11n', '13d', '13n', '50d', '50n',
+)
+
+ICON_URL = "https://openweathermap.org/img/wn/{code}@{size}.png"
+
+# Decoded icons kept in memory; all 18 codes at one size fit comfortably
+ICON_MEMORY_BYTES = 4 * 1024 * 1024
+# After a failed download the icon is not requested again for this long,
+# doubling with every further failure
+FAILURE_BACKOFF = 60
+MAX_FAILURE_BACKOFF = 3600
+
+ICON_LOOKUPS = REGISTRY.counter('raspboard_icon_lookups_total', 'Icon lookups by where they were found', ('source',))
+
+
+class IconStore:
+    """Weather icon pipeline meant to run on worker threads.
+
+    Icons are downloaded, decoded and scaled here so the Tk main thread only
+    has to wrap a finished PIL image in a PhotoImage. Scaled PNGs are kept in
+    a size-bounded directory so icons survive restarts without network I/O.
+    """
+
+    def __init__(self, cache_dir: str, session=None, icon_px: Optional[int] = None,
+                 size: str = '4x', max_bytes: int = 2 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.session = session
+        self.icon_px = icon_px
+        self.size = size
+        self.max_bytes = max_bytes
+        self._timeout = (3, 5)
+        self._images: LRUCache[Image.Image] = LRUCache(
+            'icons', ICON_MEMORY_BYTES, lambda image: image.width * image.height * len(image.getbands()))
+        self._lock = threading.Lock()
+        # icon code -> (retry at, backoff) after failed downloads
+        self._failures: Dict[str, Tuple[float, float]] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, icon_code: str) -> str:
+        return f"{icon_code}@{self.size}_{self.icon_px or 0}"
+
+    def get(self, icon_code: str) -> Optional[Image.Image]:
+        """Return a decoded, scaled icon. Blocking; never call from the Tk thread."""
+        key = self.key(icon_code)
+        image = self._images.get(key)
+        if image is not None:
+            ICON_LOOKUPS.labels('memory').inc()
+            return image
+
+        source = 'disk'
+        image = self._load_from_disk(key)
+        if image is None and self.icon_px:
+            # Another process (e.g. the weather daemon) may have stored the unscaled icon
+            image = self._load_from_disk(f"{icon_code}@{self.size}_0")
+            if image is not None:
+                image = self._scale(image)
+                self._save_to_disk(key, image)
+        if image is None:
+            source = 'download'
+            image = self._download(icon_code)
+            if image is None:
+                ICON_LOOKUPS.labels('failed').inc()
+                return None
+            with self._lock:
+                self._failures.pop(icon_code, None)
+            self._save_to_disk(key, image)
+        ICON_LOOKUPS.labels(source).inc()
+
+        self._images.put(key, image)
+        return image
+
+    def seed(self, icon_codes: Iterable[str] = OPENWEATHER_ICON_CODES):
+        """Make sure every icon is on disk, so later lookups need no network.
+
+        Stops at the first icon that can't be fetched (most likely we are
+        offline); the next start tries again.
+        """
+        for icon_code in icon_codes:
+            if not os.path.exists(self._path(self.key(icon_code))) and self.get(icon_code) is None:
+                logging.info(f"Icon seeding stopped at {icon_code}")
+                return
+
+    def seed_in_background(self, icon_codes: Iterable[str] = OPENWEATHER_ICON_CODES) -> threading.Thread:
+        """seed() on a low-priority thread of its own, so it never holds up the weather workers."""
+        thread = threading.Thread(target=self._seed_low_priority, args=(tuple(icon_codes),),
+                                  name="icon-seed", daemon=True)
+        thread.start()
+        return thread
+
+    def _seed_low_priority(self, icon_codes: Tuple[str, ...]):
+        try:
+            # On Linux the niceness applies to the calling thread only
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+        except (AttributeError, OSError):
+            pass
+        self.seed(icon_codes)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def _load_from_disk(self, key: str) -> Optional[Image.Image]:
+        path = self._path(key)
+        try:
+            with Image.open(path) as icon_image:
+                icon_image.load()
+                image = icon_image.copy()
+            # Touch the file so pruning evicts the least recently used icons
+            os.utime(path)
+            return image
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Discarding unreadable cached icon {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _download(self, icon_code: str) -> Optional[Image.Image]:
+        with self._lock:
+            retry_at, backoff = self._failures.get(icon_code, (0.0, 0.0))
+        if time.monotonic() < retry_at:
+            return None
+        icon_url = ICON_URL.format(code=icon_code, size=self.size)
+        try:
+            content = self._fetch_bytes(icon_url)
+            if content is None:
+                raise ValueError("no icon in response")
+            icon_image = Image.open(io.BytesIO(content))
+            icon_image.load()
+        except Exception as e:
+            backoff = min(MAX_FAILURE_BACKOFF, backoff * 2 or FAILURE_BACKOFF)
+            logging.warning(f"Error fetching icon {icon_code}, not retrying for {backoff:.0f}s: {e}")
+            with self._lock:
+                self._failures[icon_code] = (time.monotonic() + backoff, backoff)
+            return None
+        return self._scale(icon_image)
+
+    def _scale(self, icon_image: Image.Image) -> Image.Image:
+        icon_image = icon_image.convert('RGBA')
+        if self.icon_px and icon_image.size != (self.icon_px, self.icon_px):
+            icon_image = icon_image.resize((self.icon_px, self.icon_px), Image.LANCZOS)
+        return icon_image
+
+    def _fetch_bytes(self, icon_url: str) -> Optional[bytes]:
+        if self.session is None:
+            # Without a requests session (e.g. displays fed by the daemon) use the stdlib;
+            # imported here because it pulls in ssl, which slows down startup
+            import urllib.request
+            with urllib.request.urlopen(icon_url, timeout=sum(self._timeout)) as response:
+                return response.read()
+        icon_response = self.session.get(icon_url, timeout=self._timeout)
+        if icon_response.status_code != 200:
+            logging.warning(f"Failed to fetch weather icon. Status code: {icon_response.status_code}")
+            return None
+        return icon_response.content
+
+    def _save_to_disk(self, key: str, image: Image.Image):
+        try:
+            # Several workers may store the same icon at once
+            with atomic_write(self._path(key), 'wb') as f:
+                image.save(f, format='PNG', optimize=True)
+        except OSError as e:
+            logging.warning(f"Could not store icon {key}: {e}")
+            return
+        self._prune()
+
+    def _prune(self):
+        with self._lock:
+            try:
+                entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.png')]
+            except OSError:
+                return
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            total = sum(entry.stat().st_size for entry in entries)
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    total -= entry.stat().st_size
+                    os.remove(entry.path)
+                except OSError:
+                    pass
@@ -0,0 +1,143 @@
+import os
+import logging
+from datetime import date
+from typing import Dict, List, Optional
+from PIL import Image, ImageDraw, ImageFont
+from ..models.weather_data import WeatherData
+from .formatting import format_time, format_date, weather_texts
+from .layout import STALE_COLOR, TEXT_STYLES, TREND_HEIGHT, TREND_WIDTH, WEATHER_SLOTS, compute_layout
+from .sinks import Sink
+from .sparkline import TREND_SERIES, sparkline_points
+
+# Tried in order when HEADLESS_FONT is not set; Nanum covers Korean
+FONT_CANDIDATES = (
+    '/usr/share/fonts/truetype/nanum/NanumGothic.ttf',
+    '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
+
+# Pillow anchors for the Tk anchor names used by the layout
+PIL_ANCHORS = {'n': 'mt', 's': 'md', 'center': 'mm'}
+
+
+def load_font(font_path: Optional[str], size: int) -> ImageFont.FreeTypeFont:
+    for path in ((font_path,) if font_path else FONT_CANDIDATES):
+        if path and os.path.exists(path):
+            return ImageFont.truetype(path, size)
+    logging.warning("No TrueType font found, using Pillow's default font")
+    return ImageFont.load_default(size)
+
+
+class ImageDashboard:
+    """Renders the WeatherWidgets layout into a Pillow image instead of Tk.
+
+    Used by the headless mode: every frame is written to a Sink (framebuffer,
+    PNG file, ...). Exposes the same update_time()/update_weather() interface
+    as WeatherWidgets and only re-renders when a displayed value changed.
+    Font sizes are scaled from the 1080p design to the output height.
+    """
+
+    def __init__(self, sink: Sink, language: str = 'en', icon_px: Optional[int] = None,
+                 font_path: Optional[str] = None, show_city: bool = False, show_trends: bool = False):
+        self.sink = sink
+        self.language = language
+        self.width, self.height = sink.size
+        scale = self.height / 1080
+        self.scale = scale
+        self.icon_px = icon_px or max(32, round(200 * scale))
+        self.fonts = {slot: load_font(font_path, max(8, round(size * scale))) for slot, (size, _) in TEXT_STYLES.items()}
+        self.layout = compute_layout(
+            self.width, self.height, self.icon_px,
+            measure=lambda slot, text: self.fonts[slot].getlength(text),
+            linespace=lambda slot: sum(self.fonts[slot].getmetrics()),
+            scale=scale,
+            show_city=show_city,
+            show_trends=show_trends,
+        )
+        self._trends: Dict[str, List[float]] = {}
+        self._stale = False
+        self._texts: Dict[str, str] = {}
+        self._icon: Optional[Image.Image] = None
+        self._icon_key: Optional[str] = None
+        self._weather_data: Optional[WeatherData] = None
+        self._background: Optional[Image.Image] = None
+        self._date: Optional[date] = None
+        self.frames_rendered = 0
+
+    def update_time(self, now):
+        changed = self._set_text('time', format_time(now))
+        if now.date() != self._date:
+            self._date = now.date()
+            changed |= self._set_text('date', format_date(now, self.language))
+        if changed:
+            self.render()
+
+    def update_weather(self, weather_data: WeatherData, icon_key: Optional[str] = None,
+                       icon_image: Optional[Image.Image] = None):
+        changed = False
+        # Only the slots whose fields changed since the last snapshot are formatted
+        changes = weather_data.diff(self._weather_data)
+        self._weather_data = weather_data
+        for slot, text in weather_texts(weather_data, self.language, changes).items():
+            changed |= self._set_text(slot, text)
+        if icon_key is not None and icon_key != self._icon_key and icon_image is not None:
+            self._icon_key = icon_key
+            self._icon = icon_image
+            changed = True
+        if changed:
+            self.render()
+
+    def update_background(self, image: Image.Image):
+        if image.size != (self.width, self.height):
+            image = image.resize((self.width, self.height), Image.BILINEAR)
+        self._background = image.convert('RGB')
+        self.render()
+
+    def set_stale(self, stale: bool):
+        if stale != self._stale:
+            self._stale = stale
+            self.render()
+
+    def update_trends(self, series: Dict[str, List[float]]):
+        if series != self._trends:
+            self._trends = series
+            self.render()
+
+    def render(self) -> Image.Image:
+        if self._background is not None:
+            image = self._background.copy()
+        else:
+            image = Image.new('RGB', (self.width, self.height), 'black')
+        draw = ImageDraw.Draw(image)
+        for slot, (_, color) in TEXT_STYLES.items():
+            text = self._texts.get(slot)
+            if not text or slot not in self.layout:
+                continue
+            x, y, anchor = self.layout[slot]
+            if self._stale and slot in WEATHER_SLOTS:
+                color = STALE_COLOR
+            draw.text((x, y), text, fill=color, font=self.fonts[slot], anchor=PIL_ANCHORS[anchor])
+        if self._icon is not None:
+            icon = self._icon
+            if icon.size != (self.icon_px, self.icon_px):
+                icon = icon.resize((self.icon_px, self.icon_px), Image.LANCZOS)
+            x, y, _ = self.layout['icon']
+            image.paste(icon, (round(x - self.icon_px / 2), round(y - self.icon_px / 2)), icon if icon.mode == 'RGBA' else None)
+        for field, color in TREND_SERIES:
+            slot = f'trend_{field}'
+            if slot not in self.layout:
+                continue
+            x, y, _ = self.layout[slot]
+            line_width = max(1, round(3 * self.scale))
+            points = sparkline_points(self._trends.get(field, []), x, y, TREND_WIDTH * self.scale,
+                                      TREND_HEIGHT * self.scale, line_width)
+            if points:
+                draw.line(points, fill=color, width=line_width, joint='curve')
+        self.sink.write(image)
+        self.frames_rendered += 1
+        return image
+
+    def _set_text(self, slot: str, text: str) -> bool:
+        if self._texts.get(slot) == text:
+            return False
+        self._texts[slot] = text
+        return True
@@ -0,0 +1,103 @@
+from typing import Callable, Dict, Tuple
+
+# (font size, colour) of every text slot; matches WeatherWidgets
+TEXT_STYLES = {
+    'city': (48, '#aaaaaa'),  # multi-city mode only
+    'date': (72, 'white'),
+    'time': (96, 'white'),
+    'temp': (120, 'white'),
+    'desc': (60, 'white'),
+    'air_quality': (60, 'white'),
+    'temp_min': (96, '#00bfff'),
+    'temp_max': (96, '#ff4d4d'),
+    'rain': (72, '#4a90e2'),
+    'snow': (72, '#ffffff'),
+}
+
+# Weather slots are drawn in STALE_COLOR while showing the saved snapshot at startup
+WEATHER_SLOTS = ('city', 'temp', 'desc', 'air_quality', 'temp_min', 'temp_max', 'rain', 'snow')
+STALE_COLOR = '#777777'
+
+# Widest text each fixed-width slot is expected to hold
+SLOT_SAMPLES = {
+    'temp': "-88°C",
+    'temp_min': "↓-88°",
+    'temp_max': "↑-88°",
+    'rain': "🌧️ 88.8㎜/h",
+    'snow': "🌨️ 88.8㎜/h",
+}
+INFO_SAMPLES = {
+    'desc': "light intensity drizzle",
+    'air_quality': "Air Quality: Very Poor",
+}
+
+BLOCK_PAD = 40  # pack(pady=20) between stacked blocks
+ITEM_PAD = 40  # pack(padx=20) between items of a row
+TREND_WIDTH = 480  # each 24 h sparkline of the optional trend row
+TREND_HEIGHT = 100
+
+# slot -> (x, y, anchor) with Tk anchor names ('n', 's', 'center')
+Layout = Dict[str, Tuple[float, float, str]]
+
+
+def compute_layout(width: int, height: int, icon_px: int,
+                   measure: Callable[[str, str], float],
+                   linespace: Callable[[str], float], scale: float = 1.0,
+                   show_city: bool = False, show_trends: bool = False) -> Layout:
+    """Fixed slot positions of the dashboard, centred on a width x height screen.
+
+    measure(slot, text) and linespace(slot) come from whichever font backend
+    the renderer uses, so Tk and Pillow renderers share one layout. The
+    'city' slot only gets a position when show_city is set, the 'trend_*'
+    sparkline boxes (top-left corner, 'nw') only when show_trends is set.
+    """
+    block_pad = BLOCK_PAD * scale
+    item_pad = ITEM_PAD * scale
+    line = {slot: linespace(slot) for slot in TEXT_STYLES}
+    slot_width = {slot: measure(slot, sample) for slot, sample in SLOT_SAMPLES.items()}
+    info_width = max(measure(slot, sample) for slot, sample in INFO_SAMPLES.items())
+
+    weather_row_height = max(line['temp'], icon_px, line['desc'] + line['air_quality'] + block_pad / 2)
+    range_row_height = max(line['temp_min'], line['rain'])
+    total_height = line['date'] + line['time'] + weather_row_height + range_row_height + 3 * block_pad
+    if show_city:
+        total_height += line['city'] + block_pad / 2
+    if show_trends:
+        total_height += TREND_HEIGHT * scale + block_pad
+    y = (height - total_height) / 2
+    cx = width / 2
+
+    layout = {}
+    if show_city:
+        layout['city'] = (cx, y, 'n')
+        y += line['city'] + block_pad / 2
+    layout['date'] = (cx, y, 'n')
+    y += line['date'] + block_pad
+    layout['time'] = (cx, y, 'n')
+    y += line['time'] + block_pad
+
+    mid = y + weather_row_height / 2
+    row_width = slot_width['temp'] + icon_px + info_width + 2 * item_pad
+    x = cx - row_width / 2
+    layout['temp'] = (x + slot_width['temp'] / 2, mid, 'center')
+    x += slot_width['temp'] + item_pad
+    layout['icon'] = (x + icon_px / 2, mid, 'center')
+    x += icon_px + item_pad
+    layout['desc'] = (x + info_width / 2, mid - block_pad / 4, 's')
+    layout['air_quality'] = (x + info_width / 2, mid + block_pad / 4, 'n')
+    y += weather_row_height + block_pad
+
+    mid = y + range_row_height / 2
+    row_slots = ('temp_min', 'temp_max', 'rain', 'snow')
+    row_width = sum(slot_width[slot] for slot in row_slots) + (len(row_slots) - 1) * item_pad
+    x = cx - row_width / 2
+    for slot in row_slots:
+        layout[slot] = (x + slot_width[slot] / 2, mid, 'center')
+        x += slot_width[slot] + item_pad
+
+    if show_trends:
+        y += range_row_height + block_pad
+        x = cx - (2 * TREND_WIDTH * scale + item_pad) / 2
+        layout['trend_temperature'] = (x, y, 'nw')
+        layout['trend_air_quality'] = (x + TREND_WIDTH * scale + item_pad, y, 'nw')
+    return layout
@@ -0,0 +1,55 @@
+from typing import Dict, Hashable, Optional
+from PIL import Image, ImageTk
+from ..core.lru import LRUCache
+
+# Tk keeps a decoded RGBA copy of every image until it is deleted
+TK_ICON_BYTES = 4 * 1024 * 1024
+
+
+def _photo_bytes(photo: ImageTk.PhotoImage) -> int:
+    return photo.width() * photo.height() * 4
+
+
+def release_photo(photo: ImageTk.PhotoImage):
+    """Delete the Tk image now rather than whenever the PhotoImage is collected."""
+    # PIL's finalizer deletes the Tk image and forgets its name, so a later call is a no-op
+    photo.__del__()
+
+
+class PhotoCache:
+    """PhotoImages keyed by IconStore key, within a memory budget.
+
+    Evicted images are deleted from Tk right away, unless they are on
+    screen; those are deleted as soon as show() replaces them. Must only be
+    used from the Tk thread.
+    """
+
+    def __init__(self, max_bytes: int = TK_ICON_BYTES):
+        self._photos: LRUCache[ImageTk.PhotoImage] = LRUCache('tk_icons', max_bytes, _photo_bytes, self._evicted)
+        # Photo currently displayed per slot (e.g. per label)
+        self._shown: Dict[Hashable, ImageTk.PhotoImage] = {}
+
+    def get(self, icon_key: str, icon_image: Optional[Image.Image]) -> Optional[ImageTk.PhotoImage]:
+        """Cached photo for icon_key, created from icon_image on a miss (None if there is neither)."""
+        photo = self._photos.get(icon_key)
+        if photo is None and icon_image is not None:
+            photo = ImageTk.PhotoImage(icon_image)
+            self._photos.put(icon_key, photo)
+        return photo
+
+    def show(self, slot: Hashable, photo: ImageTk.PhotoImage):
+        """Record that slot now displays photo; the previous one is released if nothing else holds it."""
+        previous = self._shown.get(slot)
+        self._shown[slot] = photo
+        if previous is not None and previous is not photo:
+            self._release_unused(previous)
+
+    def _evicted(self, _icon_key: Hashable, photo: ImageTk.PhotoImage):
+        self._release_unused(photo)
+
+    def _release_unused(self, photo: ImageTk.PhotoImage):
+        if any(shown is photo for shown in self._shown.values()):
+            return
+        if any(cached is photo for _key, cached in self._photos.items()):
+            return
+        release_photo(photo)
@@ -0,0 +1,235 @@
+import os
+import io
+import math
+import time
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from PIL import Image
+from ..core.metrics import LATENCY_BUCKETS, REGISTRY
+
+TILE_SIZE = 256
+# OpenWeather's precipitation layer (same API key as the weather requests)
+OPENWEATHER_RADAR_URL = "https://tile.openweathermap.org/map/precipitation_new/{z}/{x}/{y}.png?appid={api_key}"
+# Base map tiles hardly ever change
+BASE_MAP_TTL = 30 * 24 * 3600
+TILE_CACHE_BYTES = 20 * 1024 * 1024
+
+TILE_LOOKUPS = REGISTRY.counter('raspboard_tile_lookups_total',
+                                'Map tile lookups by where they came from (disk, download, stale, failed)',
+                                ('layer', 'source'))
+COMPOSE_SECONDS = REGISTRY.histogram('raspboard_radar_compose_seconds',
+                                     'Time to fetch, stitch and scale the radar background', buckets=LATENCY_BUCKETS)
+
+
+def tile_position(lat: float, lon: float, zoom: int) -> Tuple[float, float]:
+    """Web Mercator tile coordinates (fractional) of a point at a zoom level."""
+    lat = max(-85.0511, min(85.0511, lat))
+    n = 2 ** zoom
+    x = (lon + 180.0) / 360.0 * n
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0 * n
+    return x, y
+
+
+class TileCache:
+    """Map tiles on disk, each with an expiry, within a size budget.
+
+    Tiles are stored as fetched under <cache_dir>/<layer>/<z>/<x>/<y>.png.
+    A file's modification time is when it was fetched and decides expiry;
+    its access time is set explicitly on every read (so it works on noatime
+    mounts too) and decides which tiles prune() deletes first.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = TILE_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def path(self, layer: str, z: int, x: int, y: int) -> str:
+        return os.path.join(self.cache_dir, layer, str(z), str(x), f"{y}.png")
+
+    def load(self, layer: str, z: int, x: int, y: int) -> Tuple[Optional[bytes], float]:
+        """(tile bytes, fetched at) or (None, 0) when not cached."""
+        path = self.path(layer, z, x, y)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            fetched_at = os.stat(path).st_mtime
+            os.utime(path, (time.time(), fetched_at))
+        except FileNotFoundError:
+            return None, 0.0
+        except OSError as e:
+            logging.warning(f"Could not read cached tile {path}: {e}")
+            return None, 0.0
+        return content, fetched_at
+
+    def store(self, layer: str, z: int, x: int, y: int, content: bytes) -> float:
+        """Save a freshly fetched tile; returns its fetch time."""
+        path = self.path(layer, z, x, y)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+            return os.stat(path).st_mtime
+        except OSError as e:
+            logging.warning(f"Could not store tile {path}: {e}")
+            return time.time()
+
+    def prune(self):
+        """Delete least recently used tiles until the cache fits max_bytes."""
+        tiles = []
+        for directory, _dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                tiles.append((stat.st_atime, stat.st_size, path))
+        total = sum(size for _atime, size, _path in tiles)
+        for _atime, size, path in sorted(tiles):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class RadarLayer:
+    """Precipitation radar over an optional base map, composited off the Tk thread.
+
+    render(lat, lon) fetches the tiles covering the display around the
+    coordinates (from the TileCache while they are fresh), stitches them,
+    scales them up to the display size and dims them so the readings stay
+    legible. The tiles are stitched at 1/`scale` of the display size, which
+    keeps the tile count (and downloads) low; the radar is coarse anyway.
+    After a connection error the remaining tiles of a render come from the
+    cache only, a tile that failed isn't requested again for half of
+    `radar_ttl` (the refresh interval), and the cache is pruned at most once
+    per interval. URL templates take {z}, {x}, {y} and optionally {api_key}.
+    Blocking; never call from the Tk thread.
+    """
+
+    def __init__(self, cache_dir: str, size: Tuple[int, int], radar_url: str, base_url: Optional[str] = None,
+                 zoom: int = 7, scale: int = 2, opacity: float = 0.5, radar_ttl: float = 600,
+                 api_key: Optional[str] = None, session=None):
+        self.tiles = TileCache(cache_dir)
+        self.size = size
+        self.zoom = zoom
+        self.scale = scale
+        self.opacity = opacity
+        self.api_key = api_key
+        self.session = session
+        self._timeout = (3, 5)
+        # (layer name, URL template, TTL), drawn bottom to top. The name includes
+        # the URL so switching tile servers doesn't serve the old server's tiles.
+        self.layers: List[Tuple[str, str, float]] = []
+        if base_url:
+            self.layers.append((self._layer_name('map', base_url), base_url, BASE_MAP_TTL))
+        self.layers.append((self._layer_name('radar', radar_url), radar_url, radar_ttl))
+        self.refresh_seconds = radar_ttl
+        # Tiles (and their fetch times) behind the last rendered image
+        self._rendered: Optional[Tuple] = None
+        # (layer, x, y) -> monotonic time before which the tile isn't requested again
+        self._failed: Dict[Tuple[str, int, int], float] = {}
+        self._pruned_at: Optional[float] = None
+
+    @staticmethod
+    def _layer_name(kind: str, url: str) -> str:
+        return f"{kind}-{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}"
+
+    def render(self, lat: float, lon: float) -> Optional[Image.Image]:
+        """The background for these coordinates, or None if it would equal the last one."""
+        started = time.perf_counter()
+        width, height = (math.ceil(side / self.scale) for side in self.size)
+        center_x, center_y = (value * TILE_SIZE for value in tile_position(lat, lon, self.zoom))
+        left, top = round(center_x - width / 2), round(center_y - height / 2)
+        tiles_per_side = 2 ** self.zoom
+        positions = [
+            (tile_x, tile_y)
+            for tile_y in range(max(0, top // TILE_SIZE), min(tiles_per_side, (top + height - 1) // TILE_SIZE + 1))
+            for tile_x in range(left // TILE_SIZE, (left + width - 1) // TILE_SIZE + 1)
+        ]
+
+        tiles = []
+        stored = False
+        online = True
+        for layer, url, ttl in self.layers:
+            for tile_x, tile_y in positions:
+                content, fetched_at, fetched, online = self._tile(layer, url, ttl, tile_x % tiles_per_side, tile_y,
+                                                                  online)
+                stored |= fetched
+                tiles.append((layer, tile_x, tile_y, content, fetched_at))
+        now = time.monotonic()
+        if stored and (self._pruned_at is None or now - self._pruned_at >= self.refresh_seconds):
+            self.tiles.prune()
+            self._pruned_at = now
+
+        signature = (left, top, tuple((layer, x, y, fetched_at) for layer, x, y, _content, fetched_at in tiles))
+        if signature == self._rendered:
+            return None
+
+        stitched = Image.new('RGBA', (width, height), (0, 0, 0, 255))
+        for layer, _url, _ttl in self.layers:
+            layer_image = Image.new('RGBA', (width, height))
+            for tile_layer, tile_x, tile_y, content, _fetched_at in tiles:
+                if tile_layer != layer or content is None:
+                    continue
+                try:
+                    with Image.open(io.BytesIO(content)) as tile_image:
+                        tile = tile_image.convert('RGBA')
+                    layer_image.paste(tile, (tile_x * TILE_SIZE - left, tile_y * TILE_SIZE - top))
+                except (OSError, ValueError) as e:
+                    logging.warning(f"Skipping undecodable tile {tile_x}/{tile_y}: {e}")
+            stitched.alpha_composite(layer_image)
+        background = stitched.convert('RGB').resize(self.size, Image.BILINEAR)
+        background = Image.blend(Image.new('RGB', self.size, 'black'), background, self.opacity)
+        self._rendered = signature
+        COMPOSE_SECONDS.observe(time.perf_counter() - started)
+        return background
+
+    def _tile(self, layer: str, url: str, ttl: float, x: int, y: int,
+              online: bool) -> Tuple[Optional[bytes], float, bool, bool]:
+        """(content, fetched at, downloaded now, online) of one tile; an expired tile stands in if it can't be fetched.
+
+        online=False (a connection error earlier in this render) skips the
+        download; the returned flag turns False on a connection error.
+        """
+        kind = layer.split('-', 1)[0]
+        content, fetched_at = self.tiles.load(layer, self.zoom, x, y)
+        if content is not None and time.time() - fetched_at < ttl:
+            TILE_LOOKUPS.labels(kind, 'disk').inc()
+            return content, fetched_at, False, online
+        downloaded = None
+        if online and time.monotonic() >= self._failed.get((layer, x, y), 0.0):
+            try:
+                downloaded = self._fetch_bytes(url.format(z=self.zoom, x=x, y=y, api_key=self.api_key or ''))
+            except OSError as e:
+                # Includes requests' connection errors and timeouts: the other tiles would fail too
+                logging.warning(f"Error fetching {kind} tile {self.zoom}/{x}/{y}, using cached tiles only: {e}")
+                online = False
+            except Exception as e:
+                logging.warning(f"Error fetching {kind} tile {self.zoom}/{x}/{y}: {e}")
+            if downloaded is None:
+                self._failed[(layer, x, y)] = time.monotonic() + self.refresh_seconds / 2
+        if downloaded is None:
+            TILE_LOOKUPS.labels(kind, 'stale' if content is not None else 'failed').inc()
+            return content, fetched_at, False, online
+        self._failed.pop((layer, x, y), None)
+        TILE_LOOKUPS.labels(kind, 'download').inc()
+        return downloaded, self.tiles.store(layer, self.zoom, x, y, downloaded), True, online
+
+    def _fetch_bytes(self, url: str) -> Optional[bytes]:
+        if self.session is None:
+            import urllib.request
+            with urllib.request.urlopen(url, timeout=sum(self._timeout)) as response:
+                return response.read()
+        response = self.session.get(url, timeout=self._timeout)
+        if response.status_code != 200:
+            logging.warning(f"Failed to fetch map tile. Status code: {response.status_code}")
+            return None
+        return response.content
@@ -0,0 +1,72 @@
+import os
+import logging
+from typing import Tuple
+from PIL import Image, ImageChops
+
+
+class Sink:
+    """Destination for frames rendered by ImageDashboard."""
+
+    size: Tuple[int, int]
+
+    def write(self, image: Image.Image):
+        raise NotImplementedError
+
+
+class PNGSink(Sink):
+    """Writes every frame to a PNG file (atomically, so viewers never see half a frame)."""
+
+    def __init__(self, path: str, size: Tuple[int, int] = (1920, 1080)):
+        self.path = path
+        self.size = size
+
+    def write(self, image: Image.Image):
+        tmp_path = f"{self.path}.tmp"
+        image.save(tmp_path, format='PNG')
+        os.replace(tmp_path, self.path)
+
+
+class FramebufferSink(Sink):
+    """Writes frames straight to a Linux framebuffer device such as /dev/fb0."""
+
+    def __init__(self, device: str = '/dev/fb0'):
+        self.device = device
+        sysfs = os.path.join('/sys/class/graphics', os.path.basename(device))
+        width, height = self._read_sysfs(sysfs, 'virtual_size').split(',')
+        self.size = (int(width), int(height))
+        self.bits_per_pixel = int(self._read_sysfs(sysfs, 'bits_per_pixel'))
+        try:
+            self.stride = int(self._read_sysfs(sysfs, 'stride'))
+        except OSError:
+            self.stride = self.size[0] * self.bits_per_pixel // 8
+        logging.info(f"Framebuffer {device}: {self.size[0]}x{self.size[1]}, {self.bits_per_pixel} bpp")
+
+    @staticmethod
+    def _read_sysfs(sysfs: str, name: str) -> str:
+        with open(os.path.join(sysfs, name)) as f:
+            return f.read().strip()
+
+    def write(self, image: Image.Image):
+        data = self.to_bytes(image.convert('RGB'))
+        row_bytes = self.size[0] * self.bits_per_pixel // 8
+        with open(self.device, 'r+b', buffering=0) as fb:
+            if self.stride == row_bytes:
+                fb.write(data)
+                return
+            # Rows are padded on some drivers
+            for row in range(self.size[1]):
+                fb.seek(row * self.stride)
+                fb.write(data[row * row_bytes:(row + 1) * row_bytes])
+
+    def to_bytes(self, image: Image.Image) -> bytes:
+        if self.bits_per_pixel == 32:
+            return image.tobytes('raw', 'BGRX')
+        if self.bits_per_pixel == 24:
+            return image.tobytes('raw', 'BGR')
+        if self.bits_per_pixel == 16:
+            # RGB565 little-endian; channels never overlap so add() acts as a bitwise or
+            r, g, b = image.split()
+            high = ImageChops.add(r.point(lambda v: v & 0xF8), g.point(lambda v: v >> 5))
+            low = ImageChops.add(g.point(lambda v: (v & 0x1C) << 3), b.point(lambda v: v >> 3))
+            return Image.merge('LA', (low, high)).tobytes()
+        raise ValueError(f"Unsupported framebuffer depth: {self.bits_per_pixel} bpp")
@@ -0,0 +1,38 @@
+from typing import List, Sequence
+
+# (history field, colour) of each trend sparkline, drawn side by side
+TREND_SERIES = (
+    ('temperature', '#ff9f43'),
+    ('air_quality', '#7bed9f'),
+)
+TREND_HOURS = 24
+
+
+def sparkline_points(values: Sequence[float], x: float, y: float, width: float, height: float,
+                     line_width: float = 3) -> List[float]:
+    """Flat [x0, y0, x1, y1, ...] polyline of values scaled into the given box.
+
+    Series longer than the box is wide are averaged down to about one point
+    per two pixels, so drawing cost doesn't grow with the amount of history.
+    Fewer than two values give an empty list (nothing to draw).
+    """
+    max_points = max(2, int(width // 2))
+    if len(values) > max_points:
+        bucket = len(values) / max_points
+        values = [
+            sum(values[int(i * bucket):int((i + 1) * bucket)]) / (int((i + 1) * bucket) - int(i * bucket))
+            for i in range(max_points)
+        ]
+    if len(values) < 2:
+        return []
+    low, high = min(values), max(values)
+    span = high - low
+    # Keep the stroke inside the box
+    top, usable = y + line_width / 2, height - line_width
+    step = width / (len(values) - 1)
+    points = []
+    for index, value in enumerate(values):
+        level = (value - low) / span if span else 0.5
+        points.append(x + index * step)
+        points.append(top + usable * (1 - level))
+    return points
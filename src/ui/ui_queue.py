@@ -0,0 +1,102 @@
+import os
+import time
+import logging
+import threading
+import tkinter as tk
+from collections import deque
+from typing import Callable, Deque, Optional, Tuple
+from ..core.delay_stats import DelayStats
+
+# Used only where Tk file handlers are unavailable (e.g. Windows)
+FALLBACK_POLL_MS = 100
+
+
+class UIQueue:
+    """Thread-safe hand-off of callables from worker threads to the Tk thread.
+
+    Instead of polling, put() writes a byte to a self-pipe that is registered
+    as a Tk file handler, so the event loop only wakes when there is work.
+    At most one wakeup byte is outstanding no matter how many tasks are queued.
+    The delay between put() and execution is measured for every task.
+    """
+
+    def __init__(self, root: tk.Misc, warn_delay: float = 0.25):
+        self.root = root
+        self._tasks: Deque[Tuple[float, Callable[[], None]]] = deque()
+        self._lock = threading.Lock()
+        self._signalled = False
+        self._closed = False
+        self.stats = DelayStats(warn_delay)
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        os.set_blocking(self._write_fd, False)
+        try:
+            self.root.tk.createfilehandler(self._read_fd, tk.READABLE, self._on_readable)
+            self._polling = False
+        except (AttributeError, tk.TclError):
+            logging.info("Tk file handlers unavailable, falling back to polling the UI queue")
+            self._polling = True
+            self.root.after(FALLBACK_POLL_MS, self._poll)
+
+    def put(self, task: Callable[[], None]):
+        """Queue task to run on the Tk thread. Safe to call from any thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._tasks.append((time.monotonic(), task))
+            if self._signalled or self._polling:
+                return
+            self._signalled = True
+            # Under the lock, so close() can't close (and the OS reuse) the fd in between
+            try:
+                os.write(self._write_fd, b'\0')
+            except BlockingIOError:
+                pass  # The pipe is already full of wakeups
+
+    def waiting_since(self) -> Optional[float]:
+        """When the oldest queued task was put(), or None when the queue is empty."""
+        with self._lock:
+            return self._tasks[0][0] if self._tasks else None
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._tasks.clear()
+            os.close(self._write_fd)
+        if not self._polling:
+            try:
+                self.root.tk.deletefilehandler(self._read_fd)
+            except (AttributeError, tk.TclError):
+                pass
+        os.close(self._read_fd)
+
+    def _on_readable(self, _fd, _mask):
+        with self._lock:
+            try:
+                os.read(self._read_fd, 512)
+            except BlockingIOError:
+                pass
+            # Clear the flag before draining: a put() racing with the drain
+            # below either gets drained now or writes a fresh wakeup byte.
+            self._signalled = False
+        self._drain()
+
+    def _poll(self):
+        self._drain()
+        if not self._closed:
+            self.root.after(FALLBACK_POLL_MS, self._poll)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                if not self._tasks:
+                    return
+                enqueued_at, task = self._tasks.popleft()
+            delay = time.monotonic() - enqueued_at
+            self.stats.record(delay)
+            try:
+                task()
+            except Exception as e:
+                logging.error(f"Error processing UI task: {str(e)}", exc_info=True)
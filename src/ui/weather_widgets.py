@@ -1,18 +1,26 @@
 import tkinter as tk
-from PIL import Image, ImageTk
-import requests
-import io
-import logging
-from typing import Dict, Optional
+from PIL import Image
+from datetime import date
+from typing import Dict, List, Optional
 from ..models.weather_data import WeatherData
+from .formatting import format_time, format_date, get_air_quality_text, weather_texts
+from .layout import ITEM_PAD, STALE_COLOR, TEXT_STYLES, TREND_HEIGHT, TREND_WIDTH, WEATHER_SLOTS
+from .photo_cache import PhotoCache
+from .sparkline import TREND_SERIES, sparkline_points
 
 class WeatherWidgets:
-    def __init__(self, parent: tk.Frame, language: str = 'en', session: Optional[requests.Session] = None):
+    def __init__(self, parent: tk.Frame, language: str = 'en', show_city: bool = False,
+                 show_trends: bool = False):
         self.parent = parent
         self.language = language
-        self.session = session or requests.Session()
-        self._icon_cache: Dict[str, ImageTk.PhotoImage] = {}
-        self._timeout = (3, 5)
+        self.show_city = show_city
+        self.show_trends = show_trends
+        # PhotoImages keyed by IconStore key; decoding happens on worker threads
+        self._icon_cache = PhotoCache()
+        self._time_str: Optional[str] = None
+        self._date: Optional[date] = None
+        self._weather_data: Optional[WeatherData] = None
+        self._icon_key: Optional[str] = None
         self.setup_widgets()
 
     def setup_widgets(self):
@@ -23,8 +31,20 @@ class WeatherWidgets:
         self.create_time_widgets()
         self.create_weather_widgets()
         self.create_temperature_range_widgets()
+        self.create_trend_widgets()
 
     def create_time_widgets(self):
+        # City label, only when rotating through several cities
+        self.city_label = None
+        if self.show_city:
+            self.city_label = tk.Label(
+                self.container_frame,
+                font=('Helvetica', 48),
+                foreground='#aaaaaa',
+                bg='black'
+            )
+            self.city_label.pack(pady=10)
+
         # Date label
         self.date_label = tk.Label(
             self.container_frame,
@@ -131,84 +151,86 @@ class WeatherWidgets:
         )
         self.snow_label.pack(side='left', padx=10)
 
+    def create_trend_widgets(self):
+        # 24 h sparklines, only when SHOW_TRENDS is set
+        self.trend_canvas = None
+        self.trend_lines: Dict[str, int] = {}
+        if not self.show_trends:
+            return
+        self.trend_canvas = tk.Canvas(
+            self.container_frame,
+            width=len(TREND_SERIES) * TREND_WIDTH + (len(TREND_SERIES) - 1) * ITEM_PAD,
+            height=TREND_HEIGHT,
+            bg='black',
+            highlightthickness=0
+        )
+        self.trend_canvas.pack(pady=20)
+        for field, color in TREND_SERIES:
+            self.trend_lines[field] = self.trend_canvas.create_line(0, 0, 0, 0, fill=color, width=3, state='hidden')
+
     def update_time(self, now):
-        time_str = now.strftime("%I:%M %p")
-        
-        if self.language == 'kr':
-            weekday_names = ['월', '화', '수', '목', '금', '토', '일']
-            date_str = now.strftime("%Y년 %m월 %d일 ") + weekday_names[now.weekday()]
-        else:
-            weekday_names = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-            date_str = now.strftime("%B %d, %Y ") + weekday_names[now.weekday()]
-        
-        self.time_label.config(text=time_str)
-        self.date_label.config(text=date_str)
-
-    def update_weather(self, weather_data: WeatherData):
-        # Update current weather
-        self.temp_label.config(text=f"{round(weather_data.current.temperature)}°C")
-        self.desc_label.config(text=weather_data.current.weather.description)
-        self.update_weather_icon(weather_data.current.weather.icon, self.icon_label, size='4x')
-
-        # Update air quality
-        aqi_text = self.get_air_quality_text(weather_data.current.air_quality)
-        aqi_label = "대기질" if self.language == 'kr' else "Air Quality"
-        self.air_quality_label.config(text=f"{aqi_label}: {aqi_text}")
-
-        # Update precipitation amounts (same format for both languages)
-        rain = weather_data.current.rain_amount
-        snow = weather_data.current.snow_amount
-        self.rain_label.config(text=f"🌧️ {rain:.1f}㎜/h" if rain > 0 else "")
-        self.snow_label.config(text=f"🌨️ {snow:.1f}㎜/h" if snow > 0 else "")
-
-        # Update temperature range for the first day of forecast
-        if weather_data.forecast:
-            first_day = weather_data.forecast[0]
-            self.temp_min_label.config(text=f"↓{round(first_day.temp_min)}°")
-            self.temp_max_label.config(text=f"↑{round(first_day.temp_max)}°")
-
-    def update_weather_icon(self, icon_code: str, label: tk.Label, size: str = '2x'):
-        cache_key = f"{icon_code}@{size}"
-        if cache_key in self._icon_cache:
-            icon_photo = self._icon_cache[cache_key]
-            label.config(image=icon_photo)
-            label.image = icon_photo
+        # Reconfiguring the big labels forces a redraw, so only touch what changed
+        time_str = format_time(now)
+        if time_str != self._time_str:
+            self._time_str = time_str
+            self.time_label.config(text=time_str)
+
+        if now.date() == self._date:
             return
+        self._date = now.date()
+        self.date_label.config(text=format_date(now, self.language))
+
+    def update_weather(self, weather_data: WeatherData, icon_key: Optional[str] = None,
+                       icon_image: Optional[Image.Image] = None):
+        # Reconfigure only the labels whose fields changed since the last snapshot
+        changes = weather_data.diff(self._weather_data)
+        self._weather_data = weather_data
+        labels = self.weather_labels()
+        for slot, text in weather_texts(weather_data, self.language, changes).items():
+            if labels[slot] is not None:
+                labels[slot].config(text=text)
+        if icon_key is not None and icon_key != self._icon_key:
+            self.update_weather_icon(icon_key, icon_image, self.icon_label)
+
+    def weather_labels(self) -> Dict[str, Optional[tk.Label]]:
+        """Weather text labels keyed by slot; city is None unless cities rotate."""
+        return {
+            'city': self.city_label, 'temp': self.temp_label, 'desc': self.desc_label,
+            'air_quality': self.air_quality_label, 'temp_min': self.temp_min_label,
+            'temp_max': self.temp_max_label, 'rain': self.rain_label, 'snow': self.snow_label,
+        }
+
+    def set_stale(self, stale: bool):
+        # Dim the weather labels while they show the snapshot from the last run
+        labels = self.weather_labels()
+        for slot in WEATHER_SLOTS:
+            if labels[slot] is not None:
+                labels[slot].config(foreground=STALE_COLOR if stale else TEXT_STYLES[slot][1])
+
+    def update_trends(self, series: Dict[str, List[float]]):
+        # Moves the existing line items; the canvas keeps its size, so no relayout
+        for index, (field, _) in enumerate(TREND_SERIES):
+            if field not in self.trend_lines:
+                continue
+            x = index * (TREND_WIDTH + ITEM_PAD)
+            points = sparkline_points(series.get(field, []), x, 0, TREND_WIDTH, TREND_HEIGHT)
+            line = self.trend_lines[field]
+            if points:
+                self.trend_canvas.coords(line, *points)
+                self.trend_canvas.itemconfigure(line, state='normal')
+            else:
+                self.trend_canvas.itemconfigure(line, state='hidden')
 
-        icon_url = f"https://openweathermap.org/img/wn/{icon_code}@{size}.png"
-        try:
-            icon_response = self.session.get(icon_url, timeout=self._timeout)
-            if icon_response.status_code != 200:
-                logging.warning(f"Failed to fetch weather icon. Status code: {icon_response.status_code}")
-                return
-            icon_image = Image.open(io.BytesIO(icon_response.content))
-            icon_photo = ImageTk.PhotoImage(icon_image)
-            self._icon_cache[cache_key] = icon_photo
-            label.config(image=icon_photo)
-            label.image = icon_photo  # Keep a reference
-        except requests.RequestException as e:
-            logging.warning(f"Error fetching icon: {e}")
+    def update_weather_icon(self, icon_key: str, icon_image: Optional[Image.Image], label: tk.Label):
+        # Only wraps an already decoded image; must not do any I/O on the Tk thread.
+        icon_photo = self._icon_cache.get(icon_key, icon_image)
+        if icon_photo is None:
+            return
+        label.config(image=icon_photo)
+        label.image = icon_photo  # Keep a reference
+        self._icon_cache.show(str(label), icon_photo)
+        if label is self.icon_label:
+            self._icon_key = icon_key
 
     def get_air_quality_text(self, aqi: int) -> str:
-        if self.language == 'kr':
-            if aqi == 1:
-                return "좋음"
-            elif aqi == 2:
-                return "보통"
-            elif aqi == 3:
-                return "나쁨"
-            elif aqi == 4:
-                return "매우 나쁨"
-            else:
-                return "위험"
-        else:
-            if aqi == 1:
-                return "Good"
-            elif aqi == 2:
-                return "Fair"
-            elif aqi == 3:
-                return "Poor"
-            elif aqi == 4:
-                return "Very Poor"
-            else:
-                return "Hazardous" 
\ No newline at end of file
+        return get_air_quality_text(aqi, self.language)
@@ -6,8 +6,13 @@ SCRIPT_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" && pwd )"
 # Change to the script directory
 cd "$SCRIPT_DIR"
 
-# Redirect all output to a log so autostart failures are diagnosable
-exec >> "$SCRIPT_DIR/autostart.log" 2>&1
+# Redirect all output to a log so autostart failures are diagnosable.
+# Keep one previous generation so the log can't grow without bound.
+AUTOSTART_LOG="$SCRIPT_DIR/autostart.log"
+if [ -f "$AUTOSTART_LOG" ] && [ "$(stat -c %s "$AUTOSTART_LOG")" -gt 262144 ]; then
+    mv -f "$AUTOSTART_LOG" "$AUTOSTART_LOG.1"
+fi
+exec >> "$AUTOSTART_LOG" 2>&1
 echo "=== $(date) autostart start ==="
 
 # Create the virtual environment and install packages only once.
@@ -30,6 +35,13 @@ if [ ! -f ".env" ]; then
     exit 1
 fi
 
+# Headless mode renders straight to the framebuffer (or a PNG) with no X
+# session, so there is no display to wait for.
+if grep -q '^HEADLESS=1' .env; then
+    python -m src.headless
+    exit $?
+fi
+
 # Wait for the X display to be ready instead of a fixed sleep.
 # A fixed delay races with the desktop on slow boots and the app crashes
 # with "couldn't connect to display".
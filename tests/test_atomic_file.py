@@ -0,0 +1,59 @@
+import json
+import os
+import threading
+import pytest
+from src.core.atomic_file import atomic_write
+from src.models.snapshot_store import SnapshotStore
+from tests.test_weather_data import weather
+
+
+def test_replaces_file_and_leaves_no_temporary(tmp_path):
+    path = str(tmp_path / 'data.json')
+    with atomic_write(path, encoding='utf-8') as f:
+        json.dump({'a': 1}, f)
+    with atomic_write(path, encoding='utf-8') as f:
+        json.dump({'a': 2}, f)
+    assert json.loads((tmp_path / 'data.json').read_text()) == {'a': 2}
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_failed_write_keeps_previous_content(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text('old')
+    with pytest.raises(RuntimeError):
+        with atomic_write(str(path)) as f:
+            f.write('half')
+            raise RuntimeError("crash mid-write")
+    assert path.read_text() == 'old'
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_concurrent_writers_never_leave_a_torn_file(tmp_path):
+    path = str(tmp_path / 'data.json')
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(50):
+                with atomic_write(path, encoding='utf-8') as f:
+                    json.dump({'writer': n, 'payload': 'x' * 10000, 'i': i}, f)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['i'] == 49
+    assert os.listdir(tmp_path) == ['data.json']
+
+
+def test_snapshot_store_round_trip(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'last_weather.json'))
+    store.save(weather())
+    data, saved_at = store.load()
+    assert not data.diff(weather())
+    assert saved_at > 0
@@ -0,0 +1,115 @@
+import socket
+import threading
+import pytest
+from src.api import connection as connection_module
+from src.api.connection import DNSCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeResolver:
+    """Stands in for getaddrinfo; `addresses` is what the next lookup returns, `down` makes it fail."""
+
+    def __init__(self, addresses):
+        self.addresses = addresses
+        self.down = False
+        self.lookups = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self, host, port, family=0, type=0, *args):
+        self.lookups += 1
+        self.release.wait(5)
+        if self.down:
+            raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (address, port)) for address in self.addresses]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(connection_module.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    resolver = FakeResolver(['10.0.0.1', '10.0.0.2'])
+    monkeypatch.setattr(connection_module.socket, 'getaddrinfo', resolver)
+    return resolver
+
+
+def join_refreshes():
+    for thread in threading.enumerate():
+        if thread.name == "dns-refresh":
+            thread.join(5)
+
+
+def test_fresh_entry_is_served_from_memory(clock, resolver):
+    cache = DNSCache(ttl=300)
+    assert cache.resolve('api.example', 443) == ['10.0.0.1', '10.0.0.2']
+    clock.now += 299
+    assert cache.resolve('api.example', 443) == ['10.0.0.1', '10.0.0.2']
+    assert resolver.lookups == 1
+
+
+def test_expired_entry_is_served_while_it_is_refreshed(clock, resolver):
+    cache = DNSCache(ttl=300, stale_for=3600)
+    cache.resolve('api.example', 443)
+    clock.now += 301
+    resolver.addresses = ['10.0.0.3']
+    resolver.release.clear()
+    # Answered from the stale entry without waiting on the (blocked) resolver
+    assert cache.resolve('api.example', 443) == ['10.0.0.1', '10.0.0.2']
+    assert cache.resolve('api.example', 443) == ['10.0.0.1', '10.0.0.2']
+    resolver.release.set()
+    join_refreshes()
+    assert resolver.lookups == 2
+    assert cache.resolve('api.example', 443) == ['10.0.0.3']
+
+
+def test_resolver_outage_keeps_the_stale_entry_until_stale_for(clock, resolver):
+    cache = DNSCache(ttl=300, stale_for=3600)
+    cache.resolve('api.example', 443)
+    resolver.down = True
+    clock.now += 1000
+    assert cache.resolve('api.example', 443) == ['10.0.0.1', '10.0.0.2']
+    join_refreshes()
+    clock.now += 3000
+    with pytest.raises(socket.gaierror):
+        cache.resolve('api.example', 443)
+
+
+def test_unknown_host_failure_is_raised(clock, resolver):
+    resolver.down = True
+    with pytest.raises(socket.gaierror):
+        DNSCache().resolve('api.example', 443)
+
+
+def test_demoted_address_moves_to_the_back_and_stays_there(clock, resolver):
+    cache = DNSCache(ttl=300)
+    cache.resolve('api.example', 443)
+    cache.demote('api.example', 443, '10.0.0.1')
+    assert cache.resolve('api.example', 443) == ['10.0.0.2', '10.0.0.1']
+    # A refresh keeps the learned order
+    clock.now += 301
+    cache.resolve('api.example', 443)
+    join_refreshes()
+    assert cache.resolve('api.example', 443) == ['10.0.0.2', '10.0.0.1']
+
+
+def test_expire_revalidates_on_next_use(clock, resolver):
+    cache = DNSCache(ttl=300)
+    cache.resolve('api.example', 443)
+    cache.expire('api.example')
+    resolver.addresses = ['10.0.0.3']
+    assert cache.resolve('api.example', 443) == ['10.0.0.1', '10.0.0.2']
+    join_refreshes()
+    assert cache.resolve('api.example', 443) == ['10.0.0.3']
+    assert resolver.lookups == 2
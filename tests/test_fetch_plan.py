@@ -0,0 +1,125 @@
+import copy
+import os
+import threading
+import time
+import pytest
+from src.api.fetch_plan import FetchPlan
+from src.api.resilience import DeadlineExceeded
+from src.api.weather_api import WeatherAPI
+from src.bench.cassette import Cassette
+
+CASSETTE = Cassette.load(os.path.join(os.path.dirname(__file__), '..', 'src', 'bench', 'cassettes', 'seoul.json'))
+
+
+class StubAPI(WeatherAPI):
+    """Answers from the Seoul cassette; endpoints listed in `failing` raise, `delays` slow them down."""
+
+    def __init__(self):
+        self.failing = set()
+        self.delays = {}
+        self.calls = []
+        self.air_started = threading.Event()
+        self.responses = copy.deepcopy(CASSETTE.responses)
+
+    def _answer(self, endpoint):
+        self.calls.append(endpoint)
+        time.sleep(self.delays.get(endpoint, 0))
+        if endpoint in self.failing:
+            raise ConnectionError(f"{endpoint} unavailable")
+        return self.responses[endpoint]
+
+    def get_current_weather(self, city):
+        return self._answer('weather')
+
+    def get_air_quality(self, lat, lon):
+        self.air_started.set()
+        return self._answer('air_pollution')
+
+    def get_forecast(self, city):
+        return self._answer('forecast')
+
+    def get_weather_icon_url(self, icon_code, size='2x'):
+        return ''
+
+
+@pytest.fixture
+def api():
+    return StubAPI()
+
+
+@pytest.fixture
+def plan(api, tmp_path):
+    plan = FetchPlan(api, str(tmp_path / 'locations.json'))
+    yield plan
+    plan.close()
+
+
+def test_fetches_all_three_endpoints(api, plan):
+    data = plan.fetch('Seoul')
+    assert data.current.air_quality > 0
+    assert data.forecast
+    assert sorted(api.calls) == ['air_pollution', 'forecast', 'weather']
+
+
+def test_coordinates_are_remembered_across_instances(api, plan, tmp_path):
+    plan.fetch('Seoul')
+    coord = CASSETTE.body('weather')['coord']
+    assert plan.coordinates('Seoul') == (coord['lat'], coord['lon'])
+    second = FetchPlan(api, str(tmp_path / 'locations.json'))
+    try:
+        assert second.coordinates('Seoul') == (coord['lat'], coord['lon'])
+        # With known coordinates air quality no longer waits for current weather
+        api.delays['weather'] = 0.3
+        api.air_started.clear()
+        started = time.monotonic()
+        second.fetch('Seoul')
+        assert api.air_started.is_set()
+        assert time.monotonic() - started < 0.6
+    finally:
+        second.close()
+
+
+def test_failed_forecast_gives_partial_data(api, plan):
+    api.failing.add('forecast')
+    data = plan.fetch('Seoul')
+    assert data.forecast == ()
+    assert data.current.temperature == CASSETTE.body('weather')['main']['temp']
+
+
+def test_failed_optional_endpoint_reuses_last_good_response(api, plan):
+    first = plan.fetch('Seoul')
+    api.failing.update({'forecast', 'air_pollution'})
+    data = plan.fetch('Seoul')
+    assert data.forecast == first.forecast
+    assert data.current.air_quality == first.current.air_quality
+
+
+def test_failed_current_weather_raises(api, plan):
+    api.failing.add('weather')
+    with pytest.raises(ConnectionError):
+        plan.fetch('Seoul')
+
+
+def test_response_without_coordinates_skips_air_quality(api, plan):
+    del api.responses['weather']['coord']
+    data = plan.fetch('Seoul')
+    assert data.current.air_quality == 0
+    assert 'air_pollution' not in api.calls
+    assert plan.coordinates('Seoul') is None
+
+
+def test_time_budget_drops_slow_optional_endpoint(api, tmp_path):
+    plan = FetchPlan(api, str(tmp_path / 'locations.json'), time_budget=0.3)
+    try:
+        plan.fetch('Seoul')
+        api.delays['forecast'] = 1.0
+        started = time.monotonic()
+        data = plan.fetch('Seoul')
+        assert time.monotonic() - started < 0.8
+        # The previous forecast stands in
+        assert data.forecast
+        api.delays = {'weather': 1.0}
+        with pytest.raises(DeadlineExceeded):
+            plan.fetch('Seoul')
+    finally:
+        plan.close()
@@ -0,0 +1,83 @@
+import time
+from datetime import datetime, timedelta
+from src.models.history_store import HistorySample, HistoryStore
+from src.models.weather_data import CurrentWeather, WeatherCondition
+
+HOUR = 3600
+
+
+def sample(timestamp: float, temperature: float) -> HistorySample:
+    return HistorySample(timestamp, temperature, 50, 1.0, 0.0, 0.0, 1)
+
+
+def current(temperature: float) -> CurrentWeather:
+    return CurrentWeather(temperature, temperature, 50, 1.0, WeatherCondition('clear sky', '01d'), 1, 0.0, 0.0)
+
+
+def hour_start(timestamp: float) -> float:
+    return timestamp - timestamp % HOUR
+
+
+def midnight(days_ago: int) -> float:
+    day = datetime.now().date() - timedelta(days=days_ago)
+    return datetime.combine(day, datetime.min.time()).timestamp()
+
+
+def write_raw(directory, samples):
+    """Raw samples as left by a process that stopped before rolling them up."""
+    store = HistoryStore(str(directory))
+    for item in samples:
+        store.tiers['raw'].append(item)
+    store.close()
+
+
+def test_restart_rolls_up_missed_hours(tmp_path):
+    base = hour_start(time.time()) - 3 * HOUR
+    # Two complete hours of 5-minute samples, then the process stopped
+    write_raw(tmp_path, [sample(base + i * 300, float(i)) for i in range(24)])
+
+    store = HistoryStore(str(tmp_path))
+    hourly = store.query(0, tier='hourly')
+    assert [s.timestamp for s in hourly] == [base, base + HOUR]
+    assert [s.temperature for s in hourly] == [5.5, 17.5]
+    store.close()
+
+    # Opening again doesn't roll the same hours up twice
+    store = HistoryStore(str(tmp_path))
+    assert len(store.query(0, tier='hourly')) == 2
+    store.close()
+
+
+def test_restart_rolls_up_missed_days(tmp_path):
+    samples = [sample(midnight(days_ago) + 6 * HOUR + i * HOUR, float(days_ago))
+               for days_ago in (3, 2) for i in range(4)]
+    write_raw(tmp_path, samples)
+
+    store = HistoryStore(str(tmp_path))
+    daily = store.query(0, tier='daily')
+    assert [s.timestamp for s in daily] == [midnight(3), midnight(2)]
+    assert [s.temperature for s in daily] == [3.0, 2.0]
+    assert len(store.query(0, tier='hourly')) == 8
+    store.close()
+
+
+def test_restart_keeps_the_current_hour_pending(tmp_path):
+    now = time.time()
+    write_raw(tmp_path, [sample(hour_start(now) - HOUR, 1.0), sample(now - 1, 2.0)])
+
+    store = HistoryStore(str(tmp_path))
+    assert [s.temperature for s in store.query(0, tier='hourly')] == [1.0]
+    # The sample of the current hour is averaged in once the hour completes
+    store.append(current(4.0), timestamp=hour_start(now) + HOUR + 1)
+    assert [s.temperature for s in store.query(0, now + 2 * HOUR, tier='hourly')] == [1.0, 2.0]
+    store.close()
+
+
+def test_append_ignores_repeated_observations(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    now = time.time()
+    assert store.append(current(1.0), timestamp=now - 10)
+    assert not store.append(current(1.0), timestamp=now - 10)
+    assert not store.append(current(1.0), timestamp=now - 20)
+    assert store.series('temperature') == [1.0]
+    store.close()
@@ -0,0 +1,102 @@
+import gzip
+import logging
+import os
+import time
+from src.core.log_pipeline import LogWriter, RotatingLogFile
+
+
+def test_rotates_into_gzip_archive(tmp_path):
+    path = str(tmp_path / 'app.log')
+    log_file = RotatingLogFile(path, max_bytes=100, budget_bytes=10000)
+    log_file.write(b'a' * 60)
+    assert log_file.archives() == []
+    log_file.write(b'b' * 60)
+    archives = log_file.archives()
+    assert len(archives) == 1
+    with gzip.open(archives[0], 'rb') as f:
+        assert f.read() == b'a' * 60 + b'b' * 60
+    assert not os.path.exists(path)
+    log_file.write(b'c')
+    assert os.path.getsize(path) == 1
+
+
+def test_prune_deletes_oldest_archives_beyond_budget(tmp_path):
+    path = str(tmp_path / 'app.log')
+    # Incompressible-ish content so every archive has a noticeable size
+    log_file = RotatingLogFile(path, max_bytes=1000, budget_bytes=10 ** 9)
+    for _ in range(5):
+        log_file.write(os.urandom(1000))
+    archives = log_file.archives()
+    assert len(archives) == 5
+    sizes = [os.path.getsize(archive) for archive in archives]
+
+    log_file.budget_bytes = sum(sizes[-2:])
+    log_file.prune()
+    assert log_file.archives() == archives[-2:]
+
+
+def test_prune_keeps_the_current_file_within_budget(tmp_path):
+    path = str(tmp_path / 'app.log')
+    log_file = RotatingLogFile(path, max_bytes=1000, budget_bytes=10 ** 9)
+    log_file.write(os.urandom(1000))
+    log_file.write(b'x' * 500)
+    log_file.budget_bytes = 600
+    log_file.prune()
+    assert log_file.archives() == []
+    assert os.path.getsize(path) == 500
+
+
+def test_oversized_file_is_rotated_on_open(tmp_path):
+    path = tmp_path / 'app.log'
+    path.write_bytes(b'old' * 100)
+    log_file = RotatingLogFile(str(path), max_bytes=100, budget_bytes=10000)
+    assert len(log_file.archives()) == 1
+    assert not path.exists()
+
+
+def test_archives_of_other_logs_are_left_alone(tmp_path):
+    other = tmp_path / 'other.log.20260101-000000-000000.gz'
+    other.write_bytes(b'x' * 1000)
+    log_file = RotatingLogFile(str(tmp_path / 'app.log'), max_bytes=100, budget_bytes=10)
+    log_file.write(b'a' * 100)
+    assert log_file.archives() == []
+    assert other.exists()
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord('test', level, __file__, 1, message, None, None)
+
+
+def run_writer(tmp_path, records, **kwargs) -> str:
+    path = tmp_path / 'app.log'
+    writer = LogWriter(RotatingLogFile(str(path), 10 ** 6, 10 ** 7), flush_seconds=30, **kwargs)
+    writer.start()
+    for record in records:
+        writer.queue.put(record)
+    writer.close()
+    return path.read_text() if path.exists() else ''
+
+
+def test_close_writes_the_pending_batch(tmp_path):
+    text = run_writer(tmp_path, [make_record('first'), make_record('second')])
+    assert 'first' in text and 'second' in text
+
+
+def test_ram_ring_keeps_only_the_last_lines_until_close(tmp_path):
+    text = run_writer(tmp_path, [make_record(f"line {i}") for i in range(5)], ram_lines=2)
+    assert 'line 2' not in text
+    assert 'line 3' in text and 'line 4' in text
+
+
+def test_error_writes_the_ring_as_context(tmp_path):
+    path = tmp_path / 'app.log'
+    writer = LogWriter(RotatingLogFile(str(path), 10 ** 6, 10 ** 7), flush_seconds=30, ram_lines=10)
+    writer.start()
+    writer.queue.put(make_record('context'))
+    writer.queue.put(make_record('failure', logging.ERROR))
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    text = path.read_text()
+    assert 'context' in text and 'failure' in text
+    writer.close()
@@ -0,0 +1,61 @@
+from src.core.lru import LRUCache
+
+
+def make_cache(max_bytes: int = 10, evicted=None) -> LRUCache:
+    on_evict = None if evicted is None else (lambda key, value: evicted.append(key))
+    return LRUCache('test', max_bytes, len, on_evict)
+
+
+def test_evicts_least_recently_used_beyond_budget():
+    evicted = []
+    cache = make_cache(10, evicted)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    cache.put('c', 'xxxx')
+    assert evicted == ['a']
+    assert 'a' not in cache
+    assert len(cache) == 2
+    assert cache.bytes == 8
+
+
+def test_get_counts_as_use():
+    evicted = []
+    cache = make_cache(10, evicted)
+    cache.put('a', 'xxxx')
+    cache.put('b', 'xxxx')
+    assert cache.get('a') == 'xxxx'
+    cache.put('c', 'xxxx')
+    assert evicted == ['b']
+    assert [key for key, _value in cache.items()] == ['a', 'c']
+
+
+def test_replacing_releases_the_old_value():
+    evicted = []
+    cache = make_cache(10, evicted)
+    cache.put('a', 'xx')
+    cache.put('a', 'yyyy')
+    assert evicted == ['a']
+    assert cache.get('a') == 'yyyy'
+    assert cache.bytes == 4
+
+
+def test_newest_entry_is_kept_even_when_oversized():
+    cache = make_cache(10)
+    cache.put('a', 'xx')
+    cache.put('big', 'x' * 20)
+    assert [key for key, _value in cache.items()] == ['big']
+    assert cache.bytes == 20
+
+
+def test_pop_and_clear():
+    evicted = []
+    cache = make_cache(10, evicted)
+    cache.put('a', 'xx')
+    cache.put('b', 'xxx')
+    assert cache.pop('a') == 'xx'
+    assert cache.pop('a') is None
+    assert cache.bytes == 3
+    cache.clear()
+    assert evicted == ['b']
+    assert len(cache) == 0
+    assert cache.bytes == 0
@@ -0,0 +1,115 @@
+import os
+import time
+import pytest
+from src.api.file_api import FileWeatherAPI
+from src.api.providers import FailoverWeatherAPI
+from src.api.weather_api import WeatherAPI
+
+CASSETTE = os.path.join(os.path.dirname(__file__), '..', 'src', 'bench', 'cassettes', 'seoul.json')
+
+
+class StubProvider(WeatherAPI):
+    """Network provider stand-in: answers after `delay` seconds, or raises while `down`."""
+
+    def __init__(self, name: str, delay: float = 0.0):
+        self.name = name
+        self.delay = delay
+        self.down = False
+        self.cached = False
+        self.request_count = 0
+        self.calls = 0
+
+    def get_current_weather(self, city):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError(f"{self.name} is down")
+        if not self.cached:
+            self.request_count += 1
+            time.sleep(self.delay)
+        return {'provider': self.name}
+
+    def get_air_quality(self, lat, lon):
+        return self.get_current_weather('')
+
+    def get_forecast(self, city):
+        return self.get_current_weather(city)
+
+    def get_weather_icon_url(self, icon_code, size='2x'):
+        return ''
+
+
+def names(api: FailoverWeatherAPI, call: str = 'get_current_weather'):
+    return [name for name, _api in api.ordered(call)]
+
+
+def test_follows_configured_order():
+    first, second = StubProvider('first'), StubProvider('second')
+    api = FailoverWeatherAPI([('first', first), ('second', second)])
+    assert api.get_current_weather('Seoul') == {'provider': 'first'}
+    assert second.calls == 0
+
+
+def test_fails_over_and_demotes_failed_provider():
+    first, second = StubProvider('first'), StubProvider('second')
+    first.down = True
+    api = FailoverWeatherAPI([('first', first), ('second', second)])
+    assert api.get_current_weather('Seoul') == {'provider': 'second'}
+    assert names(api) == ['second', 'first']
+    # During the cooldown the failed provider isn't tried first again
+    first.down = False
+    api.get_current_weather('Seoul')
+    assert first.calls == 1
+
+
+def test_all_failing_raises_last_error():
+    first, second = StubProvider('first'), StubProvider('second')
+    first.down = second.down = True
+    api = FailoverWeatherAPI([('first', first), ('second', second)])
+    with pytest.raises(ConnectionError, match='second'):
+        api.get_current_weather('Seoul')
+
+
+def test_much_slower_provider_goes_behind():
+    slow, fast = StubProvider('slow'), StubProvider('fast')
+    api = FailoverWeatherAPI([('slow', slow), ('fast', fast)])
+    api.health['slow'].observe('get_current_weather', 0.4)
+    api.health['fast'].observe('get_current_weather', 0.2)
+    # Within the margin: configured order stays
+    assert names(api) == ['slow', 'fast']
+    api.health['slow'].latency['get_current_weather'] = 3.0
+    assert names(api) == ['fast', 'slow']
+    # Per call: the forecast estimate is unaffected
+    assert names(api, 'get_forecast') == ['slow', 'fast']
+
+
+def test_file_never_jumps_ahead_of_healthy_network_provider():
+    network = StubProvider('network')
+    file_api = FileWeatherAPI(CASSETTE)
+    api = FailoverWeatherAPI([('network', network), ('file', file_api)])
+    api.health['network'].latency['get_current_weather'] = 5.0
+    assert names(api) == ['network', 'file']
+    network.down = True
+    assert api.get_current_weather('Seoul')['name']
+    assert names(api) == ['file', 'network']
+
+
+def test_file_reads_are_not_api_calls():
+    file_api = FileWeatherAPI(CASSETTE)
+    api = FailoverWeatherAPI([('network', StubProvider('network')), ('file', file_api)])
+    file_api.get_current_weather('Seoul')
+    file_api.get_forecast('Seoul')
+    assert file_api.request_count == 0
+    api.get_current_weather('Seoul')
+    assert api.request_count == 1
+
+
+def test_only_network_calls_update_latency():
+    network = StubProvider('network', delay=0.01)
+    api = FailoverWeatherAPI([('network', network)])
+    api.get_current_weather('Seoul')
+    assert api.health['network'].latency['get_current_weather'] >= 0.01
+    before = api.health['network'].latency['get_current_weather']
+    # A cache hit: nothing went upstream, so a fast answer doesn't count
+    network.cached = True
+    api.get_current_weather('Seoul')
+    assert api.health['network'].latency['get_current_weather'] == before
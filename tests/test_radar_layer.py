@@ -0,0 +1,120 @@
+import os
+import socket
+import pytest
+from src.bench.stub_server import StubServer
+from src.ui.radar_layer import RadarLayer
+from tests.test_fetch_plan import CASSETTE
+
+SEOUL = (37.57, 126.98)
+TOKYO = (35.68, 139.69)
+SYDNEY = (-33.87, 151.21)
+
+
+@pytest.fixture
+def stub():
+    stub = StubServer(CASSETTE, seed=1)
+    stub.start()
+    yield stub
+    stub.close()
+
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/map/precipitation_new/{{z}}/{{x}}/{{y}}.png"
+
+
+def record_fetches(layer: RadarLayer) -> list:
+    """Wrap the layer's downloads so the test sees every URL it requests."""
+    urls = []
+    fetch = layer._fetch_bytes
+
+    def recording_fetch(url):
+        urls.append(url)
+        return fetch(url)
+
+    layer._fetch_bytes = recording_fetch
+    return urls
+
+
+def make_layer(tmp_path, radar_url, base_url=None) -> RadarLayer:
+    return RadarLayer(str(tmp_path / 'tiles'), (200, 120), radar_url, base_url=base_url)
+
+
+def cached_tiles(tmp_path) -> list:
+    return [os.path.join(directory, name)
+            for directory, _dirs, files in os.walk(tmp_path / 'tiles') for name in files]
+
+
+def test_render_stitches_radar_over_the_base_map(tmp_path, stub):
+    layer = make_layer(tmp_path, stub.tile_url(), stub.tile_url('base'))
+    urls = record_fetches(layer)
+    image = layer.render(*SEOUL)
+    assert image.size == (200, 120)
+    assert image.mode == 'RGB'
+    assert stub.stats['tiles'] == len(urls) > 0
+    assert any('/map/base/' in url for url in urls) and any('/map/precipitation_new/' in url for url in urls)
+    assert len(cached_tiles(tmp_path)) == len(urls)
+
+
+def test_unchanged_tiles_are_not_rendered_again(tmp_path, stub):
+    layer = make_layer(tmp_path, stub.tile_url())
+    urls = record_fetches(layer)
+    assert layer.render(*SEOUL) is not None
+    requested = len(urls)
+    assert layer.render(*SEOUL) is None
+    assert len(urls) == requested
+    # Moving the view needs other tiles
+    assert layer.render(*TOKYO) is not None
+    assert len(urls) > requested
+
+
+def test_connection_error_skips_the_remaining_downloads(tmp_path):
+    layer = make_layer(tmp_path, closed_port_url())
+    urls = record_fetches(layer)
+    image = layer.render(*SEOUL)
+    assert image.size == (200, 120)
+    assert len(urls) == 1
+
+
+def test_expired_tiles_stand_in_while_offline(tmp_path, stub):
+    layer = make_layer(tmp_path, stub.tile_url())
+    layer.render(*SEOUL)
+    for path in cached_tiles(tmp_path):
+        os.utime(path, (0, 0))
+    stub.close()
+    image = layer.render(*SEOUL)
+    assert image.size == (200, 120)
+    # Still the same stale tiles: nothing to redraw
+    assert layer.render(*SEOUL) is None
+
+
+def test_failed_tile_is_not_requested_again_within_half_an_interval(tmp_path, stub):
+    layer = make_layer(tmp_path, stub.tile_url())
+    urls = record_fetches(layer)
+    stub.error_rate = 1.0
+    layer.render(*SEOUL)
+    failed = set(urls)
+    assert failed
+    stub.error_rate = 0.0
+    urls.clear()
+    layer.render(*SEOUL)
+    assert urls and not failed & set(urls)
+    # Once the negative cache runs out the tile is fetched again
+    layer._failed = {key: 0.0 for key in layer._failed}
+    urls.clear()
+    layer.render(*SEOUL)
+    assert set(urls) == failed
+
+
+def test_cache_is_pruned_at_most_once_per_interval(tmp_path, stub):
+    layer = make_layer(tmp_path, stub.tile_url())
+    prunes = []
+    layer.tiles.prune = lambda: prunes.append(True)
+    layer.render(*SEOUL)
+    layer.render(*TOKYO)
+    assert len(prunes) == 1
+    layer._pruned_at -= layer.refresh_seconds
+    layer.render(*SYDNEY)
+    assert len(prunes) == 2
@@ -0,0 +1,104 @@
+from dataclasses import replace
+from datetime import datetime
+import pytest
+from src.core import refresh_policy as refresh_policy_module
+from src.core.refresh_policy import RefreshPolicy, UPSTREAM_LAG, UPSTREAM_PERIOD
+from tests.test_weather_data import weather
+
+OBSERVED_AT = 1700000000
+
+
+class FakeDatetime(datetime):
+    """datetime whose now() is set by the test."""
+    current = datetime(2026, 1, 1, 12, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Wall clock 100 s after the test weather was observed, at noon."""
+    FakeDatetime.current = datetime(2026, 1, 1, 12, 0)
+    monkeypatch.setattr(refresh_policy_module, 'datetime', FakeDatetime)
+    monkeypatch.setattr(refresh_policy_module.time, 'time', lambda: OBSERVED_AT + 100)
+    return FakeDatetime
+
+
+def policy(**kwargs) -> RefreshPolicy:
+    kwargs.setdefault('jitter', 0)
+    return RefreshPolicy(device_id='frame-1', **kwargs)
+
+
+def test_device_offset_is_stable_and_bounded():
+    first = RefreshPolicy(device_id='frame-1', jitter=30)
+    assert first.device_offset == RefreshPolicy(device_id='frame-1', jitter=30).device_offset
+    assert 0 <= first.device_offset <= 30
+    assert first.device_offset != RefreshPolicy(device_id='frame-2', jitter=30).device_offset
+
+
+def test_errors_back_off_exponentially_up_to_the_maximum(clock):
+    refresh = policy(max_interval=1800)
+    assert [refresh.next_delay(weather(), errors) for errors in (1, 2, 3)] == [60, 120, 240]
+    assert refresh.next_delay(weather(), 10) == 1800
+
+
+def test_without_observation_time_the_minimum_is_used(clock):
+    refresh = policy(min_interval=120)
+    assert refresh.next_delay(None) == 120
+    current = weather().current
+    assert refresh.next_delay(replace(weather(), current=replace(current, observed_at=0))) == 120
+
+
+def test_calm_weather_waits_for_two_upstream_updates(clock):
+    delay = policy().next_delay(weather())
+    assert delay == 2 * UPSTREAM_PERIOD + UPSTREAM_LAG - 100
+
+
+def test_precipitation_waits_for_the_next_update_only(clock):
+    rainy = weather()
+    rainy = replace(rainy, current=replace(rainy.current, rain_amount=0.4))
+    assert policy().next_delay(rainy) == UPSTREAM_PERIOD + UPSTREAM_LAG - 100
+
+
+def test_changing_weather_is_volatile(clock):
+    refresh = policy()
+    refresh.next_delay(weather(temperature=20.0))
+    assert refresh.next_delay(weather(temperature=21.5)) == UPSTREAM_PERIOD + UPSTREAM_LAG - 100
+    assert refresh.next_delay(weather(temperature=21.5, icon='10d')) == UPSTREAM_PERIOD + UPSTREAM_LAG - 100
+    assert refresh.next_delay(weather(temperature=21.8, icon='10d')) == 2 * UPSTREAM_PERIOD + UPSTREAM_LAG - 100
+
+
+def test_night_doubles_the_wait_within_the_maximum(clock):
+    clock.current = datetime(2026, 1, 1, 3, 0)
+    assert policy(max_interval=3600).next_delay(weather()) == 4 * UPSTREAM_PERIOD + UPSTREAM_LAG - 100
+    assert policy(max_interval=1800).next_delay(weather()) == 1800
+
+
+def test_late_upstream_is_not_hammered(clock, monkeypatch):
+    monkeypatch.setattr(refresh_policy_module.time, 'time', lambda: OBSERVED_AT + 7200)
+    assert policy(min_interval=120).next_delay(weather()) == 120
+
+
+def test_daily_budget_spreads_the_remaining_calls(clock):
+    # 18:00, six hours to midnight; 18 calls left are six refreshes of three calls
+    clock.current = datetime(2026, 1, 1, 18, 0)
+    refresh = policy(daily_budget=100)
+    refresh.record_calls(82)
+    assert refresh.next_delay(weather(), calls_per_refresh=3) == 3600
+
+
+def test_exhausted_budget_waits_until_midnight(clock):
+    clock.current = datetime(2026, 1, 1, 22, 0)
+    refresh = policy(daily_budget=100)
+    refresh.record_calls(99)
+    assert refresh.next_delay(weather(), calls_per_refresh=3) == 2 * 3600
+
+
+def test_call_count_resets_on_a_new_day(clock):
+    refresh = policy(daily_budget=100)
+    refresh.record_calls(99)
+    clock.current = datetime(2026, 1, 2, 0, 5)
+    refresh.record_calls(3)
+    assert refresh.calls_today == 3
@@ -0,0 +1,90 @@
+import pytest
+from src.api.openweather_api import OpenWeatherAPI
+from src.api.resilience import CircuitBreaker, CircuitOpenError, DeadlineExceeded, deadline, time_left
+
+
+def open_breaker(**kwargs) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=2, **kwargs)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert 29 < breaker.retry_in() <= 30
+
+
+def test_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_probe_through():
+    breaker = open_breaker(reset_timeout=0)
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_for_longer():
+    breaker = open_breaker(reset_timeout=0.01, max_reset_timeout=0.03)
+    breaker._opened_at -= 1
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker._open_for == 0.02
+    breaker._opened_at -= 1
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker._open_for == 0.03
+
+
+def test_release_frees_the_probe():
+    breaker = open_breaker(reset_timeout=0)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_half_open_probe_hitting_the_deadline_frees_the_probe():
+    api = OpenWeatherAPI('key', base_url='http://127.0.0.1:9')
+    breaker = api.breakers['weather'] = open_breaker(reset_timeout=0)
+    with deadline(0.1):
+        # Less than MIN_ATTEMPT_SECONDS left: fails before anything is sent
+        with pytest.raises(DeadlineExceeded):
+            api._send_with_retries('weather', f"{api.base_url}/weather", {}, {})
+    assert api.request_count == 0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow()
+
+
+def test_open_circuit_fails_fast():
+    api = OpenWeatherAPI('key', base_url='http://127.0.0.1:9')
+    api.breakers['weather'] = open_breaker(reset_timeout=30)
+    with pytest.raises(CircuitOpenError):
+        api._send_with_retries('weather', f"{api.base_url}/weather", {}, {})
+    assert api.request_count == 0
+
+
+def test_nested_deadlines_only_shrink():
+    assert time_left() is None
+    with deadline(10):
+        with deadline(100):
+            assert time_left() <= 10
+        with deadline(1):
+            assert time_left() <= 1
+    assert time_left() is None
@@ -0,0 +1,151 @@
+import threading
+import pytest
+from src.api import response_cache as response_cache_module
+from src.api.response_cache import CachedResponse, ResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Loader:
+    """Serves `body` with an ETag and answers conditional requests for an unchanged body like a 304."""
+
+    def __init__(self, clock, body, etag='"v1"'):
+        self.clock = clock
+        self.body = body
+        self.etag = etag
+        self.calls = []
+
+    def __call__(self, stale):
+        self.calls.append(stale)
+        if stale is not None and stale.etag == self.etag:
+            return CachedResponse(stale.body, self.clock(), stale.etag)
+        return CachedResponse(self.body, self.clock(), self.etag)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache_module.time, 'time', clock)
+    return clock
+
+
+def test_key_ignores_api_key_and_parameter_order():
+    assert (ResponseCache.key('weather', {'q': 'Seoul', 'appid': 'a', 'units': 'metric'})
+            == ResponseCache.key('weather', {'units': 'metric', 'q': 'Seoul', 'appid': 'b'})
+            == 'weather?q=Seoul&units=metric')
+
+
+def test_fresh_entry_is_served_without_loading(clock):
+    cache = ResponseCache({'weather': 60})
+    loader = Loader(clock, {'temp': 1})
+    assert cache.fetch('weather', 'k', loader) == {'temp': 1}
+    clock.now += 59
+    assert cache.fetch('weather', 'k', loader) == {'temp': 1}
+    assert len(loader.calls) == 1
+    assert cache.stats['hits'] == 1 and cache.stats['misses'] == 1
+
+
+def test_expired_entry_is_revalidated_and_keeps_the_body(clock):
+    cache = ResponseCache({'weather': 60})
+    loader = Loader(clock, {'temp': 1})
+    first = cache.fetch('weather', 'k', loader)
+    clock.now += 61
+    assert cache.fetch('weather', 'k', loader) is first
+    assert loader.calls[1].etag == '"v1"'
+    assert cache.stats['revalidated'] == 1
+    # The revalidated entry is fresh again
+    clock.now += 30
+    cache.fetch('weather', 'k', loader)
+    assert len(loader.calls) == 2
+
+
+def test_changed_body_replaces_the_entry(clock):
+    cache = ResponseCache({'weather': 60})
+    loader = Loader(clock, {'temp': 1})
+    cache.fetch('weather', 'k', loader)
+    clock.now += 61
+    loader.body, loader.etag = {'temp': 2}, '"v2"'
+    assert cache.fetch('weather', 'k', loader) == {'temp': 2}
+    assert cache.stats['revalidated'] == 0
+
+
+def test_expires_at_overrides_the_endpoint_ttl(clock):
+    cache = ResponseCache({'forecast': 3600})
+    calls = []
+
+    def loader(stale):
+        calls.append(stale)
+        return CachedResponse({'list': []}, clock(), expires_at=clock() + 10)
+
+    key = ResponseCache.key('forecast', {'q': 'Seoul'})
+    cache.fetch('forecast', key, loader)
+    clock.now += 11
+    cache.fetch('forecast', key, loader)
+    assert len(calls) == 2
+    assert cache.expiring(['forecast'], clock.now + 11) == 1
+    assert cache.expiring(['forecast'], clock.now + 5) == 0
+
+
+def test_concurrent_fetches_share_one_load(clock):
+    cache = ResponseCache({'weather': 60})
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def slow_loader(stale):
+        calls.append(stale)
+        started.set()
+        release.wait(5)
+        return CachedResponse({'temp': 1}, clock())
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.fetch('weather', 'k', slow_loader)))
+    leader.start()
+    assert started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.fetch('weather', 'k', slow_loader)))
+                 for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while cache.stats['coalesced'] < 3:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    assert len(calls) == 1
+    assert results == [{'temp': 1}] * 4
+
+
+def test_failed_load_is_not_cached(clock):
+    cache = ResponseCache({'weather': 60})
+
+    def failing(stale):
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        cache.fetch('weather', 'k', failing)
+    assert cache.fetch('weather', 'k', Loader(clock, {'temp': 1})) == {'temp': 1}
+
+
+def test_entries_survive_a_restart(clock, tmp_path):
+    loader = Loader(clock, {'temp': 1})
+    ResponseCache({'weather': 60}, cache_dir=str(tmp_path)).fetch('weather', 'k', loader)
+    restarted = ResponseCache({'weather': 60}, cache_dir=str(tmp_path))
+    assert restarted.fetch('weather', 'k', loader) == {'temp': 1}
+    assert len(loader.calls) == 1
+    # Once expired, the persisted ETag is used for revalidation
+    clock.now += 61
+    restarted.fetch('weather', 'k', loader)
+    assert loader.calls[1].etag == '"v1"'
+    assert [path.name for path in tmp_path.iterdir() if path.name.endswith('.tmp')] == []
+
+
+def test_unreadable_cache_file_is_ignored(clock, tmp_path):
+    cache = ResponseCache({'weather': 60}, cache_dir=str(tmp_path))
+    with open(cache._path('k'), 'w') as f:
+        f.write('{not json')
+    assert cache.fetch('weather', 'k', Loader(clock, {'temp': 1})) == {'temp': 1}
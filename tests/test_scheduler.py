@@ -0,0 +1,117 @@
+import pytest
+from src.core import scheduler as scheduler_module
+from src.core.scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeLoop:
+    """Records the armed timer instead of running it, like Tk's after()/after_cancel()."""
+
+    def __init__(self):
+        self.armed = None
+        self.cancelled = []
+        self._ids = 0
+
+    def after(self, delay_ms, callback):
+        self._ids += 1
+        self.armed = (self._ids, delay_ms, callback)
+        return self._ids
+
+    def after_cancel(self, timer_id):
+        self.cancelled.append(timer_id)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def loop():
+    return FakeLoop()
+
+
+def test_only_earliest_deadline_is_armed(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    scheduler.call_later(10, lambda: None, 'late')
+    assert loop.armed[1] == 10000
+    scheduler.call_later(2, lambda: None, 'early')
+    assert loop.armed[1] == 2000
+    assert [name for name, _delay in scheduler.pending()] == ['early', 'late']
+
+
+def test_due_jobs_run_in_one_wakeup(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel, slack=0.05)
+    ran = []
+    scheduler.call_later(1, lambda: ran.append('a'))
+    scheduler.call_later(1.03, lambda: ran.append('b'))
+    scheduler.call_later(5, lambda: ran.append('c'))
+    clock.now += 1
+    scheduler.run_due()
+    assert ran == ['a', 'b']
+    assert scheduler.wakeups == 1
+    assert loop.armed[1] == 4000
+
+
+def test_periodic_job_does_not_drift(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    job = scheduler.every(60, lambda: None)
+    # The loop fires late; the next deadline still counts from the previous one
+    clock.now += 60.5
+    scheduler.run_due()
+    assert job.deadline == 1120.0
+
+
+def test_periodic_job_skips_missed_runs(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    runs = []
+    job = scheduler.every(10, lambda: runs.append(clock.now))
+    clock.now += 95
+    scheduler.run_due()
+    assert len(runs) == 1
+    assert job.deadline == 1100.0
+
+
+def test_cancelled_job_does_not_run(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    ran = []
+    job = scheduler.call_later(1, lambda: ran.append('cancelled'))
+    scheduler.call_later(3, lambda: ran.append('kept'))
+    job.cancel()
+    assert loop.armed[1] == 3000
+    clock.now += 3
+    scheduler.run_due()
+    assert ran == ['kept']
+
+
+def test_failing_job_does_not_stop_others(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    ran = []
+
+    def broken():
+        raise RuntimeError("boom")
+
+    scheduler.every(1, broken, 'broken')
+    scheduler.call_later(1, lambda: ran.append('other'))
+    clock.now += 1
+    scheduler.run_due()
+    assert ran == ['other']
+    assert [name for name, _delay in scheduler.pending()] == ['broken']
+
+
+def test_close_cancels_everything(clock, loop):
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    scheduler.every(1, lambda: None)
+    timer_id = loop.armed[0]
+    scheduler.close()
+    assert scheduler.pending() == []
+    assert timer_id in loop.cancelled
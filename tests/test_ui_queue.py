@@ -0,0 +1,126 @@
+import os
+import threading
+import tkinter as tk
+from src.ui import ui_queue as ui_queue_module
+from src.ui.ui_queue import UIQueue
+
+
+class FakeTk:
+    def __init__(self, file_handlers: bool = True):
+        self.file_handlers = file_handlers
+        self.handlers = {}
+
+    def createfilehandler(self, fd, mask, callback):
+        if not self.file_handlers:
+            raise tk.TclError("no file handlers")
+        self.handlers[fd] = callback
+
+    def deletefilehandler(self, fd):
+        self.handlers.pop(fd, None)
+
+
+class FakeRoot:
+    """Just the parts of a Tk root UIQueue uses; after() callbacks are collected, not run."""
+
+    def __init__(self, file_handlers: bool = True):
+        self.tk = FakeTk(file_handlers)
+        self.timers = []
+
+    def after(self, delay_ms, callback):
+        self.timers.append((delay_ms, callback))
+
+
+def pending_bytes(queue: UIQueue) -> int:
+    try:
+        return len(os.read(queue._read_fd, 512))
+    except BlockingIOError:
+        return 0
+
+
+def wake(root: FakeRoot, queue: UIQueue):
+    root.tk.handlers[queue._read_fd](queue._read_fd, tk.READABLE)
+
+
+def test_one_wakeup_for_many_tasks():
+    root = FakeRoot()
+    queue = UIQueue(root)
+    ran = []
+    for i in range(10):
+        queue.put(lambda i=i: ran.append(i))
+    assert ran == []
+    wake(root, queue)
+    assert ran == list(range(10))
+    # The single wakeup byte was consumed by the handler
+    assert pending_bytes(queue) == 0
+    queue.close()
+
+
+def test_next_put_after_drain_wakes_again():
+    root = FakeRoot()
+    queue = UIQueue(root)
+    queue.put(lambda: None)
+    wake(root, queue)
+    queue.put(lambda: None)
+    assert pending_bytes(queue) == 1
+    queue.close()
+
+
+def test_idle_queue_never_wakes_the_loop():
+    root = FakeRoot()
+    queue = UIQueue(root)
+    assert pending_bytes(queue) == 0
+    assert root.timers == []
+    assert queue.waiting_since() is None
+    queue.close()
+
+
+def test_failing_task_does_not_stop_the_drain():
+    root = FakeRoot()
+    queue = UIQueue(root)
+    ran = []
+    queue.put(lambda: 1 / 0)
+    queue.put(lambda: ran.append('after'))
+    wake(root, queue)
+    assert ran == ['after']
+    queue.close()
+
+
+def test_put_after_close_is_ignored():
+    root = FakeRoot()
+    queue = UIQueue(root)
+    queue.close()
+    queue.put(lambda: None)
+    queue.close()
+    assert root.tk.handlers == {}
+
+
+def test_close_during_put_cannot_close_the_wakeup_fd_under_it(monkeypatch):
+    root = FakeRoot()
+    queue = UIQueue(root)
+    real_write = os.write
+    closer = threading.Thread(target=queue.close)
+    written_after_close = []
+
+    def write(fd, data):
+        # A close() from another thread arrives right before the wakeup byte is written
+        closer.start()
+        closer.join(0.2)
+        written_after_close.append(queue._closed)
+        return real_write(fd, data)
+
+    monkeypatch.setattr(ui_queue_module.os, 'write', write)
+    queue.put(lambda: None)
+    closer.join()
+    assert written_after_close == [False]
+
+
+def test_falls_back_to_polling_without_file_handlers():
+    root = FakeRoot(file_handlers=False)
+    queue = UIQueue(root)
+    ran = []
+    queue.put(lambda: ran.append('task'))
+    assert len(root.timers) == 1
+    _delay, poll = root.timers.pop()
+    poll()
+    assert ran == ['task']
+    queue.close()
@@ -0,0 +1,62 @@
+import time
+from src.core.event_loop import EventLoop
+from src.core.scheduler import Scheduler
+from src.core.watchdog import LoopWatchdog
+
+
+class Source:
+    def __init__(self):
+        self.since = None
+
+    def __call__(self):
+        return self.since
+
+
+def test_idle_loop_is_neither_woken_nor_reported():
+    loop = EventLoop()
+    scheduler = Scheduler(loop.after, loop.after_cancel)
+    scheduler.every(60, lambda: None)
+    watchdog = LoopWatchdog([scheduler.waiting_since, loop.waiting_since], stall_threshold=1)
+    watchdog.check()
+    assert watchdog.stalls == 0
+    # Nothing was queued on the loop by the check
+    assert loop.waiting_since() is None
+
+
+def test_reports_work_waiting_longer_than_threshold_once():
+    source = Source()
+    watchdog = LoopWatchdog([source], stall_threshold=1)
+    source.since = time.monotonic() - 0.5
+    watchdog.check()
+    assert watchdog.stalls == 0
+    source.since = time.monotonic() - 2
+    watchdog.check()
+    watchdog.check()
+    assert watchdog.stalls == 1
+
+
+def test_new_stall_after_recovery_is_reported_again():
+    source = Source()
+    watchdog = LoopWatchdog([source], stall_threshold=1)
+    source.since = time.monotonic() - 2
+    watchdog.check()
+    source.since = None
+    watchdog.check()
+    source.since = time.monotonic() - 3
+    watchdog.check()
+    assert watchdog.stalls == 2
+
+
+def test_future_timer_deadline_is_not_waiting():
+    source = Source()
+    watchdog = LoopWatchdog([source], stall_threshold=1)
+    source.since = time.monotonic() + 60
+    watchdog.check()
+    assert watchdog.stalls == 0
+
+
+def test_queued_loop_task_counts_as_waiting():
+    loop = EventLoop()
+    loop.put(lambda: None)
+    since = loop.waiting_since()
+    assert since is not None and since <= time.monotonic()
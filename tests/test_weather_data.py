@@ -0,0 +1,54 @@
+from dataclasses import replace
+from datetime import date
+from src.models.weather_data import CurrentWeather, DailyForecast, WeatherCondition, WeatherData
+
+
+def weather(temperature: float = 20.0, icon: str = '01d', forecast_days: int = 2) -> WeatherData:
+    current = CurrentWeather(temperature, temperature - 1, 40, 2.5, WeatherCondition('clear sky', icon), 1, 0.0, 0.0,
+                             observed_at=1700000000)
+    forecast = tuple(DailyForecast(date(2026, 1, day + 1), 10.0 + day, 20.0 + day) for day in range(forecast_days))
+    return WeatherData(current, forecast, city='Seoul')
+
+
+def test_diff_without_previous_lists_every_field():
+    changes = weather().diff(None)
+    assert changes.changes['city'][1] == 'Seoul'
+    assert changes.changes['current.temperature'][1] == 20.0
+    assert changes.changes['current.weather.icon'][1] == '01d'
+    assert 'forecast' in changes
+
+
+def test_equal_snapshots_have_no_changes():
+    changes = weather().diff(weather())
+    assert not changes
+    assert list(changes) == []
+
+
+def test_diff_names_changed_fields():
+    old = weather()
+    new = replace(old, current=replace(old.current, temperature=21.5))
+    changes = new.diff(old)
+    assert changes.changes == {'current.temperature': (20.0, 21.5)}
+    assert changes.touches('current')
+    assert changes.touches('current.temperature')
+    assert not changes.touches('current.weather', 'forecast', 'city')
+
+
+def test_diff_of_nested_and_forecast_fields():
+    old = weather()
+    forecast = (old.forecast[0], replace(old.forecast[1], temp_max=30.0))
+    new = replace(old, current=replace(old.current, weather=WeatherCondition('rain', '10d')), forecast=forecast)
+    changes = new.diff(old)
+    assert set(changes) == {'current.weather.description', 'current.weather.icon', 'forecast.1.temp_max'}
+    assert changes.touches('current.weather.icon')
+    assert changes.touches('forecast')
+
+
+def test_forecast_length_change_is_one_entry():
+    changes = weather(forecast_days=3).diff(weather(forecast_days=2))
+    assert set(changes) == {'forecast'}
+
+
+def test_dict_round_trip_has_no_changes():
+    data = weather()
+    assert not WeatherData.from_dict(data.to_dict()).diff(data)